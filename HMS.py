@@ -1,23 +1,44 @@
 import hashlib
 import logging
 import os
-import tempfile
 import time
 from datetime import datetime
-from pathlib import Path
-import plotly.express as px
 import mysql.connector as sq
 import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
 import streamlit as st
 from dotenv import load_dotenv
-from fpdf import FPDF
 
+from bootstrap import ensure_bootstrapped, pending_schema_versions, start_warm_up
+from dashboard_metrics import DashboardSnapshot, load_dashboard_snapshot
+from dashboard_panels import DASHBOARD_PANELS, PanelPrefetch
+from database import cached_query, get_connection
+from date_ranges import DateRange
+from exporters import EXPORTS, ExportSpec, available_formats, load_watermarks, run_export, save_watermarks
+from figure_cache import figure_cache
+from history_summary import HISTORY_QUERY, refresh_patient_history
+from lazy_imports import lazy_import
+from pagination import TableSpec, page_query, prefix_pattern, split_page, table_query
+from patient_history import filter_history, prepare_history
+from query_cache import query_cache
+from report_jobs import report_jobs
+from reports import REPORTS
+from room_allocation import (GENERAL_ROOM_TYPES, RoomUnavailableError, admit_emergency_patient,
+                             allocate_emergency_icu_room, allocate_patient_room)
+from rollups import RollupBump, bump_rollups
+from search import SEARCH_ALL_LIMIT, SEARCH_LIMIT, search, search_all
+from typeahead import DOCTOR_STAFF, PATIENTS, PATIENTS_WITHOUT_ROOMS, PrefixIndex
+
+# Charting libraries are only loaded by the first page that draws a chart (reports.py does the same for fpdf)
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 # Load environment variables
 load_dotenv()
 
+# Set HMS_SHOW_SPLASH=0 to start without the welcome splash (kiosks, shift changes)
+HMS_SHOW_SPLASH = os.getenv("HMS_SHOW_SPLASH", "1").strip().lower() not in ("0", "false", "no", "off")
+
 # Configure logging
 logging.basicConfig(filename="app.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logging.info("Application Started")
@@ -171,57 +192,74 @@ def glowing_text(text, size=100, color="#FFFFFF"):  # Set text color to white
 
 
 def startup_animation():
+    """
+    Show the welcome splash as a full-screen overlay that cycles its messages and fades out in pure CSS.
+
+    Nothing here waits: the page renders (and initialization continues) underneath, the overlay stops
+    intercepting clicks once it has faded, and "Skip" hides it at once.
+    """
     messages = [
         "🌟 Welcome To 🌟",
         "🏥 The Hospital Management System 🏥",
         "🚀 Project By 🚀",
         "👨‍💻 YUVRAJ K GOND ‍💻"
     ]
+    seconds = len(messages)
 
-    container = st.empty()
-    box_html = """
-    <div style='width:100%; height:600px; border: none; border-radius: 50px; 
-    background: linear-gradient(45deg, #FF0000, #FF7F00, #FFFF00, #00FF00, #0000FF, #4B0082, #9400D3);
-    background-size: 200% 200%; animation: rainbow 5s ease infinite; display:flex; justify-content:center; align-items:center;'>
-    {content}
+    # Each message is stacked in the same spot and visible for its own one-second slot
+    slides = "".join(
+        f"<div class='hms-splash-slide' style='animation-delay:{i}s'>{glowing_text(msg, size=48, color='#FFFFFF')}</div>"
+        for i, msg in enumerate(messages)
+    )
+    st.markdown(f"""
+    <div id="hms-splash" class="hms-splash">
+        <div class="hms-splash-box">{slides}</div>
+        <a class="hms-splash-skip" href="#hms-splash">Skip ⏭</a>
     </div>
     <style>
+    .hms-splash {{
+        position: fixed; inset: 0; z-index: 999999; display: flex; justify-content: center; align-items: center;
+        background: rgba(0, 0, 0, 0.6);
+        animation: hms-splash-out 0.6s ease {seconds}s forwards;
+    }}
+    .hms-splash:target {{ display: none; }}
+    .hms-splash-box {{
+        position: relative; width: 90%; height: 600px; border: none; border-radius: 50px;
+        background: linear-gradient(45deg, #FF0000, #FF7F00, #FFFF00, #00FF00, #0000FF, #4B0082, #9400D3);
+        background-size: 200% 200%; animation: rainbow 5s ease infinite;
+    }}
+    .hms-splash-slide {{
+        position: absolute; inset: 0; display: flex; justify-content: center; align-items: center;
+        opacity: 0; animation: hms-splash-slide 1s ease both;
+    }}
+    .hms-splash-skip {{
+        position: absolute; right: 40px; bottom: 40px; color: #FFFFFF; font-weight: bold; text-decoration: none;
+    }}
     @keyframes rainbow {{
         0% {{background-position: 0% 50%;}}
         50% {{background-position: 100% 50%;}}
         100% {{background-position: 0% 50%;}}
     }}
+    @keyframes hms-splash-slide {{
+        0%, 100% {{opacity: 0;}}
+        15%, 85% {{opacity: 1;}}
+    }}
+    @keyframes hms-splash-out {{
+        to {{opacity: 0; visibility: hidden;}}
+    }}
     </style>
-    """
-
-    start_time = time.time()
-    while time.time() - start_time < 4:
-        for msg in messages:
-            if time.time() - start_time >= 4:
-                break
-            container.markdown(
-                box_html.format(content=glowing_text(msg, size=48, color="#FFFFFF")),  # Set text color to white
-                unsafe_allow_html=True
-            )
-            time.sleep(1)
-
-    # Clear the animation container
-    container.empty()
-    st.session_state["startup_done"] = True
-    st.rerun()  # Rerun the app to display the login page
+    """, unsafe_allow_html=True)
 
 
 # ------------------ Database Connection ------------------
 def connection():
+    """
+    Borrow a connection from the process-wide pool (see database.py).
+
+    The returned connection goes back to the pool on close() or at the end of a `with` block.
+    """
     try:
-        con = sq.connect(host="localhost", user="root", password=".#RamJi.", database="HospitalManagement")
-        if con.is_connected():
-            logging.info("Database connection established successfully.")
-            return con
-        else:
-            st.error("Database Not Connected!")
-            logging.error("Database connection failed.")
-            return None
+        return get_connection()
     except sq.Error as er:
         st.error(f"Error: {er}")
         logging.error(f"Database connection error: {er}")
@@ -245,13 +283,14 @@ def register_user(username, password, full_name, user_role):
     try:
         con = connection()
         if con:
-            cur = con.cursor()
-            hashed_password = hash_password(password)
-            cur.execute(
-                "INSERT INTO users(username, password_hash, full_name, user_role) VALUES (%s, %s, %s, %s)",
-                (username, hashed_password, full_name, user_role)
-            )
-            con.commit()
+            with con:
+                cur = con.cursor()
+                hashed_password = hash_password(password)
+                cur.execute(
+                    "INSERT INTO users(username, password_hash, full_name, user_role) VALUES (%s, %s, %s, %s)",
+                    (username, hashed_password, full_name, user_role)
+                )
+                con.commit()
             st.success("User Registered Successfully! Please Login.")
             logging.info(f"User {username} registered successfully with role: {user_role}.")
     except sq.Error as er:
@@ -266,13 +305,14 @@ def login_user(username, password):
     try:
         con = connection()
         if con:
-            cur = con.cursor()
-            hashed_password = hash_password(password)
-            cur.execute(
-                "SELECT user_role FROM users WHERE username=%s AND password_hash=%s",
-                (username, hashed_password)
-            )
-            user = cur.fetchone()
+            with con:
+                cur = con.cursor()
+                hashed_password = hash_password(password)
+                cur.execute(
+                    "SELECT user_role FROM users WHERE username=%s AND password_hash=%s",
+                    (username, hashed_password)
+                )
+                user = cur.fetchone()
             if user:
                 st.session_state['authenticated'] = True
                 st.session_state['user_role'] = user[0]
@@ -456,51 +496,132 @@ def view_patient_history():
 
 # ------------------ Fetch Data ------------------
 def fetch_data(query, table_name, columns=None, default_columns=None, params=None):
+    """
+    Run a read query and return a DataFrame.
+
+    Column names and dtypes come from the cursor metadata of the query itself (see database.run_query),
+    so no extra metadata round trip is made. `columns` renames the result columns positionally;
+    `table_name` is kept for call-site readability and logging. Results are served from the shared
+    query cache until a write to one of the queried tables is committed.
+    """
     try:
-        con = connection()
-        if con:
-            cur = con.cursor()
-            if params:
-                cur.execute(query, params)
-            else:
-                cur.execute(query)
-            data = cur.fetchall()
+        result = cached_query(query, params)
+        if not result.rows and default_columns:
+            return pd.DataFrame(columns=default_columns)
+        return result.to_frame(columns)
+    except sq.Error as er:
+        st.error(f"Error fetching data: {er}")
+        logging.error(f"Error fetching data from {table_name}: {er}")
+        return pd.DataFrame(columns=default_columns or columns if columns else [])
 
-            if columns:
-                col_names = columns
-            else:
-                if "COUNT" in query or "SUM" in query or "GROUP BY" in query:
-                    col_names = ["category", "count"]
-                else:
-                    cur.execute(f"SHOW COLUMNS FROM {table_name}")
-                    col_names = [col[0] for col in cur.fetchall()]
 
-            con.close()
+# ------------------ Paginated Tables ------------------
+PAGE_SIZES = [25, 50, 100, 250]
 
-            if not data:
-                return pd.DataFrame(columns=default_columns or col_names)
 
-            if len(data[0]) != len(col_names):
-                col_names = col_names[:len(data[0])]
+def paginated_table(spec, key, empty_message="No records found.", extra_where=None):
+    """
+    Render one page of `spec` with filter, sort and page-size controls and Previous/Next buttons.
 
-            return pd.DataFrame(data, columns=col_names)
-        else:
-            return pd.DataFrame(columns=default_columns or columns if columns else [])
+    Only the visible page is fetched (keyset pagination, see pagination.py). The stack of page cursors
+    is kept in st.session_state under `key` and resets whenever the filter, sort order, page size or
+    `extra_where` (sql, params) changes. Returns the displayed page as a DataFrame.
+    """
+    controls = st.columns(4 if spec.filter_columns else 2)
+    filters = {}
+    if spec.filter_columns:
+        filter_label = controls[0].selectbox("Filter column", [label for label, _ in spec.filter_columns],
+                                             key=f"{key}_filter_column")
+        filters[filter_label] = controls[1].text_input("Starts with", key=f"{key}_filter_text").strip()
+    sort_label = controls[-2].selectbox("Sort by", [label for label, _ in spec.sort_columns], key=f"{key}_sort")
+    page_size = controls[-1].selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    descending = st.checkbox("Descending order", key=f"{key}_descending")
+
+    signature = (tuple(filters.items()), sort_label, descending, page_size, extra_where)
+    state = st.session_state.setdefault(f"{key}_pages", {"signature": signature, "cursors": [None]})
+    if state["signature"] != signature:
+        state["signature"], state["cursors"] = signature, [None]
+    cursors = state["cursors"]
+
+    query, params = page_query(spec, sort_label, descending, filters, cursors[-1], page_size, extra_where)
+    page, has_next, next_cursor = split_page(fetch_data(query, spec.name, params=params), page_size)
+
+    if page.empty and len(cursors) == 1:
+        st.info(empty_message)
+        return page
+
+    st.dataframe(page)
+    prev_col, info_col, next_col = st.columns([1, 2, 1])
+    if prev_col.button("◀ Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    info_col.caption(f"Page {len(cursors)} · {len(page)} rows")
+    if next_col.button("Next ▶", key=f"{key}_next", disabled=not has_next):
+        cursors.append(next_cursor)
+        st.rerun()
+    return page
+
+
+def table_download(spec, key, label, file_name):
+    """
+    Button exporting every row of paginated_table(spec, key) that matches its current filters and sort,
+    not just the visible page, as CSV. Rows are streamed through exporters.run_export.
+    """
+    state = st.session_state.get(f"{key}_pages")
+    if state is None or not st.button(label, key=f"{key}_download"):
+        return
+    filters, sort_label, descending, _, extra_where = state["signature"]
+    sql, params = table_query(spec, sort_label, descending, dict(filters), extra_where)
+    try:
+        result = run_export([ExportSpec(file_name, sql=sql, params=params)], "CSV")
     except sq.Error as er:
-        st.error(f"Error fetching data: {er}")
-        logging.error(f"Error fetching data: {er}")
-        return pd.DataFrame(columns=default_columns or columns if columns else [])
+        st.error(f"Error exporting data: {er}")
+        logging.error(f"Error exporting {spec.name}: {er}")
+        return
+    st.download_button(label="Download CSV", data=result.read(), file_name=result.file_name, mime=result.mime)
+
+
+# ------------------ Typeahead Selector ------------------
+def typeahead_select(label, source, key):
+    """
+    Incremental selector: a search box that narrows `source` (a typeahead.TypeaheadSource or PrefixIndex)
+    to its top matches by name or ID, and a selectbox over those matches. Returns the selected key or None.
+    """
+    text = st.text_input(f"{label} (type a name or ID)", key=f"{key}_query")
+    labels = dict(source.lookup(text))
+    if not labels:
+        st.caption("No matches.")
+        return None
+    return st.selectbox(label, list(labels), format_func=labels.get, key=f"{key}_choice")
+
+
+def typeahead_size(source):
+    """Number of records in `source`; shows the database error (like fetch_data) if it could not be loaded."""
+    size = len(source)
+    if source.error:
+        st.error(f"Error fetching data: {source.error}")
+    return size
 
 
 # ------------------ Insert Data ------------------
-def insert_data(query, values):
+def insert_data(query, values, history_ids=(), rollups=()):
+    """
+    Execute a single write and commit it.
+
+    `history_ids` are patient IDs whose patient_history_summary rows the write affects, or a callable
+    taking the cursor (e.g. to read lastrowid); they are refreshed in the same transaction. `rollups`
+    are RollupBumps for the daily_rollups rows the write adds to, applied in the same transaction too.
+    """
     try:
         values = tuple(int(val) if isinstance(val, (np.int64, np.int32)) else val for val in values)
         con = connection()
         if con:
-            cur = con.cursor()
-            cur.execute(query, values)
-            con.commit()
+            with con:
+                cur = con.cursor()
+                cur.execute(query, values)
+                refresh_patient_history(con, history_ids(cur) if callable(history_ids) else history_ids)
+                bump_rollups(con, rollups)
+                con.commit()
             st.success("Data inserted successfully!")
             logging.info(f"Data inserted successfully: {query}")
     except sq.Error as er:
@@ -510,13 +631,13 @@ def insert_data(query, values):
 
 def log_user_action(username, role, action):
     try:
-        con = connection()
-        cur = con.cursor()
-        cur.execute(
-            "INSERT INTO user_logs (username, role, action) VALUES (%s, %s, %s)",
-            (username, role, action)
-        )
-        con.commit()
+        with get_connection() as con:
+            cur = con.cursor()
+            cur.execute(
+                "INSERT INTO user_logs (username, role, action) VALUES (%s, %s, %s)",
+                (username, role, action)
+            )
+            con.commit()
     except sq.Error as er:
         logging.error(f"Error logging user action: {er}")
 
@@ -524,23 +645,18 @@ def log_user_action(username, role, action):
 def mark_attendance(username, role):
     """Mark attendance for a user if not already marked for the day."""
     try:
-        con = connection()
-        cur = con.cursor()
-
-        # Check if attendance is already marked for the day
-        cur.execute(
-            "SELECT id FROM attendance WHERE username = %s AND attendance_date = CURDATE()",
-            (username,)
-        )
-        if cur.fetchone():
-            return  # Attendance already marked
+        with get_connection() as con:
+            cur = con.cursor()
 
-        # Mark attendance
-        cur.execute(
-            "INSERT INTO attendance (username, role, attendance_date) VALUES (%s, %s, CURDATE())",
-            (username, role)
-        )
-        con.commit()
+            # Single upsert: the unique (username, attendance_date) key (migration 1) makes repeats a no-op
+            cur.execute(
+                """
+                INSERT INTO attendance (username, role, attendance_date) VALUES (%s, %s, CURDATE())
+                ON DUPLICATE KEY UPDATE username = username
+                """,
+                (username, role)
+            )
+            con.commit()
     except sq.Error as er:
         logging.error(f"Error marking attendance: {er}")
 
@@ -559,7 +675,8 @@ def attendance_dashboard():
 
 def fetch_last_7_days_records():
     """Fetch attendance records for the last 7 days."""
-    query = """
+    date_filter, params = DateRange.last_n_days(7).predicate("attendance_date")
+    query = f"""
         SELECT 
             username, 
             role, 
@@ -567,11 +684,11 @@ def fetch_last_7_days_records():
         FROM 
             attendance 
         WHERE 
-            attendance_date >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
+            {date_filter}
         ORDER BY 
             attendance_date DESC
     """
-    return fetch_data(query, "attendance", columns=["Username", "Role", "Date"])
+    return fetch_data(query, "attendance", columns=["Username", "Role", "Date"], params=params)
 
 
 def show_last_7_days_records():
@@ -602,18 +719,19 @@ def show_last_7_days_records():
 
 def fetch_monthly_summary():
     """Fetch monthly attendance summary by role."""
-    query = """
+    date_filter, params = DateRange.last_n_months(1).predicate("attendance_date")
+    query = f"""
         SELECT 
             role, 
             COUNT(DISTINCT username) AS user_count 
         FROM 
             attendance 
         WHERE 
-            attendance_date >= DATE_SUB(CURDATE(), INTERVAL 1 MONTH)
+            {date_filter}
         GROUP BY 
             role
     """
-    return fetch_data(query, "attendance", columns=["Role", "User Count"])
+    return fetch_data(query, "attendance", columns=["Role", "User Count"], params=params)
 
 
 def show_monthly_summary():
@@ -700,18 +818,15 @@ def add_doctor():
     st.markdown('<div class="header-lightblue"><h3> 👨‍⚕️Add Doctor</h3></div>', unsafe_allow_html=True)
     check_user_role(["Admin", "Doctor", "Receptionist", "Nurse"])  # Added "Nurse" to allowed roles
 
-    # Fetch staff names, IDs, and roles for doctors
-    staff_data = fetch_data("SELECT id, staff_name, role FROM staff WHERE role = 'Doctor'", "staff",
-                            columns=["Staff ID", "Staff Name", "Role"])
-
-    if staff_data.empty:
+    # Staff members with the Doctor role, searched by name or ID (see typeahead.py)
+    if not typeahead_size(DOCTOR_STAFF):
         st.warning("No doctors found in the staff table.")
         return
 
-    # Select doctor name
-    staff_name = st.selectbox("Select Doctor", staff_data["Staff Name"])
-    staff_id = staff_data[staff_data["Staff Name"] == staff_name]["Staff ID"].iloc[0]
-    role = staff_data[staff_data["Staff Name"] == staff_name]["Role"].iloc[0]
+    staff_id = typeahead_select("Select Doctor", DOCTOR_STAFF, "add_doctor_staff")
+    if staff_id is None:
+        return
+    role = "Doctor"
 
     # Input department
     department = st.text_input("Department*")
@@ -730,49 +845,6 @@ def add_doctor():
 
 
 # ------------------ Manage Patients Section ------------------
-def initialize_rooms_and_ambulances():
-    """Initialize 50 general rooms, 25 ICU rooms, and 5 ambulances if they don't exist."""
-    con = connection()
-    cur = con.cursor()
-
-    # Check if rooms already exist
-    cur.execute("SELECT COUNT(*) FROM rooms")
-    if cur.fetchone()[0] == 0:
-        # Create 50 general rooms (Single, Double, Deluxe)
-        for i in range(1, 51):
-            room_type = "Single" if i <= 20 else ("Double" if i <= 40 else "Deluxe")
-            cur.execute(
-                "INSERT INTO rooms (room_number, room_type, availability, is_icu) VALUES (%s, %s, 'Not Booked', FALSE)",
-                (f"GEN-{i}", room_type)
-            )
-
-        # Create 25 ICU rooms
-        for i in range(1, 26):
-            cur.execute(
-                "INSERT INTO rooms (room_number, room_type, availability, is_icu) VALUES (%s, 'ICU', 'Not Booked', TRUE)",
-                (f"ICU-{i}",)
-            )
-
-        con.commit()
-
-    # Check if ambulances already exist
-    cur.execute("SELECT COUNT(*) FROM ambulances")
-    if cur.fetchone()[0] == 0:
-        # Create 5 ambulances
-        for i in range(1, 6):
-            cur.execute(
-                "INSERT INTO ambulances (ambulance_number, status) VALUES (%s, 'Available')",
-                (f"AMB-{i}",)
-            )
-
-        con.commit()
-
-    con.close()
-
-
-# Call the function to initialize rooms and ambulances
-initialize_rooms_and_ambulances()
-
 def add_patient():
     check_user_role(["Admin", "Doctor", "Receptionist", "Nurse"])
     try:
@@ -844,7 +916,9 @@ def add_patient():
                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     """,
                     (name, age, gender, address, contact_no, dob, consultant_name, department, date_of_consultancy,
-                     diseases, fees, medicine_name, quantity)
+                     diseases, fees, medicine_name, quantity),
+                    history_ids=lambda cur: [cur.lastrowid],
+                    rollups=[RollupBump("admissions", date_of_consultancy)]
                 )
                 st.success("Patient added successfully!")
                 logging.info(f"Patient {name} added successfully.")
@@ -861,83 +935,81 @@ def add_patient():
         logging.error(f"Error adding patient: {e}")
 
 
+PATIENT_RECORDS = TableSpec(
+    name="patients",
+    select_list="""
+        p.id AS 'Patient ID',
+        p.name AS 'Patient Name',
+        p.age AS 'Age',
+        p.gender AS 'Gender',
+        p.address AS 'Address',
+        p.contact_no AS 'Contact No',
+        p.dob AS 'Date of Birth',
+        p.consultant_name AS 'Consultant',
+        p.date_of_consultancy AS 'Consultancy Date',
+        p.department AS 'Department',
+        p.diseases AS 'Disease',
+        p.fees AS 'Fees',
+        p.medicine AS 'Medicine',
+        p.quantity AS 'Quantity',
+        COALESCE(r.room_number, 'N/A') AS 'Room Number',
+        COALESCE(r.room_type, 'N/A') AS 'Room Type'
+    """,
+    from_clause="patients p LEFT JOIN rooms r ON p.id = r.patient_id",
+    # A patient can hold several rooms, so the room id is part of the row key
+    key=("p.id", "COALESCE(r.id, 0)"),
+    sort_columns=(("Patient ID", "p.id"), ("Patient Name", "p.name"),
+                  ("Consultancy Date", "p.date_of_consultancy"), ("Age", "p.age")),
+)
+
+
 def view_patients():
     st.markdown('<div class="header-lightblue"><h3>📋 Patient Records with Room and Medicine Details</h3></div>', unsafe_allow_html=True)
     check_user_role(["Admin", "Doctor", "Receptionist", "Nurse"])
 
-    # Fetch patient data with room and medicine details
-    query = """
-        SELECT 
-            p.id AS 'Patient ID',
-            p.name AS 'Patient Name',
-            p.age AS 'Age',
-            p.gender AS 'Gender',
-            p.address AS 'Address',
-            p.contact_no AS 'Contact No',
-            p.dob AS 'Date of Birth',
-            p.consultant_name AS 'Consultant',
-            p.date_of_consultancy AS 'Consultancy Date',
-            p.department AS 'Department',
-            p.diseases AS 'Disease',
-            p.fees AS 'Fees',
-            p.medicine AS 'Medicine',
-            p.quantity AS 'Quantity',
-            COALESCE(r.room_number, 'N/A') AS 'Room Number',
-            COALESCE(r.room_type, 'N/A') AS 'Room Type'
-        FROM 
-            patients p
-        LEFT JOIN 
-            rooms r ON p.id = r.patient_id
-    """
-    patient_data = fetch_data(query, "patients", columns=[
-        "Patient ID", "Patient Name", "Age", "Gender", "Address", "Contact No",
-        "Date of Birth", "Consultant", "Consultancy Date", "Department",
-        "Disease", "Fees", "Medicine", "Quantity", "Room Number", "Room Type"
-    ])
-
-    if patient_data.empty:
-        st.info("No patient records found.")
-    else:
-        # Add search and filter functionality
-        st.markdown("### 🔍 Search and Filter Patients")
-        col1, col2 = st.columns(2)
-
-        with col1:
-            search_query = st.text_input("Search by Patient Name or ID")
-
-        with col2:
-            filter_department = st.selectbox("Filter by Department",
-                                             ["All"] + list(patient_data["Department"].unique()))
-
-        # Apply search and filter
-        if search_query:
-            patient_data = patient_data[
-                patient_data["Patient Name"].str.contains(search_query, case=False) |
-                patient_data["Patient ID"].astype(str).str.contains(search_query)
-                ]
-
-        if filter_department != "All":
-            patient_data = patient_data[patient_data["Department"] == filter_department]
-
-        # Display the filtered data
-        st.dataframe(patient_data)
+    # Search and filter are applied in SQL so only the visible page is fetched
+    st.markdown("### 🔍 Search and Filter Patients")
+    col1, col2 = st.columns(2)
 
-        # Add a download button for exporting the patient data
-        if st.button("📥 Download Patient Records as CSV"):
-            csv = patient_data.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="Download CSV",
-                data=csv,
-                file_name="patient_records.csv",
-                mime="text/csv"
-            )
+    with col1:
+        search_query = st.text_input("Search by Patient Name (starts with) or ID").strip()
 
-        # Add a simple visualization
+    with col2:
+        # Cached until the next patient write; idx_patients_department turns it into an index-only scan
+        departments = fetch_data("SELECT DISTINCT department FROM patients ORDER BY department", "patients",
+                                 columns=["Department"])
+        filter_department = st.selectbox("Filter by Department", ["All"] + departments["Department"].tolist())
+
+    # Prefix LIKE and ID equality can both be answered from an index (idx_patients_name, PRIMARY);
+    # a leading-wildcard LIKE or CAST(p.id AS CHAR) would scan every row.
+    conditions, params = [], []
+    if search_query.isdecimal():
+        conditions.append("(p.id = %s OR p.name LIKE %s)")
+        params.extend([int(search_query), prefix_pattern(search_query)])
+    elif search_query:
+        conditions.append("p.name LIKE %s")
+        params.append(prefix_pattern(search_query))
+    if filter_department != "All":
+        conditions.append("p.department = %s")
+        params.append(filter_department)
+    extra_where = (" AND ".join(conditions), tuple(params))
+
+    patient_data = paginated_table(PATIENT_RECORDS, "patients", "No patient records found.", extra_where)
+
+    if not patient_data.empty:
+        # Add a download button for exporting every matching patient, not just the visible page
+        table_download(PATIENT_RECORDS, "patients", "📥 Download Patient Records as CSV", "patient_records")
+
+        # Add a simple visualization over every matching patient, not just the visible page
         st.markdown("### 📊 Patient Distribution by Department")
-        if not patient_data.empty:
-            department_counts = patient_data["Department"].value_counts().reset_index()
-            department_counts.columns = ["Department", "Number of Patients"]
-
+        query = "SELECT p.department, COUNT(*) FROM patients p"
+        if extra_where[0]:
+            query += f" WHERE {extra_where[0]}"
+        query += " GROUP BY p.department ORDER BY COUNT(*) DESC"
+        department_counts = fetch_data(query, "patients", columns=["Department", "Number of Patients"],
+                                       params=extra_where[1])
+
+        if not department_counts.empty:
             fig = px.bar(
                 department_counts,
                 x="Department",
@@ -989,7 +1061,10 @@ def discharge_patient():
             (row["Patient ID"], row["Emergency Patient ID"], row["Room Number"], row["ICU Room"])
         for _, row in patient_data.iterrows()
     }
-    selected_patient = st.selectbox("Select Patient to Discharge", list(patient_options.keys()))
+    # Searchable by patient name, ID and room number
+    search_texts = [f"{row['Patient Name']} {row['Patient ID']} {row['Room Number']}" for _, row in patient_data.iterrows()]
+    selected_patient = typeahead_select("Select Patient to Discharge",
+                                        PrefixIndex(zip(patient_options, patient_options, search_texts)), "discharge")
     patient_id, emergency_patient_id, room_number, is_icu = patient_options.get(selected_patient, (None, None, None, None))
 
     if selected_patient:
@@ -1051,6 +1126,8 @@ def discharge_patient():
                         (room_number,)
                     )
 
+                    refresh_patient_history(con, [patient_id, emergency_patient_id])
+                    bump_rollups(con, [RollupBump("discharges")])
                     con.commit()
                     st.success(f"✅ {patient_info['Patient Name']} discharged successfully! Room {room_number} is now available.")
                     st.rerun()
@@ -1065,57 +1142,43 @@ def discharge_patient():
     else:
         st.warning("Please select a patient to discharge.")
 
+DISCHARGED_PATIENT_RECORDS = TableSpec(
+    name="discharged_patients",
+    select_list="""
+        COALESCE(patient_id, emergency_patient_id) AS 'Patient ID',
+        patient_name AS 'Patient Name',
+        room_number AS 'Room Number',
+        room_type AS 'Room Type',
+        IF(is_icu, 'Yes', 'No') AS 'ICU Room',
+        discharge_date AS 'Discharge Date',
+        discharge_time AS 'Discharge Time',
+        discharge_reason AS 'Discharge Reason'
+    """,
+    from_clause="discharged_patients",
+    key="discharge_id",
+    sort_columns=(("Discharge Order", "discharge_id"), ("Discharge Date", "discharge_date"),
+                  ("Patient Name", "patient_name")),
+    filter_columns=(("Patient Name", "patient_name"), ("Room Number", "room_number"), ("Room Type", "room_type")),
+)
+
+
 def view_discharged_patients():
     st.markdown('<div class="header-lightblue"><h3>\U0001F4DC Discharged Patients Records</h3></div>',
                 unsafe_allow_html=True)
     check_user_role(["Admin", "Doctor", "Receptionist", "Nurse"])
 
-    # Fetch discharged patient records
-    discharged_data = fetch_data(
-        """
-        SELECT 
-            COALESCE(patient_id, emergency_patient_id) AS 'Patient ID',
-            patient_name AS 'Patient Name',
-            room_number AS 'Room Number',
-            room_type AS 'Room Type',
-            is_icu AS 'ICU Room',
-            discharge_date AS 'Discharge Date',
-            discharge_time AS 'Discharge Time',
-            discharge_reason AS 'Discharge Reason'
-        FROM discharged_patients
-        """,
-        "discharged_patients",
-        ["Patient ID", "Patient Name", "Room Number", "Room Type", "ICU Room", "Discharge Date", "Discharge Time",
-         "Discharge Reason"]
-    )
-
-    # Check if there are any discharged patients
-    if discharged_data.empty:
-        st.info("No discharged patient records found.")
-    else:
-        # Display the ICU room status
-        discharged_data["ICU Room"] = discharged_data["ICU Room"].apply(lambda x: "Yes" if x else "No")
-        st.dataframe(discharged_data)
+    paginated_table(DISCHARGED_PATIENT_RECORDS, "discharged_patients", "No discharged patient records found.")
 
 def allocate_room():
     try:
         st.markdown('<div class="header-lightblue"><h3>\U0001F3E2 Allocate Room to Patient</h3></div>', unsafe_allow_html=True)
 
-        # Fetch patients without allocated rooms
-        patients_without_rooms = fetch_data(
-            "SELECT id, name FROM patients WHERE id NOT IN (SELECT patient_id FROM rooms WHERE patient_id IS NOT NULL)",
-            "patients",
-            ["Patient ID", "Patient Name"]
-        )
-
-        if not patients_without_rooms.empty:
-            # Convert to native Python types
-            patient_options = {
-                f"{row['Patient Name']} (ID: {int(row['Patient ID'])})": int(row['Patient ID'])
-                for _, row in patients_without_rooms.iterrows()
-            }
-            selected_patient = st.selectbox("Select Patient", list(patient_options.keys()))
-            patient_id = patient_options.get(selected_patient)
+        # Patients without allocated rooms, searched by name or ID (see typeahead.py)
+        if typeahead_size(PATIENTS_WITHOUT_ROOMS):
+            patient_id = typeahead_select("Select Patient", PATIENTS_WITHOUT_ROOMS, "allocate_room_patient")
+            if patient_id is None:
+                return
+            selected_patient = PATIENTS_WITHOUT_ROOMS.name(patient_id)
 
             # Fetch available general rooms
             available_rooms = fetch_data(
@@ -1125,23 +1188,26 @@ def allocate_room():
             )
 
             if not available_rooms.empty:
-                room_options = {
+                room_type = st.selectbox("Room Type", ["Any"] + GENERAL_ROOM_TYPES)
+                if room_type != "Any":
+                    available_rooms = available_rooms[available_rooms["Room Type"] == room_type]
+                # The first option lets the allocator pick whichever matching room is still free on click
+                room_options = {"First available": None}
+                room_options.update({
                     f"{row['Room Number']} ({row['Room Type']})": int(row['Room ID'])
                     for _, row in available_rooms.iterrows()
-                }
+                })
                 selected_room = st.selectbox("Select Room", list(room_options.keys()))
-                room_id = room_options.get(selected_room)
-
-                if st.button("Allocate Room") and patient_id and room_id:
-                    # Convert to native Python int
-                    patient_id = int(patient_id)
-                    room_id = int(room_id)
 
-                    insert_data(
-                        "UPDATE rooms SET availability = 'Booked', patient_id = %s WHERE id = %s",
-                        (patient_id, room_id)
-                    )
-                    st.success(f"Room {selected_room} allocated to {selected_patient}!")
+                if st.button("Allocate Room") and patient_id:
+                    try:
+                        claim = allocate_patient_room(
+                            int(patient_id), room_options[selected_room], None if room_type == "Any" else room_type)
+                    except RoomUnavailableError as e:
+                        st.warning(str(e))
+                    else:
+                        st.success(f"Room {claim.room_number} ({claim.room_type}) allocated to {selected_patient}!")
+                        logging.info(f"Room {claim.room_number} allocated to patient {patient_id}.")
             else:
                 st.warning("No general rooms available.")
         else:
@@ -1201,11 +1267,15 @@ def add_emergency_patient():
         ["ID", "Room Number"]
     )
 
-    room_options = {
+    # "First available" claims whichever ICU room is still free when the patient is added
+    room_options = {"First available": None}
+    room_options.update({
         f"{row['Room Number']}": int(row['ID'])  # Convert to native Python int
         for _, row in available_icu_rooms.iterrows()
-    }
-    selected_room = st.selectbox("Assign ICU Room*", ["NA"] + list(room_options.keys()))
+    })
+    selected_room = st.selectbox("Assign ICU Room*", list(room_options.keys()))
+    if available_icu_rooms.empty:
+        st.warning("No ICU rooms are free right now.")
 
     # Doctor Assignment
     available_doctors = fetch_data(
@@ -1224,28 +1294,37 @@ def add_emergency_patient():
         required_fields = [name, contact_no, address, blood_type, selected_doctor]
         if not all(required_fields):
             st.error("Please fill all required fields (*)")
-        elif selected_room == "NA":
-            st.error("ICU Room selection is mandatory")
         else:
-            # Get room_id from options
-            room_id = room_options.get(selected_room)
-
-            # Insert emergency patient
-            insert_data(
-                """
-                INSERT INTO emergency_patients (name, contact_no, address, blood_type, room_id, doctor_id)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """,
-                (name, contact_no, address, blood_type, room_id, doctor_id)
-            )
-
-            # Update ICU room status
-            insert_data(
-                "UPDATE rooms SET availability = 'Booked' WHERE id = %s",
-                (room_id,)
-            )
+            # Patient row and ICU room claim commit together (room_allocation.py)
+            try:
+                _, claim = admit_emergency_patient(
+                    name, contact_no, address, blood_type, doctor_id, room_options[selected_room])
+            except RoomUnavailableError as e:
+                st.error(str(e))
+            except sq.Error as er:
+                st.error(f"Error: {er}")
+                logging.error(f"Error adding emergency patient: {er}")
+            else:
+                st.success(f"Emergency patient added successfully to ICU room {claim.room_number}!")
+
+EMERGENCY_PATIENT_RECORDS = TableSpec(
+    name="emergency_patients",
+    select_list="""
+        ep.id AS 'ID',
+        ep.name AS 'Patient Name',
+        ep.contact_no AS 'Contact No',
+        ep.address AS 'Address',
+        ep.blood_type AS 'Blood Type',
+        r.room_number AS 'Room Number',
+        s.staff_name AS 'Assigned Doctor',
+        ep.admission_date AS 'Admission Date'
+    """,
+    from_clause="emergency_patients ep LEFT JOIN rooms r ON ep.room_id = r.id LEFT JOIN staff s ON ep.doctor_id = s.id",
+    key="ep.id",
+    sort_columns=(("ID", "ep.id"), ("Admission Date", "ep.admission_date"), ("Patient Name", "ep.name")),
+    filter_columns=(("Patient Name", "ep.name"), ("Contact No", "ep.contact_no"), ("Blood Type", "ep.blood_type")),
+)
 
-            st.success("Emergency patient added successfully!")
 
 def view_emergency_patients():
     st.markdown('<div class="header-lightblue"><h3>🚨 Emergency Patients Records</h3></div>', unsafe_allow_html=True)
@@ -1264,48 +1343,16 @@ def view_emergency_patients():
 
     st.write(f"**ICU Rooms:** {available_icu} Available / {total_icu} Total")
 
-    # Fetch emergency patient data with room numbers
-    query = """
-        SELECT 
-            ep.id AS 'ID',
-            ep.name AS 'Patient Name',
-            ep.contact_no AS 'Contact No',
-            ep.address AS 'Address',
-            ep.blood_type AS 'Blood Type',
-            r.room_number AS 'Room Number',
-            s.staff_name AS 'Assigned Doctor',
-            ep.admission_date AS 'Admission Date'
-        FROM 
-            emergency_patients ep
-        LEFT JOIN 
-            rooms r ON ep.room_id = r.id
-        LEFT JOIN 
-            staff s ON ep.doctor_id = s.id
-    """
-    emergency_data = fetch_data(query, "emergency_patients")
-
-    if emergency_data.empty:
-        st.info("No emergency patient records found.")
-    else:
-        st.dataframe(emergency_data)
+    # Fetch one page of emergency patient data with room numbers
+    paginated_table(EMERGENCY_PATIENT_RECORDS, "emergency_patients", "No emergency patient records found.")
 
 def allocate_icu_room_to_emergency_patient(patient_id):
     """Allocate an ICU room to an emergency patient from Emergency Unit section."""
-    con = connection()
-    cur = con.cursor()
-
-    # Get available ICU room
-    cur.execute("SELECT id, room_number FROM rooms WHERE availability = 'Not Booked' AND is_icu = TRUE LIMIT 1")
-    room = cur.fetchone()
-    if room:
-        room_id, room_number = room
-
-        # Assign room to patient
-        cur.execute("UPDATE rooms SET availability = 'Booked', patient_id = %s WHERE id = %s", (patient_id, room_id))
-        con.commit()
-        return f"ICU Room {room_number} allocated successfully!"
-    else:
-        return "No ICU rooms available!"
+    try:
+        claim = allocate_emergency_icu_room(patient_id)
+    except RoomUnavailableError as e:
+        return str(e)
+    return f"ICU Room {claim.room_number} allocated successfully!"
 
 
 # New function to handle discharging emergency patients
@@ -1345,25 +1392,10 @@ def discharge_emergency_patient_ui():
 def emergency_summary_metrics():
     st.markdown('<div class="header-lightblue"><h3>📊 Emergency Summary Metrics</h3></div>', unsafe_allow_html=True)
 
-    # Total Emergency Patients
-    total_patients = fetch_data("SELECT COUNT(*) FROM emergency_patients", "emergency_patients", columns=["count"])
-    total_patients = total_patients.iloc[0, 0] if not total_patients.empty else 0
-
-    # Available ICU Rooms
-    available_icu_rooms = fetch_data(
-        "SELECT COUNT(*) FROM rooms WHERE is_icu = TRUE AND availability = 'Not Booked'",
-        "rooms",
-        columns=["count"]
-    )
-    available_icu_rooms = available_icu_rooms.iloc[0, 0] if not available_icu_rooms.empty else 0
-
-    # Assigned Doctors
-    assigned_doctors = fetch_data(
-        "SELECT COUNT(DISTINCT doctor_id) FROM emergency_patients",
-        "emergency_patients",
-        columns=["count"]
-    )
-    assigned_doctors = assigned_doctors.iloc[0, 0] if not assigned_doctors.empty else 0
+    snapshot = get_dashboard_snapshot()
+    total_patients = snapshot.emergency_count
+    available_icu_rooms = snapshot.total_icu_rooms - snapshot.occupied_icu_rooms
+    assigned_doctors = snapshot.emergency_doctor_count
 
     # Display metrics
     col1, col2, col3 = st.columns(3)
@@ -1404,8 +1436,8 @@ def emergency_patients_over_time():
 
     # Fetch data
     patients_over_time = fetch_data(
-        "SELECT DATE(admission_date) as date, COUNT(*) as count FROM emergency_patients GROUP BY DATE(admission_date)",
-        "emergency_patients",
+        "SELECT day, count FROM daily_rollups WHERE metric = 'emergency_arrivals' ORDER BY day",
+        "daily_rollups",
         columns=["Date", "Count"]
     )
 
@@ -1533,19 +1565,18 @@ def add_bill():
     try:
         st.markdown('<div class="header-lightblue"><h3>💸 Add New Bill</h3></div>', unsafe_allow_html=True)
 
-        # Fetch patient data
-        patient_data = fetch_data("SELECT id, name FROM patients", "patients", ["id", "name"])
-
-        if not patient_data.empty:
-            # Select patient
-            patient_name = st.selectbox("Select Patient", patient_data["name"])
-            patient_id = int(patient_data.loc[patient_data["name"] == patient_name, "id"].values[0])
+        if typeahead_size(PATIENTS):
+            # Select patient by name or ID (see typeahead.py)
+            patient_id = typeahead_select("Select Patient", PATIENTS, "bill_patient")
+            if patient_id is None:
+                return
+            patient_name = PATIENTS.name(patient_id)
 
             # Fetch patient details
-            con = connection()
-            cur = con.cursor()
-            cur.execute("SELECT contact_no, fees FROM patients WHERE id = %s", (patient_id,))
-            patient_info = cur.fetchone()
+            with get_connection() as con:
+                cur = con.cursor()
+                cur.execute("SELECT contact_no, fees FROM patients WHERE id = %s", (patient_id,))
+                patient_info = cur.fetchone()
             contact_no = patient_info[0]
             doctor_fees = patient_info[1]
 
@@ -1575,7 +1606,8 @@ def add_bill():
                         VALUES (CURDATE(), %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     """, (
                     patient_id, patient_name, contact_no, room_charges, pathology_fees, medicine_charges, doctor_fees,
-                    room_type, total_amount))
+                    room_type, total_amount), history_ids=[patient_id],
+                        rollups=[RollupBump("revenue", amount=total_amount, dimension=room_type)])
 
                     st.success("Bill added successfully!")
                     logging.info(f"Bill added for patient {patient_name}.")
@@ -1589,72 +1621,137 @@ def add_bill():
         st.error(f"Error in billing section: {e}")
         logging.error(f"Error in billing section: {e}")
 
+BILL_RECORDS = TableSpec(
+    name="bill_details",
+    select_list="""
+        b.bill_no AS 'Bill No',
+        b.bill_date AS 'Bill Date',
+        b.patient_id AS 'Patient ID',
+        p.name AS 'Patient Name',
+        p.age AS 'Age',
+        p.gender AS 'Gender',
+        p.address AS 'Address',
+        p.contact_no AS 'Contact No',
+        p.dob AS 'Date of Birth',
+        p.consultant_name AS 'Consultant',
+        p.department AS 'Department',
+        p.diseases AS 'Disease',
+        p.fees AS 'Fees',
+        p.medicine AS 'Medicine',
+        p.quantity AS 'Quantity',
+        b.room_charges AS 'Room Charges',
+        b.pathology_fees AS 'Pathology Fees',
+        b.medicine_charges AS 'Medicine Charges',
+        b.doctor_fees AS 'Doctor Fees',
+        b.total_amount AS 'Total Amount',
+        b.room_type AS 'Room Type'
+    """,
+    from_clause="bill_details b JOIN patients p ON b.patient_id = p.id",
+    key="b.bill_no",
+    sort_columns=(("Bill No", "b.bill_no"), ("Bill Date", "b.bill_date"), ("Total Amount", "b.total_amount")),
+    filter_columns=(("Patient Name", "p.name"), ("Room Type", "b.room_type")),
+)
+
+
 def view_bills():
     st.markdown('<div class="header-lightblue"><h3>\U0001F4B8 Billing Information</h3></div>', unsafe_allow_html=True)
 
 
-    # Fetch billing data along with patient details
-    query = """
-        SELECT 
-            b.bill_no AS 'Bill No', 
-            b.bill_date AS 'Bill Date', 
-            b.patient_id AS 'Patient ID', 
-            p.name AS 'Patient Name', 
-            p.age AS 'Age', 
-            p.gender AS 'Gender', 
-            p.address AS 'Address', 
-            p.contact_no AS 'Contact No', 
-            p.dob AS 'Date of Birth', 
-            p.consultant_name AS 'Consultant', 
-            p.department AS 'Department', 
-            p.diseases AS 'Disease', 
-            p.fees AS 'Fees',
-            p.medicine AS 'Medicine',
-            p.quantity AS 'Quantity',
-            b.room_charges AS 'Room Charges', 
-            b.pathology_fees AS 'Pathology Fees', 
-            b.medicine_charges AS 'Medicine Charges', 
-            b.doctor_fees AS 'Doctor Fees', 
-            b.total_amount AS 'Total Amount', 
-            b.room_type AS 'Room Type'
-        FROM bill_details b
-        JOIN patients p ON b.patient_id = p.id
+    # Fetch one page of billing data along with patient details
+    paginated_table(BILL_RECORDS, "bills", "No billing records found.")
+
+# ------------------ Dashboard Section ------------------
+def get_dashboard_snapshot():
+    """Load the dashboard KPI snapshot, falling back to an all-zero snapshot if the query fails."""
+    try:
+        return load_dashboard_snapshot()
+    except sq.Error as er:
+        st.error(f"Error fetching dashboard metrics: {er}")
+        logging.error(f"Error fetching dashboard metrics: {er}")
+        return DashboardSnapshot()
+
+
+# Collapsible chart sections: (key, title, panels). ROOM_DETAILS stands for whichever room view is selected.
+ROOM_DETAILS = "room_details"
+ROOM_DETAIL_PANELS = {"ICU Rooms": "icu_rooms", "General Rooms": "general_rooms"}
+DASHBOARD_SECTIONS = [
+    ("revenue", "💰 Revenue Trend", ["revenue_trend"]),
+    ("rooms", "🏨 Rooms", ["room_utilization", ROOM_DETAILS, "room_allocation"]),
+    ("staff", "🌌 Staff Shifts", ["staff_shifts"]),
+    ("patients", "👥 Patient Breakdown", ["age_distribution", "gender_ratio", "departments", "diseases"]),
+    ("appointments", "📅 Appointments", ["appointments"]),
+    ("admissions", "📈 Admissions & Discharges", ["discharges", "admissions"]),
+]
+
+
+def section_panels(section, names):
+    """Panels `section` will render on this run: none while it is collapsed, and only the selected room view."""
+    if not st.session_state.get(f"dashboard_{section}", False):
+        return []
+    room_view = st.session_state.get("dashboard_room_view", next(iter(ROOM_DETAIL_PANELS)))
+    return [ROOM_DETAIL_PANELS[room_view] if name == ROOM_DETAILS else name for name in names]
+
+
+def session_figure(name):
     """
-    columns = [
-        "Bill No", "Bill Date", "Patient ID", "Patient Name", "Age", "Gender",
-        "Address", "Contact No", "Date of Birth", "Consultant", "Department",
-        "Disease", "Fees", "Medicine", "Quantity", "Room Charges", "Pathology Fees",
-        "Medicine Charges", "Doctor Fees", "Total Amount", "Room Type"
-    ]
-    df = fetch_data(query, "bill_details", columns)
+    The figure built earlier in this session for panel `name`, or None if it has to be rebuilt.
+
+    A figure is reused while no write has been committed to the tables behind it, and for at most the
+    query cache TTL, which bounds staleness from writes made outside this process.
+    """
+    entry = st.session_state.get("dashboard_figures", {}).get(name)
+    if entry and entry[0] == DASHBOARD_PANELS[name].data_version() and entry[1] > time.monotonic():
+        return entry[2]
+    return None
+
+
+def render_panel(prefetch, name):
+    """
+    Show the chart of panel `name`, from the session figure cache or built from its prefetched data.
+
+    Chart helpers return the figure, or None after showing their own empty-data or error message.
+    A placeholder is shown instead if the query failed or missed its deadline.
+    """
+    title, build_chart, chart_args = DASHBOARD_CHARTS[name]
+    fig = session_figure(name)
+    if fig is None:
+        data = prefetch.result(name)
+        if data is None:
+            if prefetch.failures.get(name) == "timed out":
+                st.info(f"⏳ {title} is taking longer than usual and will appear on the next refresh.")
+            else:
+                st.warning(f"⚠ {title} could not be loaded.")
+            return
+        # Built figures are also shared across sessions, keyed on the chart and a hash of its data
+        fig = figure_cache.get_or_build(name, data, lambda: build_chart(data))
+        if fig is None:
+            return
+        figures = st.session_state.setdefault("dashboard_figures", {})
+        figures[name] = (prefetch.versions[name], time.monotonic() + query_cache.ttl, fig)
+    st.plotly_chart(fig, **chart_args)
 
-    if df.empty:
-        st.info("No billing records found.")
-    else:
-        st.dataframe(df)
 
-# ------------------ Dashboard Section ------------------
 def show_dashboard():
     # Key Metrics Section
     st.markdown('<div class="header-lightblue"><h3>📊 Hospital Dashboard</h3></div>', unsafe_allow_html=True)
     check_user_role(["Admin", "Doctor", "Receptionist", "Nurse", "Patient"])
+
+    # Only expanded sections are queried, concurrently while the KPIs load; unchanged charts come from the session
+    visible = [name for section, _, names in DASHBOARD_SECTIONS for name in section_panels(section, names)]
+    prefetch = PanelPrefetch([name for name in visible if session_figure(name) is None])
+
+    # All scalar KPIs for this render come from one snapshot query
+    snapshot = get_dashboard_snapshot()
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        data = fetch_data("SELECT COUNT(*) FROM patients WHERE DATE(date_of_consultancy) = CURDATE()", "patients")
-        total_patients_today = data.iloc[0, 0] if not data.empty else 0
-        st.metric("Total Patients Admitted Today", total_patients_today)
+        st.metric("Total Patients Admitted Today", snapshot.admitted_today)
 
     with col2:
-        data = fetch_data("SELECT COUNT(*) FROM rooms WHERE room_type = 'ICU' AND availability = 'Not Booked'", "rooms")
-        available_icu_rooms = data.iloc[0, 0] if not data.empty else 0
-        st.metric("Available ICU Rooms", available_icu_rooms)
+        st.metric("Available ICU Rooms", snapshot.available_icu_rooms)
 
     with col3:
-        data = fetch_data("SELECT SUM(total_amount) FROM bill_details WHERE MONTH(bill_date) = MONTH(CURDATE())",
-                          "bill_details")
-        total_revenue_value = data.iloc[0, 0] if not data.empty and data.iloc[0, 0] is not None else 0.0
-        total_revenue = f"₹ {total_revenue_value:.2f}"
+        total_revenue = f"₹ {snapshot.revenue_this_month:.2f}"
         st.metric("Total Revenue This Month", total_revenue)
 
     # Alerts Section (Only Display When Necessary)
@@ -1664,9 +1761,7 @@ def show_dashboard():
     alert_triggered = False
 
     # ICU Occupancy Alert
-    total_icu_rooms = fetch_data("SELECT COUNT(*) FROM rooms WHERE is_icu = TRUE", "rooms").iloc[0, 0]
-    occupied_icu_rooms = fetch_data("SELECT COUNT(*) FROM rooms WHERE is_icu = TRUE AND availability = 'Booked'", "rooms").iloc[0, 0]
-    icu_occupancy_rate = (occupied_icu_rooms / total_icu_rooms) * 100 if total_icu_rooms else 0
+    icu_occupancy_rate = snapshot.icu_occupancy_rate
 
     # Display ICU Occupancy Alert Only if Occupancy > 80%
     if icu_occupancy_rate > 80:
@@ -1674,7 +1769,7 @@ def show_dashboard():
         alert_triggered = True
 
     # Low Stock Alert
-    low_stock_items = fetch_data("SELECT COUNT(*) FROM inventory WHERE quantity < 5", "inventory").iloc[0, 0]
+    low_stock_items = snapshot.low_stock_items
     if low_stock_items > 0:
         st.warning(f"⚠️ {low_stock_items} critical inventory items have low stock levels!")
         alert_triggered = True
@@ -1687,79 +1782,39 @@ def show_dashboard():
     st.markdown("### 📊 Hospital Summarized Visualization")
 
     # Patient Demographics Card
-    patient_demographics_card()
-
-    # Revenue Trend Sparkline
-    revenue_trend_sparkline()
+    patient_demographics_card(snapshot)
 
     # Doctor-Patient Ratio Donut
-    doctor_patient_ratio_donut()
-
-    # Room Utilization Heatmap
-    room_utilization_heatmap()
-
-    # Staff Shift Sunburst
-    staff_shift_sunburst()
-
-    # Patient Age Distribution
-    patient_age_distribution()
+    doctor_patient_ratio_donut(snapshot)
 
     # Live Inventory Gauge
-    live_inventory_gauge()
-
-    # Appointment Calendar
-    appointment_calendar()
-
-    # ICU and General Rooms Details
-    st.markdown("### 🏨 Room Details")
-    room_tabs = st.tabs(["ICU Rooms", "General Rooms"])
-
-    with room_tabs[0]:
-        icu_room_details()
-
-    with room_tabs[1]:
-        general_room_details()
-
-    # Discharge Patients Graph
-    discharge_patients_graph()
-
-    # Add Patients Graph
-    add_patients_graph()
-
-    # Disease Word Cloud
-    disease_word_cloud()
+    live_inventory_gauge(snapshot)
 
     # Emergency Response Time
     st.markdown("### 🚨 Emergency Response Time")
-    emergency_response_time()
-
-    # Patient Gender Ratio
-    patient_gender_ratio()
-
-    # Patient Department Distribution
-    patient_department_distribution()
-
-    # Room Allocation Chart
-    room_allocation_chart()
-
-
-
-def patient_demographics_card():
+    emergency_response_time(snapshot)
+
+    # Chart Sections (collapsed by default, computed only when expanded)
+    st.markdown("### 📈 Detailed Charts")
+    for section, title, names in DASHBOARD_SECTIONS:
+        if not st.checkbox(title, key=f"dashboard_{section}"):
+            continue
+        for name in names:
+            if name == ROOM_DETAILS:
+                # A selector instead of st.tabs: tabs run every tab's code, the selector only the chosen one
+                room_view = st.radio("Room Details", list(ROOM_DETAIL_PANELS), horizontal=True,
+                                     key="dashboard_room_view")
+                name = ROOM_DETAIL_PANELS[room_view]
+            render_panel(prefetch, name)
+
+
+def patient_demographics_card(snapshot):
     """Enhanced patient demographics card with more detailed information."""
     try:
-        # Fetch data
-        patient_count_data = fetch_data("SELECT COUNT(*) FROM patients", "patients")
-        avg_age_data = fetch_data("SELECT AVG(age) FROM patients", "patients")
-        top_disease_data = fetch_data("SELECT diseases FROM patients GROUP BY diseases ORDER BY COUNT(*) DESC LIMIT 1",
-                                      "patients")
-        top_department_data = fetch_data(
-            "SELECT department FROM patients GROUP BY department ORDER BY COUNT(*) DESC LIMIT 1", "patients")
-
-        # Handle empty data
-        patient_count = patient_count_data.iloc[0, 0] if not patient_count_data.empty else 0
-        avg_age = avg_age_data.iloc[0, 0] if not avg_age_data.empty and avg_age_data.iloc[0, 0] is not None else 0.0
-        top_disease = top_disease_data.iloc[0, 0] if not top_disease_data.empty else "No data"
-        top_department = top_department_data.iloc[0, 0] if not top_department_data.empty else "No data"
+        patient_count = snapshot.patient_count
+        avg_age = snapshot.avg_age
+        top_disease = snapshot.top_disease
+        top_department = snapshot.top_department
 
         # Display the card
         st.markdown(f"""
@@ -1776,16 +1831,9 @@ def patient_demographics_card():
         logging.error(f"Error in patient_demographics_card: {e}")
 
 
-def icu_room_details():
+def icu_room_details(icu_data):
     """Display ICU room details with availability and allocation."""
     try:
-        # Fetch ICU room data
-        icu_data = fetch_data(
-            "SELECT room_number, availability FROM rooms WHERE is_icu = TRUE",
-            "rooms",
-            columns=["Room Number", "Status"]
-        )
-
         # Check if ICU data is empty
         if icu_data.empty:
             st.warning("No ICU room data available.")
@@ -1801,22 +1849,15 @@ def icu_room_details():
             color_discrete_sequence=["#FF6347", "#87CEEB"],  # Red for booked, Blue for available
             labels={"Room Number": "Room Number", "Status": "Status"}
         )
-        st.plotly_chart(fig)
+        return fig
     except Exception as e:
         st.error(f"Error fetching ICU room details: {e}")
         logging.error(f"Error in icu_room_details: {e}")
 
 
-def general_room_details():
+def general_room_details(general_data):
     """Display general room details with availability and allocation."""
     try:
-        # Fetch general room data
-        general_data = fetch_data(
-            "SELECT room_number, availability FROM rooms WHERE is_icu = FALSE",
-            "rooms",
-            columns=["Room Number", "Status"]
-        )
-
         # Check if general room data is empty
         if general_data.empty:
             st.warning("No general room data available.")
@@ -1832,20 +1873,14 @@ def general_room_details():
             color_discrete_sequence=["#FF6347", "#87CEEB"],  # Red for booked, Blue for available
             labels={"Room Number": "Room Number", "Status": "Status"}
         )
-        st.plotly_chart(fig)
+        return fig
     except Exception as e:
         st.error(f"Error fetching general room details: {e}")
         logging.error(f"Error in general_room_details: {e}")
 
 
-def revenue_trend_sparkline():
+def revenue_trend_sparkline(revenue_data):
     """Enhanced revenue trend visualization with rainbow colors, annotations, and better formatting."""
-    revenue_data = fetch_data(
-        "SELECT DATE_FORMAT(bill_date, '%Y-%m') AS month, SUM(total_amount) AS total_amount FROM bill_details GROUP BY month",
-        "bill_details",
-        columns=["month", "total_amount"]
-    )
-
     # Check if revenue_data is empty
     if revenue_data.empty:
         st.warning("No revenue data available to display.")
@@ -1883,30 +1918,26 @@ def revenue_trend_sparkline():
         arrowhead=1
     )
 
-    # Display the chart
-    st.plotly_chart(fig)
+    return fig
 
-def doctor_patient_ratio_donut():
+def doctor_patient_ratio_donut(snapshot):
     """Enhanced doctor-patient ratio visualization with dynamic colors."""
-    doctor_count = fetch_data("SELECT COUNT(*) FROM staff WHERE role = 'Doctor'", "staff").iloc[0, 0]
-    patient_count = fetch_data("SELECT COUNT(*) FROM patients", "patients").iloc[0, 0]
-    fig = px.pie(values=[doctor_count, patient_count],
-                 names=["Doctors", "Patients"],
-                 hole=0.6,
-                 title="⚕️ Doctor-Patient Ratio",
-                 color_discrete_sequence=["#4B0082", "#87CEEB"],
-                 labels={"value": "Count", "names": "Category"})
-    fig.update_traces(textposition='inside', textinfo='percent+label', pull=[0.1, 0])
-    st.plotly_chart(fig)
-
-
-def patient_department_distribution():
+    def build():
+        fig = px.pie(values=[snapshot.doctor_count, snapshot.patient_count],
+                     names=["Doctors", "Patients"],
+                     hole=0.6,
+                     title="⚕️ Doctor-Patient Ratio",
+                     color_discrete_sequence=["#4B0082", "#87CEEB"],
+                     labels={"value": "Count", "names": "Category"})
+        fig.update_traces(textposition='inside', textinfo='percent+label', pull=[0.1, 0])
+        return fig
+
+    st.plotly_chart(figure_cache.get_or_build(
+        "doctor_patient_ratio", (snapshot.doctor_count, snapshot.patient_count), build))
+
+
+def patient_department_distribution(department_data):
     """Enhanced department distribution visualization with interactive filtering."""
-    department_data = fetch_data(
-        "SELECT department, COUNT(*) as count FROM patients GROUP BY department",
-        "patients",
-        columns=["Department", "Count"]
-    )
     if not department_data.empty:
         fig = px.bar(department_data, x="Department", y="Count",
                      title="🏥 Patients per Department",
@@ -1914,19 +1945,13 @@ def patient_department_distribution():
                      color_discrete_sequence=px.colors.qualitative.Plotly,  # Use a qualitative color scale
                      labels={"Count": "Number of Patients", "Department": "Department"})
         fig.update_layout(xaxis_tickangle=-45, hovermode="x unified")
-        st.plotly_chart(fig)
+        return fig
     else:
         st.warning("No department data available.")
 
 
-def room_allocation_chart():
+def room_allocation_chart(room_data):
     """Enhanced room allocation visualization with dynamic filtering."""
-    room_data = fetch_data(
-        "SELECT room_type, COUNT(*) as count FROM rooms WHERE availability = 'Booked' GROUP BY room_type",
-        "rooms",
-        columns=["Room Type", "Count"]
-    )
-
     if not room_data.empty:
         # Using the exact rainbow colors in the correct order
         rainbow_colors = ["#FF0000", "#FF7F00", "#FFFF00", "#00FF00", "#0000FF", "#4B0082", "#8B00FF"]
@@ -1951,19 +1976,14 @@ def room_allocation_chart():
             legend=dict(title="Room Categories", orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5),
         )
 
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
 
     else:
         st.warning("⚠ No room allocation data available.")
 
 
-def patient_gender_ratio():
+def patient_gender_ratio(gender_data):
     """Enhanced gender ratio visualization with dynamic colors."""
-    gender_data = fetch_data(
-        "SELECT gender, COUNT(*) as count FROM patients GROUP BY gender",
-        "patients",
-        columns=["Gender", "Count"]
-    )
     if not gender_data.empty:
         gender_map = {"M": "Male", "F": "Female"}
         gender_data["Gender"] = gender_data["Gender"].map(gender_map)
@@ -1972,36 +1992,25 @@ def patient_gender_ratio():
                      color_discrete_sequence=["#3498db", "#e74c3c"],
                      labels={"Count": "Number of Patients", "Gender": "Gender"})
         fig.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig)
+        return fig
     else:
         st.warning("No gender data available.")
 
 
-def room_utilization_heatmap():
+def room_utilization_heatmap(room_status_data):
     """Enhanced room utilization heatmap with better color scaling."""
-    room_status_matrix = fetch_data(
-        "SELECT room_type, availability, COUNT(*) as count FROM rooms GROUP BY room_type, availability",
-        "rooms",
-        columns=["Room Type", "Status", "Count"]
-    ).pivot(index="Room Type", columns="Status", values="Count")
+    room_status_matrix = room_status_data.pivot(index="Room Type", columns="Status", values="Count")
     fig = px.imshow(room_status_matrix,
                     labels=dict(x="Status", y="Room Type", color="Count"),
                     color_continuous_scale=["#FF0000", "#00FF00"],
                     title="🏨 Room Utilization Heatmap")
     fig.update_xaxes(side="top")
-    st.plotly_chart(fig)
+    return fig
 
 
-def discharge_patients_graph():
+def discharge_patients_graph(discharge_data):
     """Display discharge patients over time."""
     try:
-        # Fetch discharge data
-        discharge_data = fetch_data(
-            "SELECT DATE(discharge_date) as date, COUNT(*) as count FROM discharged_patients GROUP BY DATE(discharge_date)",
-            "discharged_patients",
-            columns=["Date", "Count"]
-        )
-
         # Check if discharge data is empty
         if discharge_data.empty:
             st.warning("No discharge data available.")
@@ -2017,22 +2026,15 @@ def discharge_patients_graph():
             color_discrete_sequence=["#FF10F0"],  # Pink color
             labels={"Date": "Date", "Count": "Number of Discharges"}
         )
-        st.plotly_chart(fig)
+        return fig
     except Exception as e:
         st.error(f"Error generating discharge patients graph: {e}")
         logging.error(f"Error in discharge_patients_graph: {e}")
 
 
-def add_patients_graph():
+def add_patients_graph(add_data):
     """Display patients added over time."""
     try:
-        # Fetch patient addition data
-        add_data = fetch_data(
-            "SELECT DATE(date_of_consultancy) as date, COUNT(*) as count FROM patients GROUP BY DATE(date_of_consultancy)",
-            "patients",
-            columns=["Date", "Count"]
-        )
-
         # Check if patient addition data is empty
         if add_data.empty:
             st.warning("No patient addition data available.")
@@ -2048,22 +2050,15 @@ def add_patients_graph():
             color_discrete_sequence=["#BA68C8"],  # Purple color
             labels={"Date": "Date", "Count": "Number of Patients Added"}
         )
-        st.plotly_chart(fig)
+        return fig
     except Exception as e:
         st.error(f"Error generating patients added graph: {e}")
         logging.error(f"Error in add_patients_graph: {e}")
 
 
-def staff_shift_sunburst():
+def staff_shift_sunburst(staff_data):
     """Enhanced staff shift visualization with vibrant rainbow colors for roles and shifts."""
     try:
-        # Fetch staff shift data
-        staff_data = fetch_data(
-            "SELECT role, shift, COUNT(*) as count FROM staff GROUP BY role, shift",
-            "staff",
-            columns=["Role", "Shift", "Count"]
-        )
-
         # Check if staff_data is empty
         if staff_data.empty:
             st.warning("No staff shift data available to display.")
@@ -2101,29 +2096,13 @@ def staff_shift_sunburst():
             labels={"Count": "Number of Staff"}
         )
         fig.update_traces(textinfo="label+percent parent")
-        st.plotly_chart(fig)
+        return fig
     except Exception as e:
         st.error(f"Error generating staff shift sunburst chart: {e}")
         logging.error(f"Error in staff_shift_sunburst: {e}")
 
-def patient_age_distribution():
+def patient_age_distribution(age_data):
     """Enhanced age distribution visualization with dynamic age groups and multi-colors."""
-    age_data = fetch_data(
-        """
-        SELECT 
-            CASE 
-                WHEN age BETWEEN 0 AND 18 THEN '0-18'
-                WHEN age BETWEEN 19 AND 30 THEN '19-30'
-                WHEN age BETWEEN 31 AND 50 THEN '31-50'
-                ELSE '51+' 
-            END AS age_group, 
-            COUNT(*) as count 
-        FROM patients 
-        GROUP BY age_group
-        """,
-        "patients",
-        columns=["Age Group", "Count"]
-    )
     if not age_data.empty:
         fig = px.bar(age_data, x="Age Group", y="Count",
                      title="📊 Patient Age Distribution",
@@ -2131,42 +2110,35 @@ def patient_age_distribution():
                      color_discrete_sequence=px.colors.qualitative.Vivid,  # Use a vibrant color palette
                      labels={"Count": "Number of Patients", "Age Group": "Age Group"})
         fig.update_layout(coloraxis_showscale=False, hovermode="x unified")
-        st.plotly_chart(fig)
+        return fig
     else:
         st.warning("No patient age data available.")
 
-def live_inventory_gauge():
+def live_inventory_gauge(snapshot):
     """Enhanced inventory gauge with dynamic thresholds."""
     st.markdown("### 📦 Inventory Status")
-    low_stock_percent_data = fetch_data(
-        "SELECT COUNT(*) * 100.0 / (SELECT COUNT(*) FROM inventory) as percent FROM inventory WHERE quantity < 10",
-        "inventory"
-    )
-    low_stock_percent = low_stock_percent_data.iloc[0, 0] if not low_stock_percent_data.empty else 0
-    fig = go.Figure(go.Indicator(
-        mode="gauge+number",
-        value=low_stock_percent,
-        title="⚠️ Critical Inventory",
-        gauge={
-            'axis': {'range': [0, 100]},
-            'bar': {'color': "#FF10F0"},
-            'steps': [
-                {'range': [0, 50], 'color': "#87CEEB"},
-                {'range': [50, 100], 'color': "#4B0082"}
-            ]
-        }
-    ))
-    st.plotly_chart(fig)
+    low_stock_percent = snapshot.critical_stock_percent
+
+    def build():
+        return go.Figure(go.Indicator(
+            mode="gauge+number",
+            value=low_stock_percent,
+            title="⚠️ Critical Inventory",
+            gauge={
+                'axis': {'range': [0, 100]},
+                'bar': {'color': "#FF10F0"},
+                'steps': [
+                    {'range': [0, 50], 'color': "#87CEEB"},
+                    {'range': [50, 100], 'color': "#4B0082"}
+                ]
+            }
+        ))
 
+    st.plotly_chart(figure_cache.get_or_build("inventory_gauge", low_stock_percent, build))
 
-def appointment_calendar():
-    """Visualize daily appointments over months using a multi-colored line graph."""
-    appointment_data = fetch_data(
-        "SELECT DAY(appointment_date) as day, MONTH(appointment_date) as month, COUNT(*) as count FROM appointments GROUP BY day, month",
-        "appointments",
-        columns=["Day", "Month", "Count"]
-    )
 
+def appointment_calendar(appointment_data):
+    """Visualize daily appointments over months using a multi-colored line graph."""
     if not appointment_data.empty:
         # Create a line graph with multi-colors for each month
         fig = px.line(appointment_data, x='Day', y='Count', color='Month',
@@ -2183,18 +2155,13 @@ def appointment_calendar():
             xaxis=dict(tickmode='linear', tick0=1, dtick=1),  # Show every day on the x-axis
             yaxis=dict(tickmode='linear', tick0=0)  # Start y-axis from 0
         )
-        st.plotly_chart(fig)
+        return fig
     else:
         st.warning("No appointment data available.")
 
 
-def disease_word_cloud():
+def disease_word_cloud(disease_freq_data):
     """Visualize disease frequency with attractive multi-colors for different diseases."""
-    disease_freq_data = fetch_data(
-        "SELECT diseases, COUNT(*) as count FROM patients GROUP BY diseases",
-        "patients",
-        columns=["Disease", "Count"]
-    )
     if not disease_freq_data.empty:
         # Create a bar chart with multi-colors for each disease
         fig = px.bar(disease_freq_data, x="Disease", y="Count",
@@ -2208,31 +2175,47 @@ def disease_word_cloud():
             hovermode="x unified",  # Show unified hover information
             showlegend=False  # Hide legend since colors are self-explanatory
         )
-        st.plotly_chart(fig)
+        return fig
     else:
         st.warning("No disease data available to display.")
 
-def emergency_response_time():
-    response_time_data = fetch_data(
-        "SELECT AVG(TIMESTAMPDIFF(MINUTE, admission_date, NOW())) FROM emergency_patients",
-        "emergency_patients"
-    )
-    response_time = response_time_data.iloc[0, 0] if not response_time_data.empty and response_time_data.iloc[
-        0, 0] is not None else 0
-    fig = go.Figure(go.Indicator(
-        mode="gauge+number",
-        value=response_time,
-        title="🚨 Emergency Response Time (Minutes)",
-        gauge={
-            'axis': {'range': [0, 30]},
-            'bar': {'color': "#FF0000"},
-            'steps': [
-                {'range': [0, 10], 'color': "#FFD700"},
-                {'range': [10, 30], 'color': "#FF4500"}
-            ]
-        }
-    ))
-    st.plotly_chart(fig)
+def emergency_response_time(snapshot):
+    response_time = snapshot.avg_emergency_minutes
+
+    def build():
+        return go.Figure(go.Indicator(
+            mode="gauge+number",
+            value=response_time,
+            title="🚨 Emergency Response Time (Minutes)",
+            gauge={
+                'axis': {'range': [0, 30]},
+                'bar': {'color': "#FF0000"},
+                'steps': [
+                    {'range': [0, 10], 'color': "#FFD700"},
+                    {'range': [10, 30], 'color': "#FF4500"}
+                ]
+            }
+        ))
+
+    st.plotly_chart(figure_cache.get_or_build("emergency_response_time", response_time, build))
+
+
+# Chart helpers behind each dashboard panel: panel name -> (title, chart helper, st.plotly_chart arguments)
+DASHBOARD_CHARTS = {
+    "revenue_trend": ("Monthly revenue trend", revenue_trend_sparkline, {}),
+    "room_utilization": ("Room utilization heatmap", room_utilization_heatmap, {}),
+    "staff_shifts": ("Staff shift distribution", staff_shift_sunburst, {}),
+    "age_distribution": ("Patient age distribution", patient_age_distribution, {}),
+    "appointments": ("Appointment calendar", appointment_calendar, {}),
+    "icu_rooms": ("ICU room status", icu_room_details, {}),
+    "general_rooms": ("General room status", general_room_details, {}),
+    "discharges": ("Discharges over time", discharge_patients_graph, {}),
+    "admissions": ("Patients added over time", add_patients_graph, {}),
+    "diseases": ("Disease frequency", disease_word_cloud, {}),
+    "gender_ratio": ("Patient gender ratio", patient_gender_ratio, {}),
+    "departments": ("Patients per department", patient_department_distribution, {}),
+    "room_allocation": ("Room allocation", room_allocation_chart, {"use_container_width": True}),
+}
 
 
 # ------------------ Advanced Search ------------------
@@ -2249,247 +2232,65 @@ def advanced_search():
             "Emergency Patients", "Ambulance Service", "Discharged Patients", "Doctors"
         ]
 
-    # Add a search type dropdown with dynamic options
-    search_type = st.selectbox("Select Search Type", search_options)
+    # Add a search type dropdown with dynamic options; "Everything" searches all of them at once
+    search_type = st.selectbox("Select Search Type", ["Everything"] + search_options)
 
     # Add a search query input field
     search_query = st.text_input(f"Enter {search_type} Name, ID, or Keyword")
 
+    if search_type == "Everything":
+        # Runs as soon as a query is entered, no button needed
+        if search_query.strip():
+            unified_search_results(search_query, search_options)
+        return
+
     # Add a search button
     if st.button(f"Search {search_type}"):
         if not search_query.strip():
             st.warning("Please enter a search query!")
             return
 
-        # Initialize results as an empty DataFrame
-        results = pd.DataFrame()
-
-        # Define the base query for each search type
-        if search_type == "Patients":
-            query = f"""
-                SELECT 
-                    p.id AS 'Patient ID', 
-                    p.name AS 'Patient Name', 
-                    p.age AS 'Age', 
-                    p.gender AS 'Gender', 
-                    p.address AS 'Address', 
-                    p.contact_no AS 'Contact No', 
-                    p.dob AS 'Date of Birth', 
-                    p.consultant_name AS 'Consultant', 
-                    p.date_of_consultancy AS 'Consultancy Date', 
-                    p.department AS 'Department', 
-                    p.diseases AS 'Disease', 
-                    p.fees AS 'Fees',
-                    p.medicine AS 'Medicine',
-                    p.quantity AS 'Quantity',
-                    COALESCE(r.room_number, 'N/A') AS 'Room Number',
-                    COALESCE(r.room_type, 'N/A') AS 'Room Type',
-                    COALESCE(d.discharge_date, 'N/A') AS 'Discharge Date',
-                    COALESCE(d.discharge_reason, 'N/A') AS 'Discharge Reason'
-                FROM patients p
-                LEFT JOIN rooms r ON p.id = r.patient_id
-                LEFT JOIN discharged_patients d ON p.id = d.patient_id
-                WHERE p.name LIKE '%{search_query}%' 
-                    OR p.id = '{search_query}'
-                    OR p.medicine LIKE '%{search_query}%'
-                    OR p.quantity = '{search_query}'
-            """
-            # Define the columns for the query results
-            columns = [
-                "Patient ID", "Patient Name", "Age", "Gender", "Address", "Contact No",
-                "Date of Birth", "Consultant", "Consultancy Date", "Department",
-                "Disease", "Fees", "Medicine", "Quantity", "Room Number", "Room Type",
-                "Discharge Date", "Discharge Reason"
-            ]
-            results = fetch_data(query, "patients", columns)
-
-        elif search_type == "Doctors":
-            query = f"""
-                SELECT 
-                    d.id AS 'Doctor ID', 
-                    s.staff_name AS 'Doctor Name', 
-                    d.department AS 'Department', 
-                    s.shift AS 'Shift', 
-                    d.role AS 'Role'
-                FROM doctor d
-                JOIN staff s ON d.staff_id = s.id
-                WHERE s.staff_name LIKE '%{search_query}%' 
-                    OR d.id = '{search_query}'
-                    OR d.department LIKE '%{search_query}%'
-            """
-            # Define the columns for the query results
-            columns = ["Doctor ID", "Doctor Name", "Department", "Shift", "Role"]
-            results = fetch_data(query, "doctor", columns)
-
-        elif search_type == "Appointments":
-            query = f"""
-                SELECT 
-                    a.id AS 'Appointment ID', 
-                    a.patient_name AS 'Patient Name', 
-                    a.doctor_name AS 'Doctor Name', 
-                    a.appointment_date AS 'Appointment Date', 
-                    a.appointment_time AS 'Appointment Time'
-                FROM appointments a
-                WHERE a.patient_name LIKE '%{search_query}%' 
-                    OR a.doctor_name LIKE '%{search_query}%'
-                    OR a.id = '{search_query}'
-            """
-            # Define the columns for the query results
-            columns = ["Appointment ID", "Patient Name", "Doctor Name", "Appointment Date", "Appointment Time"]
-            results = fetch_data(query, "appointments", columns)
-
-        elif search_type == "Bills":
-            query = f"""
-                SELECT 
-                    b.bill_no AS 'Bill No', 
-                    b.bill_date AS 'Bill Date', 
-                    b.patient_id AS 'Patient ID', 
-                    b.name AS 'Patient Name', 
-                    b.contact_no AS 'Contact No', 
-                    b.room_charges AS 'Room Charges', 
-                    b.pathology_fees AS 'Pathology Fees', 
-                    b.medicine_charges AS 'Medicine Charges', 
-                    b.doctor_fees AS 'Doctor Fees', 
-                    b.total_amount AS 'Total Amount', 
-                    b.room_type AS 'Room Type'
-                FROM bill_details b
-                WHERE b.name LIKE '%{search_query}%' 
-                    OR b.patient_id = '{search_query}'
-                    OR b.bill_no = '{search_query}'
-            """
-            # Define the columns for the query results
-            columns = [
-                "Bill No", "Bill Date", "Patient ID", "Patient Name", "Contact No",
-                "Room Charges", "Pathology Fees", "Medicine Charges", "Doctor Fees",
-                "Total Amount", "Room Type"
-            ]
-            results = fetch_data(query, "bill_details", columns)
-
-        elif search_type == "Discharged Patients":
-            query = f"""
-                SELECT 
-                    d.patient_id AS 'Patient ID', 
-                    d.patient_name AS 'Patient Name', 
-                    d.room_number AS 'Room Number', 
-                    d.room_type AS 'Room Type', 
-                    d.discharge_date AS 'Discharge Date', 
-                    d.discharge_time AS 'Discharge Time', 
-                    d.discharge_reason AS 'Discharge Reason', 
-                    d.is_icu AS 'ICU Room'
-                FROM discharged_patients d
-                WHERE d.patient_name LIKE '%{search_query}%' 
-                    OR d.patient_id = '{search_query}'
-                    OR d.room_number = '{search_query}'
-            """
-            # Define the columns for the query results
-            columns = [
-                "Patient ID", "Patient Name", "Room Number", "Room Type",
-                "Discharge Date", "Discharge Time", "Discharge Reason", "ICU Room"
-            ]
-            results = fetch_data(query, "discharged_patients", columns)
-
-        elif search_type == "Emergency Patients":
-            query = f"""
-                SELECT 
-                    ep.id AS 'ID', 
-                    ep.name AS 'Patient Name', 
-                    ep.contact_no AS 'Contact No', 
-                    ep.address AS 'Address', 
-                    ep.blood_type AS 'Blood Type', 
-                    r.room_number AS 'Room Number', 
-                    s.staff_name AS 'Assigned Doctor', 
-                    ep.admission_date AS 'Admission Date'
-                FROM emergency_patients ep
-                LEFT JOIN rooms r ON ep.room_id = r.id
-                LEFT JOIN staff s ON ep.doctor_id = s.id
-                WHERE ep.name LIKE '%{search_query}%' 
-                    OR ep.id = '{search_query}'
-                    OR ep.contact_no = '{search_query}'
-            """
-            # Define the columns for the query results
-            columns = [
-                "ID", "Patient Name", "Contact No", "Address", "Blood Type",
-                "Room Number", "Assigned Doctor", "Admission Date"
-            ]
-            results = fetch_data(query, "emergency_patients", columns)
-
-        elif search_type == "Ambulance Service":
-            query = f"""
-                SELECT 
-                    a.id AS 'Service ID', 
-                    a.patient_name AS 'Patient Name', 
-                    a.address AS 'Address', 
-                    a.blood_type AS 'Blood Type', 
-                    am.ambulance_number AS 'Ambulance Number', 
-                    a.dispatch_time AS 'Dispatch Time', 
-                    a.return_time AS 'Return Time'
-                FROM ambulance_service a
-                LEFT JOIN ambulances am ON a.ambulance_id = am.id
-                WHERE a.patient_name LIKE '%{search_query}%' 
-                    OR a.id = '{search_query}'
-                    OR am.ambulance_number = '{search_query}'
-            """
-            # Define the columns for the query results
-            columns = [
-                "Service ID", "Patient Name", "Address", "Blood Type",
-                "Ambulance Number", "Dispatch Time", "Return Time"
-            ]
-            results = fetch_data(query, "ambulance_service", columns)
-
-        elif search_type == "Rooms":
-            query = f"""
-                SELECT 
-                    r.id AS 'Room ID', 
-                    r.room_number AS 'Room Number', 
-                    r.room_type AS 'Room Type', 
-                    r.availability AS 'Status', 
-                    r.patient_id AS 'Patient ID'
-                FROM rooms r
-                WHERE r.room_number LIKE '%{search_query}%' 
-                    OR r.id = '{search_query}'
-                    OR r.patient_id = '{search_query}'
-            """
-            # Define the columns for the query results
-            columns = ["Room ID", "Room Number", "Room Type", "Status", "Patient ID"]
-            results = fetch_data(query, "rooms", columns)
-
-        elif search_type == "Inventory":
-            query = f"""
-                SELECT 
-                    i.id AS 'Item ID', 
-                    i.item_name AS 'Item Name', 
-                    i.quantity AS 'Quantity', 
-                    i.expiry_date AS 'Expiry Date'
-                FROM inventory i
-                WHERE i.item_name LIKE '%{search_query}%' 
-                    OR i.id = '{search_query}'
-            """
-            # Define the columns for the query results
-            columns = ["Item ID", "Item Name", "Quantity", "Expiry Date"]
-            results = fetch_data(query, "inventory", columns)
-
-        elif search_type == "Staff":
-            query = f"""
-                SELECT 
-                    s.id AS 'Staff ID', 
-                    s.staff_name AS 'Staff Name', 
-                    s.role AS 'Role', 
-                    s.shift AS 'Shift'
-                FROM staff s
-                WHERE s.staff_name LIKE '%{search_query}%' 
-                    OR s.id = '{search_query}'
-            """
-            # Define the columns for the query results
-            columns = ["Staff ID", "Staff Name", "Role", "Shift"]
-            results = fetch_data(query, "staff", columns)
+        # Ranked, parameterized FULLTEXT / prefix / exact-ID search (see search.py)
+        try:
+            results = search(search_type, search_query)
+        except sq.Error as er:
+            st.error(f"Error searching {search_type}: {er}")
+            logging.error(f"Error searching {search_type}: {er}")
+            results = pd.DataFrame()
 
         # Display the search results
         if not results.empty:
-            st.success(f"Found {len(results)} matching records!")
+            if len(results) >= SEARCH_LIMIT:
+                st.success(f"Showing the top {SEARCH_LIMIT} matching records.")
+            else:
+                st.success(f"Found {len(results)} matching records!")
             st.dataframe(results)
         else:
             st.warning("No matching records found.")
 
+def unified_search_results(search_query, entity_names):
+    """Show the top hits of every entity type, each filled in as soon as its search completes."""
+    placeholders = {}
+    for name in entity_names:
+        placeholders[name] = st.empty()
+        placeholders[name].caption(f"Searching {name}...")
+
+    found = 0
+    for name, results in search_all(search_query, entity_names):
+        with placeholders[name].container():
+            if results is None:
+                st.caption(f"{name}: no answer in time, try the {name} search type.")
+            elif results.empty:
+                st.caption(f"{name}: no matches.")
+            else:
+                found += len(results)
+                st.markdown(f"**{name}** ({len(results)}{'+' if len(results) >= SEARCH_ALL_LIMIT else ''})")
+                st.dataframe(results)
+
+    if not found:
+        st.warning("No matching records found.")
+
+
 # ------------------ Schedule and View Appointments ------------------
 def schedule_appointment():
     """
@@ -2498,15 +2299,15 @@ def schedule_appointment():
     st.markdown('<div class="header-lightblue"><h3>📅 Schedule Appointment</h3></div>', unsafe_allow_html=True)
     check_user_role(["Admin", "Doctor", "Receptionist", "Nurse", "Patient"])
 
-    # Fetch patient names
-    patient_data = fetch_data("SELECT id, name FROM patients", "patients", columns=["id", "name"])
-
-    if patient_data.empty:
+    if not typeahead_size(PATIENTS):
         st.warning("No patients found. Please add patients first.")
         return
 
-    # Select patient
-    patient_name = st.selectbox("Select Patient", patient_data["name"])
+    # Select patient by name or ID (see typeahead.py)
+    patient_id = typeahead_select("Select Patient", PATIENTS, "appointment_patient")
+    if patient_id is None:
+        return
+    patient_name = PATIENTS.name(patient_id)
 
     # Fetch unique departments from the doctor table
     department_data = fetch_data("SELECT DISTINCT department FROM doctor", "doctor", columns=["Department"])
@@ -2519,13 +2320,13 @@ def schedule_appointment():
     department = st.selectbox("Select Department", department_data["Department"])
 
     # Fetch doctors and shifts in the selected department
-    query = f"""
+    query = """
         SELECT s.staff_name AS doctor_name, s.shift
         FROM doctor d
         JOIN staff s ON d.staff_id = s.id
-        WHERE d.department = '{department}'
+        WHERE d.department = %s
     """
-    doctor_data = fetch_data(query, "doctor", columns=["Doctor Name", "Shift"])
+    doctor_data = fetch_data(query, "doctor", columns=["Doctor Name", "Shift"], params=(department,))
 
     if doctor_data.empty:
         st.warning(f"No doctors found in the {department} department.")
@@ -2548,7 +2349,8 @@ def schedule_appointment():
             INSERT INTO appointments (patient_name, doctor_name, appointment_date, appointment_time)
             VALUES (%s, %s, %s, %s)
             """,
-            (patient_name, doctor_name, appointment_date, appointment_time)
+            (patient_name, doctor_name, appointment_date, appointment_time),
+            rollups=[RollupBump("appointments", appointment_date)]
         )
         st.success("Appointment scheduled successfully!")
 
@@ -2607,31 +2409,32 @@ def manage_inventory():
         st.success("Item Added to Inventory!")
 
 
+INVENTORY_RECORDS = TableSpec(
+    name="inventory",
+    select_list="""
+        id AS 'Item ID',
+        item_name AS 'Item Name',
+        quantity AS 'Quantity',
+        expiry_date AS 'Expiry Date',
+        created_at AS 'Created At'
+    """,
+    from_clause="inventory",
+    key="id",
+    sort_columns=(("Item ID", "id"), ("Item Name", "item_name"), ("Quantity", "quantity"),
+                  ("Expiry Date", "expiry_date")),
+    filter_columns=(("Item Name", "item_name"),),
+)
+
+
 def view_inventory():
     st.markdown('<div class="header-lightblue"><h3>💊 Inventory Records</h3></div>', unsafe_allow_html=True)
     check_user_role(["Admin", "Doctor", "Nurse","Receptionist"])
 
-    # Define all 5 columns to match the inventory table structure
-    columns = ["Item ID", "Item Name", "Quantity", "Expiry Date", "Created At"]
-
-    # Fetch data from the inventory table
-    df = fetch_data("SELECT * FROM inventory", "inventory", columns)
+    df = paginated_table(INVENTORY_RECORDS, "inventory", "No inventory records found.")
 
-    if df.empty:
-        st.info("No inventory records found.")
-    else:
-        # Display the DataFrame
-        st.dataframe(df)
-
-        # Add a download button for exporting the inventory data
-        if st.button("📥 Download Inventory as CSV"):
-            csv = df.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="Download CSV",
-                data=csv,
-                file_name="inventory_records.csv",
-                mime="text/csv"
-            )
+    if not df.empty:
+        # Add a download button for exporting the whole inventory, not just the visible page
+        table_download(INVENTORY_RECORDS, "inventory", "📥 Download Inventory as CSV", "inventory_records")
 
 # ------------------ Staff Management Section ------------------
 def manage_staff():
@@ -2646,20 +2449,26 @@ def manage_staff():
         st.success("Staff Added Successfully!")
 
 
+STAFF_RECORDS = TableSpec(
+    name="staff",
+    select_list="""
+        id AS 'Staff ID',
+        staff_name AS 'Staff Name',
+        role AS 'Role',
+        shift AS 'Shift',
+        created_at AS 'Created At'
+    """,
+    from_clause="staff",
+    key="id",
+    sort_columns=(("Staff ID", "id"), ("Staff Name", "staff_name")),
+    filter_columns=(("Staff Name", "staff_name"), ("Role", "role"), ("Shift", "shift")),
+)
+
+
 def view_staff():
     st.markdown('<div class="header-lightblue"><h3>🧑‍⚕️ View Staff Records</h3></div>', unsafe_allow_html=True)
     check_user_role(["Admin", "Doctor", "Receptionist", "Nurse"])
-    # Define all 5 columns to match the query result
-    columns = ["Staff ID", "Staff Name", "Role", "Shift", "Created At"]
-
-    # Fetch data from the staff table
-    df = fetch_data("SELECT * FROM staff", "staff", columns)
-
-    if df.empty:
-        st.info("No staff records found.")
-    else:
-        # Display the DataFrame
-        st.dataframe(df)
+    paginated_table(STAFF_RECORDS, "staff", "No staff records found.")
 
 
 # ------------------ Patient History Section -----------------
@@ -2673,48 +2482,6 @@ def view_patient_history():
     # Search Box for Filtering Patients
     search_query = st.text_input("Search by Patient Name, ID, Medicine, or Quantity", "")
 
-    # SQL query to get combined patient history
-    query = """
-        SELECT 
-            p.id AS 'Patient ID',
-            p.name AS 'Patient Name',
-            p.dob AS 'Date of Birth',
-            p.contact_no AS 'Contact No',
-            p.consultant_name AS 'Consultant',
-            p.gender AS 'Gender',
-            p.department AS 'Department',
-            p.diseases AS 'Disease',
-            p.fees AS 'Fees',
-            p.medicine AS 'Medicine',
-            p.quantity AS 'Quantity',
-            GROUP_CONCAT(DISTINCT b.bill_no) AS 'Bill Numbers',
-            GROUP_CONCAT(DISTINCT b.total_amount) AS 'Bill Amounts',
-            GROUP_CONCAT(DISTINCT r.room_number) AS 'Room Numbers',
-            GROUP_CONCAT(DISTINCT r.room_type) AS 'Room Types',
-            GROUP_CONCAT(DISTINCT d.discharge_date) AS 'Discharge Dates',
-            GROUP_CONCAT(DISTINCT d.discharge_reason) AS 'Discharge Reasons',
-            GROUP_CONCAT(DISTINCT ep.admission_date) AS 'Emergency Admission Dates',
-            GROUP_CONCAT(DISTINCT ep.blood_type) AS 'Emergency Blood Types',
-            GROUP_CONCAT(DISTINCT s.staff_name) AS 'Assigned Doctors'  # Fetch doctor names from staff table
-        FROM 
-            patients p
-        LEFT JOIN 
-            bill_details b ON p.id = b.patient_id
-        LEFT JOIN 
-            rooms r ON p.id = r.patient_id
-        LEFT JOIN 
-            discharged_patients d ON p.id = d.patient_id
-        LEFT JOIN 
-            emergency_patients ep ON p.id = ep.id
-        LEFT JOIN 
-            doctor doc ON p.consultant_name = doc.staff_id  # Join with doctor table
-        LEFT JOIN 
-            staff s ON doc.staff_id = s.id  # Join with staff table to get doctor names
-        GROUP BY 
-            p.id, p.name, p.dob, p.contact_no, p.consultant_name, p.gender, 
-            p.department, p.diseases, p.fees, p.medicine, p.quantity
-    """
-
     columns = [
         "Patient ID", "Patient Name", "Date of Birth", "Contact No",
         "Consultant", "Gender", "Department", "Disease", "Fees",
@@ -2724,46 +2491,15 @@ def view_patient_history():
         "Assigned Doctors"  # Added assigned doctors
     ]
 
-    df = fetch_data(query, "patients", columns)
+    # Pre-aggregated per patient and kept current by the write paths (see history_summary.py)
+    df = fetch_data(HISTORY_QUERY, "patient_history_summary", columns)
 
     if df.empty:
         st.info("No patient history records found.")
     else:
-        # Clean and format data
-        df = df.fillna('N/A')
-
-        # Convert date format for Date of Birth
-        if 'Date of Birth' in df.columns:
-            df['Date of Birth'] = pd.to_datetime(df['Date of Birth'], errors='coerce').dt.strftime('%Y-%m-%d')
-
-        # Convert date format for Discharge Dates
-        if 'Discharge Dates' in df.columns:
-            df['Discharge Dates'] = df['Discharge Dates'].apply(
-                lambda x: ', '.join(
-                    [pd.to_datetime(date, errors='coerce').strftime('%Y-%m-%d') for date in x.split(',') if
-                     date != 'N/A']) if x != 'N/A' else 'N/A'
-            )
-
-        # Convert date format for Emergency Admission Dates
-        if 'Emergency Admission Dates' in df.columns:
-            df['Emergency Admission Dates'] = df['Emergency Admission Dates'].apply(
-                lambda x: ', '.join(
-                    [pd.to_datetime(date, errors='coerce').strftime('%Y-%m-%d') for date in x.split(',') if
-                     date != 'N/A']) if x != 'N/A' else 'N/A'
-            )
-
-        # Apply Search Filter if Query is Entered
-        if search_query:
-            df = df[df.apply(
-                lambda row: (
-                        search_query.lower() in str(row['Patient ID']).lower() or
-                        search_query.lower() in row['Patient Name'].lower() or
-                        search_query.lower() in str(row['Medicine']).lower() or
-                        search_query.lower() in str(row['Quantity']).lower() or
-                        search_query.lower() in str(row['Assigned Doctors']).lower()
-                # Added search for assigned doctors
-                ), axis=1
-            )]
+        # Clean and format data, then filter over the prebuilt lower-cased search text (see patient_history.py)
+        df, search_text = prepare_history(df)
+        df = filter_history(df, search_text, search_query)
 
         # Display the patient history data
         st.dataframe(df)
@@ -2779,23 +2515,26 @@ def view_patient_history():
             )
 
 # ------------------ Ambulance Service Section ------------------
-def ambulance_service_section():
-    check_user_role(["Admin", "Doctor", "Receptionist", "Nurse", "Patient"])
+AMBULANCE_SERVICE_RECORDS = TableSpec(
+    name="ambulance_service",
+    select_list="""
+        s.id AS 'Service ID',
+        s.patient_name AS 'Patient Name',
+        s.address AS 'Address',
+        s.blood_type AS 'Blood Type',
+        a.ambulance_number AS 'Ambulance Number',
+        s.dispatch_time AS 'Dispatch Time',
+        s.return_time AS 'Return Time'
+    """,
+    from_clause="ambulance_service s LEFT JOIN ambulances a ON s.ambulance_id = a.id",
+    key="s.id",
+    sort_columns=(("Service ID", "s.id"), ("Patient Name", "s.patient_name")),
+    filter_columns=(("Patient Name", "s.patient_name"), ("Blood Type", "s.blood_type")),
+)
 
-    # Initialize 5 ambulances (run once)
-    def initialize_ambulances():
-        con = connection()
-        cur = con.cursor()
-        # Check if ambulances exist
-        cur.execute("SELECT COUNT(*) FROM ambulances")
-        if cur.fetchone()[0] == 0:
-            # Create 5 ambulances
-            for i in range(1, 6):
-                cur.execute("INSERT INTO ambulances (ambulance_number, status) VALUES (%s, 'Available')",
-                            (f"AMB-00{i}",))
-            con.commit()
 
-    initialize_ambulances()
+def ambulance_service_section():
+    check_user_role(["Admin", "Doctor", "Receptionist", "Nurse", "Patient"])
 
     # Add tabs for Ambulance Service section
     ambulance_tabs = st.tabs(["Add Request & Dispatch", "View Status"])
@@ -2884,7 +2623,7 @@ def ambulance_service_section():
                         ["Dispatch Time"]
                     ).iloc[0, 0]
 
-                    if dispatch_time:
+                    if pd.notna(dispatch_time):
                         # Calculate remaining time (10 minutes countdown)
                         remaining_time = 600 - (datetime.now() - dispatch_time).total_seconds()
                         if remaining_time > 0:
@@ -2923,203 +2662,181 @@ def ambulance_service_section():
         # View Ambulance Records
         st.markdown('<div class="header-lightblue"><h3>📋 View Ambulance Records</h3></div>', unsafe_allow_html=True)
 
-        # Fetch all ambulance service records
-        records = fetch_data(
-            """
-            SELECT 
-                s.id AS 'Service ID',
-                s.patient_name AS 'Patient Name',
-                s.address AS 'Address',
-                s.blood_type AS 'Blood Type',
-                a.ambulance_number AS 'Ambulance Number',
-                s.dispatch_time AS 'Dispatch Time',
-                s.return_time AS 'Return Time'
-            FROM 
-                ambulance_service s
-            LEFT JOIN 
-                ambulances a ON s.ambulance_id = a.id
-            """,
-            "ambulance_service",
-            ["Service ID", "Patient Name", "Address", "Blood Type", "Ambulance Number", "Dispatch Time", "Return Time"]
-        )
-
-        if records.empty:
-            st.info("No ambulance service records found.")
-        else:
-            st.dataframe(records)
+        paginated_table(AMBULANCE_SERVICE_RECORDS, "ambulance_service", "No ambulance service records found.")
 
 # ----------------Reports ------------------
-def generate_pdf_report(data, title, filename):
-    """Generate a PDF report from the given data with improved formatting."""
-    try:
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-
-        # Add title to the PDF
-        pdf.set_font("Arial", 'B', 16)
-        pdf.cell(200, 10, txt=title, ln=True, align="C")
-        pdf.ln(10)  # Add some space after the title
-
-        # Set font for the table
-        pdf.set_font("Arial", size=10)
-
-        # Calculate column widths dynamically based on content
-        col_widths = [pdf.get_string_width(str(col)) + 10 for col in data.columns]
-
-        # Add table headers
-        for i, col in enumerate(data.columns):
-            pdf.cell(col_widths[i], 10, txt=col, border=1, align="C")
-        pdf.ln()
-
-        # Add table rows
-        for index, row in data.iterrows():
-            for i, col in enumerate(data.columns):
-                pdf.cell(col_widths[i], 10, txt=str(row[col]), border=1, align="C")
-            pdf.ln()
-
-        # Save the PDF to a temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        pdf.output(temp_file.name)
-        return temp_file.name
-    except Exception as e:
-        st.error(f"Error generating PDF report: {e}")
-        return None
+REPORT_POLL_SECONDS = 1
 
 
-def download_report(data, title, filename):
-    """Generate and download a PDF report with improved error handling."""
-    if not data.empty:
-        pdf_file = generate_pdf_report(data, title, filename)
-        if pdf_file:
-            try:
-                with open(pdf_file, "rb") as file:
-                    st.download_button(
-                        label="📥 Download Report",
-                        data=file,
-                        file_name=filename,
-                        mime="application/pdf"
-                    )
-            except Exception as e:
-                st.error(f"Error downloading report: {e}")
-            finally:
-                # Clean up the temporary file
-                import os
-                os.unlink(pdf_file)
-    else:
+def report_download(job):
+    """Download button for a finished report job."""
+    if not job.rows_done:
         st.warning("No data available to generate the report.")
+        return
+    spec = REPORTS[job.report_type]
+    st.download_button(
+        label="📥 Download Report",
+        data=job.data,
+        file_name=spec.filename,
+        mime="application/pdf",
+        key=f"download_{job.id}"
+    )
+    st.caption(f"{job.rows_done} rows, generated at {datetime.fromtimestamp(job.finished):%H:%M:%S}.")
+
+
+@st.fragment(run_every=REPORT_POLL_SECONDS)
+def report_job_progress(job_id):
+    """
+    Progress bar of a running report job, redrawn every REPORT_POLL_SECONDS without rerunning the page
+    or holding a script thread in between; reruns the page once the job has finished.
+    """
+    job = report_jobs.get(job_id)
+    if job is None or not job.active:
+        st.rerun()
+    if job.status == "queued":
+        label = "Queued..."
+    elif job.total_rows:
+        label = f"Generating: {job.rows_done} of ~{job.total_rows} rows"
+    else:
+        label = f"Generating: {job.rows_done} rows"
+    st.progress(job.progress(), text=label)
+
+
+def report_job_panel(report_type):
+    """
+    Show the report for `report_type`: the cached artifact if its tables are unchanged, else the
+    progress of this session's job (see report_job_progress()), else a button that enqueues one (report_jobs.py).
+    """
+    jobs = st.session_state.setdefault("report_jobs", {})
+    cached = report_jobs.cached(report_type)
+    if cached is not None:
+        report_download(cached)
+        return
+
+    job = report_jobs.get(jobs.get(report_type)) if report_type in jobs else None
+    if job is not None and job.active:
+        report_job_progress(job.id)
+        return
+    if job is not None and job.status == "done":
+        # Finished but no longer cached: the data changed while it ran or since
+        st.info("This report may be out of date; generate it again for the latest data.")
+        report_download(job)
+    elif job is not None and job.status == "failed":
+        st.error(f"Error generating PDF report: {job.error}")
+
+    if st.button("Generate Report", key=f"generate_{report_type}"):
+        jobs[report_type] = report_jobs.submit(report_type).id
+        st.rerun()
 
 
 def generate_reports():
     check_user_role(["Admin", "Doctor", "Receptionist", "Nurse"])
-    """Generate reports with improved formatting and error handling."""
+    """Generate reports in the background; finished reports are shared until their data changes."""
     st.markdown('<div class="header-lightblue"><h3>📄 Generate Reports</h3></div>', unsafe_allow_html=True)
-    report_type = st.selectbox("Select Report Type", [
-        "Patient History", "Billing", "Staff", "Inventory", "Appointments",
-        "Emergency Patients", "Rooms", "Doctors"
-    ])
+    report_type = st.selectbox("Select Report Type", list(REPORTS))
+    report_job_panel(report_type)
 
+
+# ------------------ Export Data Section ------------------
+EXPORT_MODES = ["Full tables", "New rows since the last delta export"]
+
+
+def show_export_watermarks():
+    """Saved delta-export watermarks, one row per table."""
     try:
-        if report_type == "Patient History":
-            # Include medicine and quantity in the patient history report
-            data = fetch_data("SELECT * FROM patients", "patients")
-            download_report(data, "Patient History Report", "patient_history_report.pdf")
-
-        elif report_type == "Billing":
-            data = fetch_data("SELECT * FROM bill_details", "bill_details")
-            download_report(data, "Billing Report", "billing_report.pdf")
-
-        elif report_type == "Staff":
-            data = fetch_data("SELECT * FROM staff", "staff")
-            download_report(data, "Staff Report", "staff_report.pdf")
-
-        elif report_type == "Inventory":
-            data = fetch_data("SELECT * FROM inventory", "inventory")
-            download_report(data, "Inventory Report", "inventory_report.pdf")
-
-        elif report_type == "Appointments":
-            data = fetch_data("SELECT * FROM appointments", "appointments")
-            download_report(data, "Appointments Report", "appointments_report.pdf")
-
-        elif report_type == "Emergency Patients":
-            data = fetch_data("SELECT * FROM emergency_patients", "emergency_patients")
-            download_report(data, "Emergency Patients Report", "emergency_patients_report.pdf")
-
-        elif report_type == "Rooms":
-            data = fetch_data("SELECT * FROM rooms", "rooms")
-            download_report(data, "Rooms Report", "rooms_report.pdf")
-
-        elif report_type == "Doctors":
-            data = fetch_data("SELECT * FROM doctor", "doctor")
-            download_report(data, "Doctors Report", "doctors_report.pdf")
+        watermarks = load_watermarks()
     except Exception as e:
-        st.error(f"Error fetching data for report generation: {e}")
+        st.warning(f"Export watermarks are unavailable: {e}")
+        return
+    if not watermarks:
+        st.caption("No delta export yet: the first one exports every row.")
+        return
+    st.dataframe(pd.DataFrame(
+        [(table, key, rows, exported_at, len(gaps)) for table, (key, rows, exported_at, gaps) in watermarks.items()],
+        columns=["Table", "Last Exported Key", "Rows Exported", "Exported At", "Keys Awaiting Commit"]
+    ))
 
 
-# ------------------ Export Data Section ------------------
-def export_data():
-    check_user_role(["Admin","Doctor", "Receptionist", "Nurse"])
+def save_delivered_watermarks(watermarks):
+    """on_click of a delta export's download button: only a downloaded file advances the watermarks."""
     try:
-        st.markdown('<div class="header-lightblue"><h3>📤 Export Data</h3></div>', unsafe_allow_html=True)
-
-        # Dropdown to select data type
-        data_type = st.selectbox("Select Data to Export", [
-            "Patients", "Rooms", "Bills", "Appointments", "Staff", "Inventory",
-            "Emergency Patients", "Discharged Patients", "Doctors"
-        ])
-
-        # Button to trigger export
-        if st.button("Export to Excel"):
-            # Define the downloads folder
-            downloads_folder = str(Path.home() / "Downloads")
-
-            # Mapping of data types to SQL queries and table names
-            query_mapping = {
-                "Patients": ("SELECT * FROM patients", "patients"),
-                "Rooms": ("SELECT * FROM rooms", "rooms"),
-                "Bills": ("SELECT * FROM bill_details", "bill_details"),  # Corrected table name
-                "Appointments": ("SELECT * FROM appointments", "appointments"),
-                "Staff": ("SELECT * FROM staff", "staff"),
-                "Inventory": ("SELECT * FROM inventory", "inventory"),
-                "Emergency Patients": ("SELECT * FROM emergency_patients", "emergency_patients"),
-                "Discharged Patients": ("SELECT * FROM discharged_patients", "discharged_patients"),
-                "Doctors": ("SELECT * FROM doctor", "doctor")  # Corrected table name
-            }
-
-            # Check if the selected data type is valid
-            if data_type in query_mapping:
-                query, table_name = query_mapping[data_type]
+        save_watermarks(watermarks)
+    except Exception as e:
+        st.session_state["export_watermark_message"] = (
+            "error", f"Export watermarks were not saved, the next delta export repeats these rows: {e}")
+        logging.error(f"Error saving export watermarks {watermarks}: {e}")
+    else:
+        st.session_state["export_watermark_message"] = ("success", "Watermarks advanced: " + ", ".join(
+            f"{table} to {key} (+{rows} rows)" for table, (key, rows, _) in watermarks.items()))
 
-                # Fetch data from the database
-                data = fetch_data(query, table_name)
 
-                # Define the file path for the Excel file
-                file_path = os.path.join(downloads_folder, f"{table_name}.xlsx")
+def export_data():
+    check_user_role(["Admin","Doctor", "Receptionist", "Nurse"])
+    """Stream tables into CSV, Parquet or XLSX files (exporters.py) and offer them for download."""
+    st.markdown('<div class="header-lightblue"><h3>📤 Export Data</h3></div>', unsafe_allow_html=True)
+
+    # Outcome of the last delta download, set by save_delivered_watermarks() before this rerun
+    message = st.session_state.pop("export_watermark_message", None)
+    if message:
+        getattr(st, message[0])(message[1])
+
+    delta = st.radio("Export", EXPORT_MODES, horizontal=True) == EXPORT_MODES[1]
+    options = [data_type for data_type, spec in EXPORTS.items() if spec.key or not delta]
+    data_types = st.multiselect("Select Data to Export", options, default=["Patients"])
+    fmt = st.selectbox("Format", available_formats())
+    if len(data_types) > 1:
+        st.caption("Several tables are bundled into one ZIP file.")
+    if delta:
+        show_export_watermarks()
+
+    if not st.button("Export"):
+        return
+    if not data_types:
+        st.warning("Select at least one table to export.")
+        return
 
-                # Check if data is empty
-                if data.empty:
-                    st.warning(f"No data found for {data_type}. Export canceled.")
-                    logging.warning(f"No data found for {data_type} during export.")
-                else:
-                    # Export data to Excel
-                    data.to_excel(file_path, index=False)
-                    st.success(f"{data_type} data exported successfully to {file_path}!")
-                    logging.info(f"{data_type} data exported successfully to {file_path}.")
-            else:
-                st.error("Invalid data type selected.")
-                logging.error(f"Invalid data type selected: {data_type}")
+    bar = st.progress(0.0, text="Starting export...")
+    tables = [EXPORTS[data_type].table for data_type in data_types]
+    try:
+        result = run_export([EXPORTS[data_type] for data_type in data_types], fmt, lambda table, done: bar.progress(
+            tables.index(table) / len(tables), text=f"{table}: {done} rows exported"), delta=delta)
     except Exception as e:
+        bar.empty()
         st.error(f"Error exporting data: {e}")
-        logging.error(f"Error exporting data: {e}")
+        logging.error(f"Error exporting {', '.join(data_types)}: {e}")
+        return
+
+    bar.progress(1.0, text=f"{result.rows} rows exported.")
+    # A delta export's watermarks are saved when the file is downloaded, not when it is built: an
+    # abandoned export leaves them where they were and the next one repeats these rows
+    st.download_button(label=f"📥 Download {result.file_name}", data=result.read(),
+                       file_name=result.file_name, mime=result.mime,
+                       on_click=save_delivered_watermarks if delta else None,
+                       args=(result.watermarks,) if delta else None)
+    if delta:
+        st.caption("Watermarks advance when the file is downloaded.")
+    logging.info(f"Exported {', '.join(data_types)} as {fmt} ({result.rows} rows, delta={delta}).")
+
 
 # ------------------ Streamlit UI ------------------
+# Schema check, pool warm-up and cache prefetch start in the background while the first page renders
+start_warm_up()
+
 if 'startup_done' not in st.session_state:
     st.session_state["startup_done"] = False
 
-# Show startup animation only once when the application starts
-if not st.session_state["startup_done"]:
+# Show startup animation only once per session; it overlays the page instead of delaying it
+if HMS_SHOW_SPLASH and not st.session_state["startup_done"]:
     startup_animation()
-    st.session_state["startup_done"] = True
+st.session_state["startup_done"] = True
+
+# The schema must be current and seed data in place before any page queries; returns at once after the first run
+if not ensure_bootstrapped() and pending_schema_versions():
+    st.error(
+        f"The database schema is out of date: migrations {', '.join(map(str, pending_schema_versions()))} "
+        "are pending. Review and apply them with `python migrations.py`, then reload this page."
+    )
+    st.stop()
 
 st.title("\U0001F3E5 Hospital Management System")
 
@@ -3182,6 +2899,26 @@ with st.sidebar:
         if st.button(tab, key=tab):
             st.session_state["active_tab"] = tab
 
+    # Query cache effectiveness (Admin only)
+    if st.session_state.get('user_role') == "Admin":
+        cache_stats = query_cache.status()
+        st.caption(
+            f"Query cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['entries']} entries, "
+            f"{cache_stats['invalidations']} invalidated)"
+        )
+        figure_stats = figure_cache.status()
+        st.caption(
+            f"Figure cache: {figure_stats['hits']} hits / {figure_stats['misses']} misses "
+            f"({figure_stats['hit_rate']:.0%} hit rate, {figure_stats['entries']} entries, "
+            f"{figure_stats['saved_seconds']:.1f}s of chart building saved)"
+        )
+        job_stats = report_jobs.status()
+        st.caption(
+            f"Report jobs: {job_stats['submitted']} built, {job_stats['reused']} served from cache, "
+            f"{job_stats['active']} running, {job_stats['failed']} failed"
+        )
+
 #------------------Main content based on the active tab-------------
 choice = st.session_state["active_tab"]
 
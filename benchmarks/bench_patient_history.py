@@ -0,0 +1,104 @@
+"""
+Benchmark the patient history pipeline (patient_history.py) against the old row-wise df.apply version.
+
+    python benchmarks/bench_patient_history.py                      # 10k, 100k, 1M rows
+    python benchmarks/bench_patient_history.py --sizes 50000 200000 --legacy-max 50000
+
+Prints seconds and microseconds per row for each size; a flat us/row column means linear scaling.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from patient_history import filter_history, prepare_history  # noqa: E402
+
+NAMES = np.array(["Ravi Kumar", "Anita Sharma", "John Smith", "Priya Singh", "Amit Verma", "Sara Khan"])
+MEDICINES = np.array(["Paracetamol", "Amoxicillin", "Ibuprofen", "Metformin", None])
+DOCTORS = np.array(["Dr. Mehta", "Dr. Rao,Dr. Iyer", "Dr. Smith", None])
+
+
+def synthetic_history(rows, seed=7):
+    """A frame shaped like the view_patient_history query result, with ~1/3 of the date lists missing."""
+    rng = np.random.default_rng(seed)
+    base = np.datetime64("2020-01-01")
+    discharge = (base + rng.integers(0, 1800, rows)).astype(str).astype(object)
+    second = (base + rng.integers(0, 1800, rows)).astype(str).astype(object)
+    readmitted = rng.random(rows) < 0.3
+    discharge[readmitted] = discharge[readmitted] + "," + second[readmitted]
+    emergency = np.char.add((base + rng.integers(0, 1800, rows)).astype(str), " 10:22:05").astype(object)
+    discharge[rng.random(rows) < 0.35] = None
+    emergency[rng.random(rows) < 0.35] = None
+    return pd.DataFrame({
+        "Patient ID": np.arange(1, rows + 1),
+        "Patient Name": NAMES[rng.integers(0, len(NAMES), rows)],
+        "Date of Birth": (np.datetime64("1950-01-01") + rng.integers(0, 25000, rows)).astype(str),
+        "Medicine": MEDICINES[rng.integers(0, len(MEDICINES), rows)],
+        "Quantity": rng.integers(0, 30, rows),
+        "Discharge Dates": discharge,
+        "Emergency Admission Dates": emergency,
+        "Assigned Doctors": DOCTORS[rng.integers(0, len(DOCTORS), rows)],
+    })
+
+
+def legacy_pipeline(df, search_query):
+    """The previous view_patient_history implementation, kept for comparison."""
+    df = df.fillna('N/A')
+    df['Date of Birth'] = pd.to_datetime(df['Date of Birth'], errors='coerce').dt.strftime('%Y-%m-%d')
+    for column in ["Discharge Dates", "Emergency Admission Dates"]:
+        df[column] = df[column].apply(
+            lambda x: ', '.join(
+                [pd.to_datetime(date, errors='coerce').strftime('%Y-%m-%d') for date in x.split(',') if
+                 date != 'N/A']) if x != 'N/A' else 'N/A'
+        )
+    return df[df.apply(
+        lambda row: (
+                search_query.lower() in str(row['Patient ID']).lower() or
+                search_query.lower() in row['Patient Name'].lower() or
+                search_query.lower() in str(row['Medicine']).lower() or
+                search_query.lower() in str(row['Quantity']).lower() or
+                search_query.lower() in str(row['Assigned Doctors']).lower()
+        ), axis=1
+    )]
+
+
+def vectorized_pipeline(df, search_query):
+    prepared, search_text = prepare_history(df)
+    return filter_history(prepared, search_text, search_query)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="largest size to also run the row-wise version on (it is slow)")
+    parser.add_argument("--query", default="smith")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'vectorized s':>13} {'us/row':>8} {'legacy s':>10} {'us/row':>8} {'speedup':>8} {'matches':>8}")
+    for rows in args.sizes:
+        df = synthetic_history(rows)
+        seconds, result = timed(vectorized_pipeline, df, args.query)
+        line = f"{rows:>10} {seconds:>13.3f} {seconds / rows * 1e6:>8.2f}"
+        if rows <= args.legacy_max:
+            legacy_seconds, legacy_result = timed(legacy_pipeline, df.copy(), args.query)
+            assert len(legacy_result) == len(result), "vectorized and legacy results differ"
+            line += f" {legacy_seconds:>10.3f} {legacy_seconds / rows * 1e6:>8.2f} {legacy_seconds / seconds:>7.1f}x"
+        else:
+            line += f" {'-':>10} {'-':>8} {'-':>8}"
+        print(f"{line} {len(result):>8}")
+
+
+if __name__ == "__main__":
+    main()
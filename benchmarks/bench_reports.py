@@ -0,0 +1,121 @@
+"""
+Benchmark the streaming PDF report engine (reports.py) against the old per-row iterrows() version.
+
+    python benchmarks/bench_reports.py                          # 10k and 100k patient rows
+    python benchmarks/bench_reports.py --sizes 100000 --legacy-max 10000
+    python benchmarks/bench_reports.py --memory                 # also report peak Python memory
+
+Rows are synthetic (shaped like SELECT * FROM patients) and fed in REPORT_CHUNK_ROWS chunks, as the
+unbuffered cursor would deliver them, so no database is needed. Prints seconds and PDF size per engine;
+with --memory each case is run a second time under tracemalloc (which slows rendering many times over,
+so it is never timed) to report peak Python memory.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reports import REPORT_CHUNK_ROWS, fpdf, render_pdf_report  # noqa: E402
+
+COLUMNS = ["id", "name", "age", "gender", "address", "contact_no", "dob", "consultant_name", "department",
+           "date_of_consultancy", "diseases", "fees", "medicine", "quantity"]
+NAMES = ["Ravi Kumar", "Anita Sharma", "John Smith", "Priya Singh", "Amit Verma", "Sara Khan"]
+DEPARTMENTS = ["Cardiology", "Neurology", "Orthopedics", "Pediatrics", "General Medicine"]
+
+
+def synthetic_chunks(rows, chunk_size=REPORT_CHUNK_ROWS):
+    """Patient rows in cursor-sized chunks, generated on the fly."""
+    base = date(2020, 1, 1)
+    for start in range(0, rows, chunk_size):
+        yield [
+            (i, NAMES[i % 6], 20 + i % 60, "MF"[i % 2], f"{i % 500} Park Street, Sector {i % 40}",
+             f"98{i:08d}", base - timedelta(days=8000 + i % 9000), f"Dr. {NAMES[(i + 3) % 6]}",
+             DEPARTMENTS[i % 5], base + timedelta(days=i % 1800), "Hypertension, Type 2 Diabetes",
+             500.0 + i % 300, "Paracetamol", i % 30)
+            for i in range(start, min(start + chunk_size, rows))
+        ]
+
+
+def legacy_report(data, title):
+    """The previous generate_pdf_report(): header-text widths, one cell per value via iterrows(), temp file."""
+    pdf = fpdf.FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(200, 10, title, ln=True, align="C")
+    pdf.ln(10)
+    pdf.set_font("Arial", size=10)
+    col_widths = [pdf.get_string_width(str(col)) + 10 for col in data.columns]
+    for i, col in enumerate(data.columns):
+        pdf.cell(col_widths[i], 10, col, border=1, align="C")
+    pdf.ln()
+    for index, row in data.iterrows():
+        for i, col in enumerate(data.columns):
+            pdf.cell(col_widths[i], 10, str(row[col]), border=1, align="C")
+        pdf.ln()
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+    temp_file.close()
+    pdf.output(temp_file.name)
+    with open(temp_file.name, "rb") as file:
+        size = len(file.read())
+    os.unlink(temp_file.name)
+    return size
+
+
+def streaming_report(rows):
+    buffer, _ = render_pdf_report("Patient History Report", COLUMNS, synthetic_chunks(rows))
+    return buffer.getbuffer().nbytes
+
+
+def timed(fn, *args):
+    """(seconds, result) of fn(*args)."""
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def peak_mb(fn, *args):
+    """Peak traced Python memory of fn(*args), in MB."""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def report_line(rows, engine, seconds, size, peak):
+    memory = f"{peak:>9.1f}" if peak is not None else f"{'-':>9}"
+    print(f"{rows:>8} {engine:>10} {seconds:>9.2f} {rows / seconds:>9.0f} {memory} {size / 2 ** 20:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--legacy-max", type=int, default=10_000,
+                        help="largest size to also run the iterrows() version on (it is slow)")
+    parser.add_argument("--memory", action="store_true",
+                        help="also measure peak Python memory in a separate, untimed tracemalloc run")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'engine':>10} {'seconds':>9} {'rows/s':>9} {'peak MB':>9} {'PDF MB':>8}")
+    for rows in args.sizes:
+        seconds, size = timed(streaming_report, rows)
+        peak = peak_mb(streaming_report, rows) if args.memory else None
+        report_line(rows, "streaming", seconds, size, peak)
+        if rows <= args.legacy_max:
+            # The old code loaded the whole result set into a DataFrame first; that is part of its cost
+            data = pd.DataFrame([row for chunk in synthetic_chunks(rows) for row in chunk], columns=COLUMNS)
+            seconds, size = timed(legacy_report, data, "Patient History Report")
+            peak = peak_mb(legacy_report, data, "Patient History Report") if args.memory else None
+            report_line(rows, "iterrows", seconds, size, peak)
+
+
+if __name__ == "__main__":
+    main()
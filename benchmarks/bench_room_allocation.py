@@ -0,0 +1,165 @@
+"""
+Load-test room allocation (room_allocation.py) with many concurrent allocators.
+
+    python benchmarks/bench_room_allocation.py --database hms_loadtest
+    python benchmarks/bench_room_allocation.py --database hms_loadtest --rooms 100 --workers 64 --attempts 10
+
+Runs against a scratch database (created if missing, its rooms table is recreated on every run; never
+point it at the live one) using the DB_HOST / DB_USER / DB_PASSWORD settings. Every worker thread has
+its own connection and tries to book `--attempts` rooms for distinct patients in three ways:
+
+    legacy       read the free rooms, then book one with an unconditional UPDATE (the old code path)
+    conditional  book a room from a stale list with claim_room(room_id=...), the conditional UPDATE
+    auto-pick    claim_room() without a room, i.e. SELECT ... FOR UPDATE SKIP LOCKED
+
+A room is double-booked when two workers were both told they got it. The safe modes must report 0
+double bookings and exactly as many successful claims as booked rows.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DB_CONFIG, ConnectionPool  # noqa: E402
+from room_allocation import RoomUnavailableError, claim_room  # noqa: E402
+
+ROOMS_TABLE = """
+    CREATE TABLE rooms (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        room_number VARCHAR(50) UNIQUE NOT NULL,
+        room_type ENUM('Single', 'Double', 'ICU', 'Deluxe', 'NA') NOT NULL,
+        availability ENUM('Booked', 'Not Booked') DEFAULT 'Not Booked',
+        patient_id INT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        is_icu TINYINT(1) DEFAULT 0,
+        INDEX idx_rooms_icu_availability (is_icu, availability)
+    )
+"""
+
+
+def reset_rooms(pool, rooms):
+    with pool.acquire() as con:
+        cur = con.cursor()
+        cur.execute("DROP TABLE IF EXISTS rooms")
+        cur.execute(ROOMS_TABLE)
+        cur.executemany("INSERT INTO rooms (room_number, room_type) VALUES (%s, %s)",
+                        [(f"LT-{i:05d}", ("Single", "Double", "Deluxe")[i % 3]) for i in range(rooms)])
+        con.commit()
+
+
+def free_room_ids(con):
+    cur = con.cursor()
+    cur.execute("SELECT id FROM rooms WHERE availability = 'Not Booked' AND is_icu = FALSE")
+    return [row[0] for row in cur.fetchall()]
+
+
+def legacy_claim(con, patient_id, rng):
+    rooms = free_room_ids(con)
+    if not rooms:
+        con.rollback()
+        raise RoomUnavailableError("No general rooms available!")
+    room_id = rng.choice(rooms)
+    # The old code booked the room on a separate step with no availability check
+    con.cursor().execute("UPDATE rooms SET availability = 'Booked', patient_id = %s WHERE id = %s",
+                         (patient_id, room_id))
+    con.commit()
+    return room_id
+
+
+def conditional_claim(con, patient_id, rng):
+    # A receptionist's room list is usually stale by the time they click Allocate
+    room_id = rng.choice(free_room_ids(con) or [0])
+    try:
+        claim = claim_room(con, patient_id, room_id)
+    except RoomUnavailableError:
+        con.rollback()
+        raise
+    con.commit()
+    return claim.room_id
+
+
+def auto_claim(con, patient_id, rng):
+    try:
+        claim = claim_room(con, patient_id)
+    except RoomUnavailableError:
+        con.rollback()
+        raise
+    con.commit()
+    return claim.room_id
+
+
+MODES = {"legacy": legacy_claim, "conditional": conditional_claim, "auto-pick": auto_claim}
+
+
+def run_mode(pool, claim, workers, attempts, rooms):
+    reset_rooms(pool, rooms)
+    start = threading.Barrier(workers)
+    won, refused, errors = [], [0], Counter()
+    lock = threading.Lock()
+
+    def worker(n):
+        rng = random.Random(n)
+        mine, my_refused, my_errors = [], 0, Counter()
+        with pool.acquire() as con:
+            start.wait()
+            for i in range(attempts):
+                try:
+                    mine.append(claim(con, n * attempts + i + 1, rng))
+                except RoomUnavailableError:
+                    my_refused += 1
+                except Exception as er:
+                    con.rollback()
+                    my_errors[type(er).__name__] += 1
+        with lock:
+            won.extend(mine)
+            refused[0] += my_refused
+            errors.update(my_errors)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(worker, range(workers)))
+    seconds = time.perf_counter() - started
+
+    with pool.acquire() as con:
+        cur = con.cursor()
+        cur.execute("SELECT COUNT(*) FROM rooms WHERE availability = 'Booked'")
+        booked = cur.fetchone()[0]
+    double = sum(count - 1 for count in Counter(won).values() if count > 1)
+    return seconds, len(won), refused[0], double, booked, dict(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", required=True, help="scratch database to run in (not the live one)")
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--attempts", type=int, default=10, help="claims per worker")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    args = parser.parse_args()
+    if args.database == DB_CONFIG["database"]:
+        parser.error(f"{args.database} is the application database; use a scratch database")
+
+    server = dict(DB_CONFIG)
+    del server["database"]
+    with ConnectionPool(size=1, **server).acquire() as con:
+        con.cursor().execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}`")
+    pool = ConnectionPool(size=args.workers + 1, timeout=60, **server, database=args.database)
+
+    print(f"{args.workers} workers x {args.attempts} claims on {args.rooms} rooms")
+    print(f"{'mode':<12} {'seconds':>8} {'claims/s':>9} {'won':>6} {'refused':>8} {'double':>7} {'booked':>7}  errors")
+    for mode in args.modes:
+        seconds, won, refused, double, booked, errors = run_mode(
+            pool, MODES[mode], args.workers, args.attempts, args.rooms)
+        print(f"{mode:<12} {seconds:>8.2f} {(won + refused) / seconds:>9.0f} {won:>6} {refused:>8} {double:>7} "
+              f"{booked:>7}  {errors or ''}")
+    pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark cold-start cost: import time of the heavy libraries, eager versus lazy_import(), and the
+time of the first full script run of HMS.py.
+
+    python benchmarks/bench_startup.py                # imports only
+    python benchmarks/bench_startup.py --render       # also time HMS.py's first run (needs streamlit)
+
+Every measurement runs in a fresh interpreter, so nothing is already in sys.modules; the median of
+--repeat runs is printed. The first run uses streamlit.testing.AppTest with HMS_SHOW_SPLASH=0 and
+renders the login page.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_MODULES = ["plotly.express", "plotly.graph_objects", "fpdf"]
+CORE_MODULES = ["pandas", "mysql.connector", "streamlit"]
+
+_IMPORT_TIMER = """
+import sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+{body}
+print(time.perf_counter() - started)
+"""
+
+_RENDER_TIMER = """
+import os, sys, time
+os.environ["HMS_SHOW_SPLASH"] = "0"
+os.chdir({root!r})
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+started = time.perf_counter()
+AppTest.from_file("HMS.py", default_timeout={timeout}).run()
+print(time.perf_counter() - started)
+"""
+
+
+def fresh_seconds(code, repeat):
+    """Median seconds printed by `code` over `repeat` fresh interpreters, formatted as ms (or the error)."""
+    timings = []
+    for _ in range(repeat):
+        done = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT)
+        if done.returncode != 0:
+            errors = done.stderr.strip().splitlines()
+            return f"failed: {errors[-1] if errors else done.returncode}"
+        timings.append(float(done.stdout.strip().splitlines()[-1]))
+    return f"{statistics.median(timings) * 1000:>10.1f}"
+
+
+def import_cases():
+    eager = "\n".join(f"import {name}" for name in LAZY_MODULES)
+    lazy = "from lazy_imports import lazy_import\n" + "\n".join(f"lazy_import({name!r})" for name in LAZY_MODULES)
+    first_use = lazy + "\nsys.modules['plotly.express'].bar\nsys.modules['fpdf'].FPDF"
+    cases = [(f"import {name}", f"import {name}") for name in CORE_MODULES + LAZY_MODULES]
+    cases += [
+        ("charts + reports, eager", eager),
+        ("charts + reports, lazy_import", lazy),
+        ("charts + reports, lazy + first use", first_use),
+    ]
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--render", action="store_true", help="also time the first run of HMS.py")
+    parser.add_argument("--timeout", type=float, default=60, help="AppTest run timeout in seconds")
+    args = parser.parse_args()
+
+    print(f"{'case':<40} {'median ms':>10}")
+    for label, body in import_cases():
+        print(f"{label:<40} {fresh_seconds(_IMPORT_TIMER.format(root=ROOT, body=body), args.repeat)}")
+
+    if args.render:
+        render = fresh_seconds(_RENDER_TIMER.format(root=ROOT, timeout=args.timeout), args.repeat)
+        print(f"{'HMS.py first run (login page)':<40} {render}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+One-time bootstrap: check that no schema migration is pending, then seed reference data (rooms and
+ambulances).
+
+Run automatically once per server process by HMS.py (see start_warm_up()). Migrations are never applied
+from here; apply them with python migrations.py. To apply them and seed explicitly:
+
+    python bootstrap.py
+"""
+import logging
+import os
+import threading
+import time
+
+import mysql.connector as sq
+
+from dashboard_metrics import load_dashboard_snapshot
+from database import get_connection, get_pool
+from migrations import apply_migrations, pending_versions
+from typeahead import DOCTOR_STAFF, PATIENTS
+
+# ------------------ Seed Data ------------------
+GENERAL_ROOMS = 50
+ICU_ROOMS = 25
+AMBULANCES = 5
+
+
+def room_seed_rows():
+    """50 general rooms (Single, Double, Deluxe) followed by 25 ICU rooms."""
+    rows = []
+    for i in range(1, GENERAL_ROOMS + 1):
+        room_type = "Single" if i <= 20 else ("Double" if i <= 40 else "Deluxe")
+        rows.append((f"GEN-{i}", room_type, False))
+    for i in range(1, ICU_ROOMS + 1):
+        rows.append((f"ICU-{i}", "ICU", True))
+    return rows
+
+
+def ambulance_seed_rows():
+    return [(f"AMB-{i}",) for i in range(1, AMBULANCES + 1)]
+
+
+# ------------------ Bootstrap ------------------
+def bootstrap(con=None):
+    """
+    Seed rooms and ambulances if their tables are empty.
+
+    Idempotent: both inserts are no-ops on the unique room/ambulance numbers (ON DUPLICATE KEY UPDATE),
+    so concurrent or repeated runs never duplicate rows. Returns the number of rows inserted.
+    """
+    if con is None:
+        with get_connection() as pooled:
+            return bootstrap(pooled)
+
+    cur = con.cursor()
+    cur.execute("SELECT EXISTS(SELECT 1 FROM rooms), EXISTS(SELECT 1 FROM ambulances)")
+    has_rooms, has_ambulances = cur.fetchone()
+    inserted = 0
+
+    if not has_rooms:
+        # executemany() sends the whole seed as a single multi-row INSERT
+        cur.executemany(
+            "INSERT INTO rooms (room_number, room_type, availability, is_icu) VALUES (%s, %s, 'Not Booked', %s) "
+            "ON DUPLICATE KEY UPDATE room_number = room_number",
+            room_seed_rows()
+        )
+        inserted += cur.rowcount
+
+    if not has_ambulances:
+        cur.executemany(
+            "INSERT INTO ambulances (ambulance_number, status) VALUES (%s, 'Available') "
+            "ON DUPLICATE KEY UPDATE ambulance_number = ambulance_number",
+            ambulance_seed_rows()
+        )
+        inserted += cur.rowcount
+
+    con.commit()
+    if inserted:
+        logging.info(f"Bootstrap seeded {inserted} rooms/ambulances.")
+    return inserted
+
+
+_bootstrapped = False
+_pending = []
+_bootstrap_lock = threading.Lock()
+
+
+def ensure_bootstrapped():
+    """
+    Check for pending migrations and run bootstrap() once per process; later calls (every rerun) return
+    immediately. Returns False, to be retried on the next run, while migrations are pending (see
+    pending_schema_versions()) or the database is unreachable.
+    """
+    global _bootstrapped, _pending
+    if _bootstrapped:
+        return True
+    with _bootstrap_lock:
+        if not _bootstrapped:
+            try:
+                _pending = pending_versions()
+                if _pending:
+                    logging.error(f"Schema migrations {_pending} are pending; apply them with python migrations.py")
+                else:
+                    bootstrap()
+                    _bootstrapped = True
+            except sq.Error as er:
+                logging.error(f"Bootstrap failed, will retry on next run: {er}")
+    return _bootstrapped
+
+
+def pending_schema_versions():
+    """Migration versions the last ensure_bootstrapped() check found unapplied."""
+    return list(_pending)
+
+
+# ------------------ Background Warm-up ------------------
+WARM_UP_CONNECTIONS = int(os.getenv("WARM_UP_CONNECTIONS", 4))
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+
+
+def warm_up():
+    """Bootstrap, open pooled connections and load the shared caches the first pages read."""
+    started = time.perf_counter()
+    if not ensure_bootstrapped():
+        return
+    try:
+        get_pool().warm_up(WARM_UP_CONNECTIONS)
+        load_dashboard_snapshot()
+        for source in (PATIENTS, DOCTOR_STAFF):
+            source.index()
+    except sq.Error as er:
+        logging.warning(f"Warm-up stopped early: {er}")
+        return
+    logging.info(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+
+def start_warm_up():
+    """Start warm_up() on a daemon thread, once per process; later calls (every rerun) return immediately."""
+    global _warm_up_thread
+    if _warm_up_thread is None:
+        with _warm_up_lock:
+            if _warm_up_thread is None:
+                _warm_up_thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+                _warm_up_thread.start()
+    return _warm_up_thread
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    print(f"Applied migrations: {apply_migrations() or 'none pending'}")
+    print(f"Inserted {bootstrap()} rows.")
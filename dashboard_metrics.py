@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+
+from database import cached_query, run_query
+from date_ranges import DateRange
+
+# ------------------ Dashboard Snapshot ------------------
+# One statement, one derived table per fact table, so every table is scanned once per render.
+# Date-bounded KPIs get their own derived table with a half-open range predicate (see date_ranges.py)
+# so they are answered by index range scans instead of DATE()/MONTH() over every row.
+SNAPSHOT_QUERY = """
+    SELECT
+        p.patient_count,
+        p.avg_age,
+        t.admitted_today,
+        (SELECT diseases FROM patients GROUP BY diseases ORDER BY COUNT(*) DESC LIMIT 1) AS top_disease,
+        (SELECT department FROM patients GROUP BY department ORDER BY COUNT(*) DESC LIMIT 1) AS top_department,
+        r.total_icu_rooms,
+        r.occupied_icu_rooms,
+        r.available_icu_rooms,
+        b.revenue_this_month,
+        i.inventory_items,
+        i.low_stock_items,
+        i.critical_stock_items,
+        s.doctor_count,
+        e.emergency_count,
+        e.emergency_doctor_count,
+        e.avg_emergency_minutes
+    FROM
+        (SELECT COUNT(*) AS patient_count,
+                AVG(age) AS avg_age
+         FROM patients) p
+    CROSS JOIN
+        (SELECT COUNT(*) AS admitted_today
+         FROM patients
+         WHERE {admitted_range}) t
+    CROSS JOIN
+        (SELECT SUM(is_icu = TRUE) AS total_icu_rooms,
+                SUM(is_icu = TRUE AND availability = 'Booked') AS occupied_icu_rooms,
+                SUM(room_type = 'ICU' AND availability = 'Not Booked') AS available_icu_rooms
+         FROM rooms) r
+    CROSS JOIN
+        (SELECT SUM(total_amount) AS revenue_this_month
+         FROM bill_details
+         WHERE {revenue_range}) b
+    CROSS JOIN
+        (SELECT COUNT(*) AS inventory_items,
+                SUM(quantity < 5) AS low_stock_items,
+                SUM(quantity < 10) AS critical_stock_items
+         FROM inventory) i
+    CROSS JOIN
+        (SELECT SUM(role = 'Doctor') AS doctor_count FROM staff) s
+    CROSS JOIN
+        (SELECT COUNT(*) AS emergency_count,
+                COUNT(DISTINCT doctor_id) AS emergency_doctor_count,
+                AVG(TIMESTAMPDIFF(MINUTE, admission_date, NOW())) AS avg_emergency_minutes
+         FROM emergency_patients) e
+"""
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    """Immutable set of scalar KPIs shared by every dashboard widget for one render."""
+
+    patient_count: int = 0
+    avg_age: float = 0.0
+    admitted_today: int = 0
+    top_disease: str = "No data"
+    top_department: str = "No data"
+    total_icu_rooms: int = 0
+    occupied_icu_rooms: int = 0
+    available_icu_rooms: int = 0
+    revenue_this_month: float = 0.0
+    inventory_items: int = 0
+    low_stock_items: int = 0
+    critical_stock_items: int = 0
+    doctor_count: int = 0
+    emergency_count: int = 0
+    emergency_doctor_count: int = 0
+    avg_emergency_minutes: float = 0.0
+
+    @property
+    def icu_occupancy_rate(self):
+        return (self.occupied_icu_rooms / self.total_icu_rooms) * 100 if self.total_icu_rooms else 0
+
+    @property
+    def critical_stock_percent(self):
+        return (self.critical_stock_items * 100.0 / self.inventory_items) if self.inventory_items else 0
+
+    @classmethod
+    def from_row(cls, columns, row):
+        values = dict(zip(columns, row))
+        kwargs = {}
+        for name, field in cls.__dataclass_fields__.items():
+            value = values.get(name)
+            if value is None:
+                continue
+            kwargs[name] = field.type(value) if field.type in (int, float, str) else value
+        return cls(**kwargs)
+
+
+def snapshot_query(today=None):
+    """Return (sql, params) for the snapshot: admissions on `today` and revenue for its calendar month."""
+    admitted_sql, admitted_params = DateRange.day(today).predicate("date_of_consultancy")
+    revenue_sql, revenue_params = DateRange.month(today).predicate("bill_date")
+    sql = SNAPSHOT_QUERY.format(admitted_range=admitted_sql, revenue_range=revenue_sql)
+    return sql, admitted_params + revenue_params
+
+
+def load_dashboard_snapshot(con=None):
+    """
+    Compute every dashboard KPI in a single query and return it as a DashboardSnapshot.
+
+    Without an explicit connection the result is shared through the query cache; the date
+    parameters are part of the cache key, so entries roll over at midnight on their own.
+    """
+    sql, params = snapshot_query()
+    result = run_query(sql, params, con) if con is not None else cached_query(sql, params)
+    if not result.rows:
+        return DashboardSnapshot()
+    return DashboardSnapshot.from_row(result.columns, result.rows[0])
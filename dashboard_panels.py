@@ -0,0 +1,158 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass
+
+from database import cached_query
+from query_cache import query_cache, tables_in
+
+# ------------------ Panel Queries ------------------
+# Dashboard prefetch: worker threads (each holds a pooled connection while it runs) and the default
+# number of seconds a panel may take before it is rendered as a placeholder
+DASHBOARD_WORKERS = int(os.getenv("DASHBOARD_WORKERS", 4))
+DASHBOARD_PANEL_TIMEOUT = float(os.getenv("DASHBOARD_PANEL_TIMEOUT", 3))
+
+
+@dataclass(frozen=True)
+class PanelQuery:
+    """
+    The dataset behind one dashboard chart.
+
+    Args:
+        query (str): Read-only SQL for the chart.
+        columns (tuple): Display names given to the result columns, in order.
+        timeout (float): Seconds after prefetch start before the panel gives up and shows a placeholder.
+    """
+
+    query: str
+    columns: tuple
+    timeout: float = DASHBOARD_PANEL_TIMEOUT
+
+    def load(self):
+        """Run the query through the shared result cache. Safe to call from worker threads (no Streamlit calls)."""
+        return cached_query(self.query).to_frame(list(self.columns))
+
+    def data_version(self):
+        """Invalidation counters of the tables the query reads; they change whenever a write to one is committed."""
+        return tuple(sorted(query_cache.versions(tables_in(self.query)).items()))
+
+
+DASHBOARD_PANELS = {
+    # Time series read the per-day rollups (see rollups.py) instead of grouping their fact tables
+    "revenue_trend": PanelQuery(
+        "SELECT DATE_FORMAT(day, '%Y-%m') AS month, SUM(amount) AS total_amount "
+        "FROM daily_rollups WHERE metric = 'revenue' GROUP BY month ORDER BY month",
+        ("month", "total_amount"),
+    ),
+    "room_utilization": PanelQuery(
+        "SELECT room_type, availability, COUNT(*) as count FROM rooms GROUP BY room_type, availability",
+        ("Room Type", "Status", "Count"),
+    ),
+    "staff_shifts": PanelQuery(
+        "SELECT role, shift, COUNT(*) as count FROM staff GROUP BY role, shift",
+        ("Role", "Shift", "Count"),
+    ),
+    "age_distribution": PanelQuery(
+        """
+        SELECT
+            CASE
+                WHEN age BETWEEN 0 AND 18 THEN '0-18'
+                WHEN age BETWEEN 19 AND 30 THEN '19-30'
+                WHEN age BETWEEN 31 AND 50 THEN '31-50'
+                ELSE '51+'
+            END AS age_group,
+            COUNT(*) as count
+        FROM patients
+        GROUP BY age_group
+        """,
+        ("Age Group", "Count"),
+    ),
+    "appointments": PanelQuery(
+        "SELECT DAY(day), MONTH(day), SUM(count) FROM daily_rollups WHERE metric = 'appointments' "
+        "GROUP BY DAY(day), MONTH(day)",
+        ("Day", "Month", "Count"),
+    ),
+    "icu_rooms": PanelQuery(
+        "SELECT room_number, availability FROM rooms WHERE is_icu = TRUE",
+        ("Room Number", "Status"),
+    ),
+    "general_rooms": PanelQuery(
+        "SELECT room_number, availability FROM rooms WHERE is_icu = FALSE",
+        ("Room Number", "Status"),
+    ),
+    "discharges": PanelQuery(
+        "SELECT day, count FROM daily_rollups WHERE metric = 'discharges' ORDER BY day",
+        ("Date", "Count"),
+    ),
+    "admissions": PanelQuery(
+        "SELECT day, count FROM daily_rollups WHERE metric = 'admissions' ORDER BY day",
+        ("Date", "Count"),
+    ),
+    "diseases": PanelQuery(
+        "SELECT diseases, COUNT(*) as count FROM patients GROUP BY diseases",
+        ("Disease", "Count"),
+    ),
+    "gender_ratio": PanelQuery(
+        "SELECT gender, COUNT(*) as count FROM patients GROUP BY gender",
+        ("Gender", "Count"),
+    ),
+    "departments": PanelQuery(
+        "SELECT department, COUNT(*) as count FROM patients GROUP BY department",
+        ("Department", "Count"),
+    ),
+    "room_allocation": PanelQuery(
+        "SELECT room_type, COUNT(*) as count FROM rooms WHERE availability = 'Booked' GROUP BY room_type",
+        ("Room Type", "Count"),
+    ),
+}
+
+
+# ------------------ Concurrent Prefetch ------------------
+_executor = ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS, thread_name_prefix="dashboard")
+
+
+class PanelPrefetch:
+    """
+    Panel datasets loading concurrently on the shared dashboard thread pool.
+
+    The panels in `names` are submitted at construction time; result() then waits for one panel, at
+    most until its own deadline (submission + PanelQuery.timeout). Rendering panels in order
+    therefore takes as long as the slowest query, not the sum of all of them. A panel that times out
+    keeps running in the background and lands in the query cache, so it usually renders on the next
+    rerun. Panels not prefetched are submitted when first asked for.
+
+    `versions` holds each panel's data_version() from just before its query was submitted, so a
+    figure cached under that version is never built from older data.
+    """
+
+    def __init__(self, names, panels=None):
+        self.panels = panels or DASHBOARD_PANELS
+        self.failures = {}
+        self.versions = {}
+        self._deadlines = {}
+        self._futures = {}
+        for name in names:
+            self._submit(name)
+
+    def _submit(self, name):
+        panel = self.panels[name]
+        self.versions[name] = panel.data_version()
+        self._deadlines[name] = time.monotonic() + panel.timeout
+        self._futures[name] = _executor.submit(panel.load)
+
+    def result(self, name):
+        """The panel's DataFrame, or None if it failed or missed its deadline (the reason is kept in `failures`)."""
+        if name not in self._futures:
+            self._submit(name)
+        future = self._futures[name]
+        try:
+            return future.result(timeout=max(0.0, self._deadlines[name] - time.monotonic()))
+        except TimeoutError:
+            self.failures[name] = "timed out"
+            logging.warning(f"Dashboard panel {name} timed out after {self.panels[name].timeout:.1f}s")
+        except Exception as er:
+            self.failures[name] = "failed"
+            logging.error(f"Dashboard panel {name} failed: {er}")
+        return None
+
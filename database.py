@@ -0,0 +1,390 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+import mysql.connector as sq
+import pandas as pd
+from dotenv import load_dotenv
+from mysql.connector.constants import FieldType
+
+from query_cache import is_write, query_cache, written_tables
+
+load_dotenv()
+
+# ------------------ Pool Configuration ------------------
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "user": os.getenv("DB_USER", "root"),
+    "password": os.getenv("DB_PASSWORD", ".#RamJi."),
+    "database": os.getenv("DB_NAME", "HospitalManagement"),
+}
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+
+class PoolTimeoutError(sq.errors.PoolError):
+    """Raised when no pooled connection becomes free within the checkout timeout."""
+
+
+# ------------------ Write Notifications ------------------
+_write_listeners = []
+
+
+def add_write_listener(listener):
+    """Register `listener(tables)` to be called after every commit that wrote to `tables`."""
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
+
+def notify_write(tables):
+    """Tell listeners (result cache, derived stores) that `tables` changed."""
+    tables = frozenset(table.lower() for table in tables)
+    if not tables:
+        return
+    for listener in list(_write_listeners):
+        try:
+            listener(tables)
+        except Exception as er:
+            logging.error(f"Write listener {getattr(listener, '__name__', listener)} failed: {er}")
+
+
+add_write_listener(query_cache.invalidate_tables)
+
+
+class TrackingCursor:
+    """Cursor wrapper that records which tables write statements touched on its connection."""
+
+    def __init__(self, cursor, pooled):
+        self._cursor = cursor
+        self._pooled = pooled
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _track(self, operation):
+        if isinstance(operation, str) and is_write(operation):
+            self._pooled._dirty_tables.update(written_tables(operation))
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._track(operation)
+        return self._cursor.execute(operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        self._track(operation)
+        return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+
+
+# ------------------ Pooled Connection ------------------
+class PooledConnection:
+    """
+    Wraps a raw MySQL connection borrowed from a ConnectionPool.
+
+    close() hands the connection back to the pool instead of closing the socket,
+    so existing `con = connection(); ...; con.close()` callers keep working.
+    Used as a context manager it commits nothing on its own, rolls back when the
+    block raises, and always returns the connection.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._dirty_tables = set()
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise sq.errors.OperationalError("Connection already returned to the pool.")
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self._raw is not None:
+            try:
+                self._raw.rollback()
+            except sq.Error as er:
+                logging.error(f"Rollback failed while returning connection: {er}")
+        self.close()
+        return False
+
+    def cursor(self, *args, **kwargs):
+        return TrackingCursor(self.__getattr__("cursor")(*args, **kwargs), self)
+
+    def commit(self):
+        self.__getattr__("commit")()
+        tables, self._dirty_tables = self._dirty_tables, set()
+        notify_write(tables)
+
+    def rollback(self):
+        self.__getattr__("rollback")()
+        self._dirty_tables = set()
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.release(raw)
+
+    def __del__(self):
+        # Safety net for callers that forget to close(); the slot is not leaked.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+# ------------------ Connection Pool ------------------
+class ConnectionPool:
+    """
+    Thread-safe, fixed-size pool of MySQL connections.
+
+    Args:
+        size (int): Maximum number of open connections.
+        timeout (float): Seconds to wait for a free connection before raising PoolTimeoutError.
+        **connect_args: Passed to mysql.connector.connect().
+    """
+
+    def __init__(self, size=POOL_SIZE, timeout=POOL_TIMEOUT, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self.connect_args = connect_args or dict(DB_CONFIG)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._open = 0
+        self.stats = {"checkouts": 0, "created": 0, "discarded": 0, "timeouts": 0}
+
+    def _create(self):
+        raw = sq.connect(**self.connect_args)
+        with self._lock:
+            self._open += 1
+            self.stats["created"] += 1
+        logging.info("Database connection established successfully.")
+        return raw
+
+    def _discard(self, raw):
+        with self._lock:
+            self._open -= 1
+            self.stats["discarded"] += 1
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _healthy(self, raw):
+        """Health check on borrow: is_connected() pings the server without reconnecting."""
+        try:
+            return raw.is_connected()
+        except Exception:
+            return False
+
+    def acquire(self):
+        """Borrow a healthy connection, opening a new one only when no idle connection is usable."""
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.stats["timeouts"] += 1
+            raise PoolTimeoutError(f"No database connection free after {self.timeout:.1f}s (pool size {self.size}).")
+        try:
+            raw = None
+            while raw is None:
+                try:
+                    candidate = self._idle.get_nowait()
+                except queue.Empty:
+                    raw = self._create()
+                    break
+                if self._healthy(candidate):
+                    raw = candidate
+                else:
+                    logging.warning("Discarding stale pooled database connection.")
+                    self._discard(candidate)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.stats["checkouts"] += 1
+        return PooledConnection(self, raw)
+
+    def release(self, raw):
+        """Return a raw connection, ending any open transaction so the next borrower gets a fresh snapshot."""
+        try:
+            if raw.unread_result:
+                raw.consume_results()
+            if raw.in_transaction:
+                raw.rollback()
+            self._idle.put(raw)
+        except Exception as er:
+            logging.error(f"Dropping pooled connection on release: {er}")
+            self._discard(raw)
+        finally:
+            self._slots.release()
+
+    def warm_up(self, count=None):
+        """Open up to `count` connections ahead of the first request."""
+        borrowed = []
+        try:
+            for _ in range(min(count or self.size, self.size)):
+                borrowed.append(self.acquire())
+        finally:
+            for con in borrowed:
+                con.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def status(self):
+        with self._lock:
+            return dict(self.stats, open=self._open, idle=self._idle.qsize(), size=self.size)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                started = time.perf_counter()
+                _pool = ConnectionPool()
+                logging.info(f"Connection pool created (size={_pool.size}, timeout={_pool.timeout}s) "
+                             f"in {time.perf_counter() - started:.3f}s")
+    return _pool
+
+
+def get_connection():
+    """Borrow a pooled connection; use it as a context manager or call close() to return it."""
+    return get_pool().acquire()
+
+
+# ------------------ Typed Queries ------------------
+_INTEGER_TYPES = {FieldType.TINY, FieldType.SHORT, FieldType.INT24, FieldType.LONG, FieldType.LONGLONG,
+                  FieldType.YEAR}
+_FLOAT_TYPES = {FieldType.FLOAT, FieldType.DOUBLE, FieldType.DECIMAL, FieldType.NEWDECIMAL}
+_DATETIME_TYPES = {FieldType.DATETIME, FieldType.TIMESTAMP}
+
+
+class QueryResult:
+    """Rows of a single query together with the column names and MySQL field types from cursor.description."""
+
+    def __init__(self, columns, field_types, rows):
+        self.columns = columns
+        self.field_types = field_types
+        self.rows = rows
+
+    @classmethod
+    def from_cursor(cls, cur):
+        description = cur.description or []
+        return cls(
+            [col[0] for col in description],
+            [col[1] for col in description],
+            cur.fetchall() if description else [],
+        )
+
+    def dtypes(self):
+        """pandas dtype for each column (in column order), derived from its MySQL field type."""
+        dtypes = []
+        for field_type in self.field_types:
+            if field_type in _INTEGER_TYPES:
+                dtypes.append("int64")
+            elif field_type in _FLOAT_TYPES:
+                dtypes.append("float64")
+            elif field_type in _DATETIME_TYPES:
+                dtypes.append("datetime64[ns]")
+            else:
+                dtypes.append("object")
+        return dtypes
+
+    def to_frame(self, columns=None):
+        """
+        Build a DataFrame, optionally renaming the leading columns to `columns`.
+
+        Integer columns holding NULLs fall back to float64, as pandas does for any nullable integer column.
+        """
+        names = list(columns[:len(self.columns)]) + self.columns[len(columns):] if columns else list(self.columns)
+        df = pd.DataFrame(self.rows, columns=names)
+        for i, dtype in enumerate(self.dtypes()):
+            values = df.iloc[:, i]
+            if dtype == "float64":
+                df.isetitem(i, pd.to_numeric(values, errors="coerce").astype("float64"))
+            elif dtype == "datetime64[ns]":
+                df.isetitem(i, pd.to_datetime(values, errors="coerce"))
+            elif dtype == "int64":
+                df.isetitem(i, values.astype("float64" if values.isna().any() else "int64"))
+        return df
+
+
+def run_query(query, params=None, con=None):
+    """
+    Execute a read query in a single round trip and return a QueryResult.
+
+    Args:
+        query (str): SQL to execute; `%` placeholders are only interpolated when params are given.
+        params (tuple | dict, optional): Query parameters.
+        con (PooledConnection, optional): Reuse an already-borrowed connection instead of the pool.
+    """
+    if con is None:
+        with get_connection() as pooled:
+            return run_query(query, params, pooled)
+    cur = con.cursor()
+    try:
+        if params:
+            cur.execute(query, params)
+        else:
+            cur.execute(query)
+        return QueryResult.from_cursor(cur)
+    finally:
+        cur.close()
+
+
+def stream_rows(query, params=None, chunk_size=1000, con=None):
+    """
+    Yield a QueryResult header for `query` (column names and field types, no rows), then its rows in
+    lists of up to `chunk_size`.
+
+    The cursor is unbuffered, so MySQL streams the result set and at most one chunk is held in memory;
+    the connection stays busy until the generator is exhausted or closed.
+    """
+    if con is None:
+        with get_connection() as pooled:
+            yield from stream_rows(query, params, chunk_size, pooled)
+        return
+    cur = con.cursor(buffered=False)
+    try:
+        if params:
+            cur.execute(query, params)
+        else:
+            cur.execute(query)
+        description = cur.description or []
+        yield QueryResult([col[0] for col in description], [col[1] for col in description], [])
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+
+def cached_query(query, params=None, ttl=None):
+    """
+    run_query() through the process-wide result cache.
+
+    Entries are dropped as soon as a pooled connection commits a write to any table the query reads;
+    the TTL only bounds staleness from writes made outside this process.
+    """
+    return query_cache.get_or_load(query, params, lambda: run_query(query, params), ttl)
+
+
+def query_frame(query, params=None, columns=None, con=None):
+    """Run a read query and return a typed DataFrame (see QueryResult.to_frame)."""
+    return run_query(query, params, con).to_frame(columns)
@@ -0,0 +1,52 @@
+import calendar
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+
+# ------------------ Date Range Builder ------------------
+def add_months(day, months):
+    """Shift `day` by whole calendar months, clamping to the last day of the target month."""
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+@dataclass(frozen=True)
+class DateRange:
+    """
+    Half-open date interval [start, end).
+
+    predicate() renders it as `column >= %s AND column < %s`, which MySQL can answer with an index
+    range scan, unlike wrapping the column in DATE()/MONTH(). The same bounds work for DATE,
+    DATETIME and TIMESTAMP columns because `end` is exclusive.
+    """
+
+    start: date
+    end: date
+
+    @classmethod
+    def day(cls, day=None):
+        day = day or date.today()
+        return cls(day, day + timedelta(days=1))
+
+    @classmethod
+    def month(cls, day=None):
+        """The calendar month containing `day` (default: this month)."""
+        first = (day or date.today()).replace(day=1)
+        return cls(first, add_months(first, 1))
+
+    @classmethod
+    def last_n_days(cls, days, today=None):
+        """The `days` days before today plus today itself."""
+        today = today or date.today()
+        return cls(today - timedelta(days=days), today + timedelta(days=1))
+
+    @classmethod
+    def last_n_months(cls, months, today=None):
+        today = today or date.today()
+        return cls(add_months(today, -months), today + timedelta(days=1))
+
+    def predicate(self, column):
+        """Return (sql, params) for a sargable half-open range filter on `column`."""
+        return f"{column} >= %s AND {column} < %s", (self.start, self.end)
@@ -0,0 +1,483 @@
+"""
+Streaming data export.
+
+Tables are read from an unbuffered cursor in EXPORT_CHUNK_ROWS chunks and written straight into a
+temporary file as CSV, Parquet (pyarrow, zstd-compressed row groups) or XLSX (xlsxwriter in
+constant_memory mode), so memory use stays flat however large the table is. Several tables can be
+bundled into one ZIP. Parquet and XLSX are offered only when their library is installed.
+
+Delta exports move only the rows added since the last one, using each table's auto-increment key as
+a watermark (export_watermarks). InnoDB hands out auto-increment keys before commit, so a row can
+become visible after a larger key was already exported. Each delta export therefore also re-checks
+the EXPORT_DELTA_OVERLAP keys below its watermark: keys in that window that had no row yet are saved
+as gaps and picked up by a later export once their row is committed. Guarantee: every row is exported
+exactly once, provided it commits before EXPORT_DELTA_OVERLAP larger keys have been exported; a key
+that stays missing longer (rolled back, deleted, or an auto-increment jump) stops being tracked.
+The nightly warehouse export writes one file per table:
+
+    python exporters.py --delta --out /data/exports              # every table with a watermark key
+    python exporters.py --delta --format Parquet patients bill_details
+"""
+import argparse
+import csv
+import importlib.util
+import io
+import logging
+import os
+import shutil
+import tempfile
+import zipfile
+from dataclasses import dataclass, field
+
+from mysql.connector.constants import FieldType
+
+from database import get_connection, run_query, stream_rows
+
+# ------------------ Export Definitions ------------------
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 5000))
+EXPORT_DELTA_OVERLAP = int(os.getenv("EXPORT_DELTA_OVERLAP", 1000))
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    """
+    One entry of Export Data.
+
+    Args:
+        table (str): Exported table; also the file (and sheet) name.
+        key (str, optional): Auto-increment primary key used as the delta-export watermark; tables
+            without one are only exported in full.
+        sql (str, optional): SELECT to export instead of the whole table, e.g. a filtered record view.
+        params (tuple, optional): Parameters of `sql`.
+    """
+
+    table: str
+    key: str = None
+    sql: str = None
+    params: tuple = None
+
+    @property
+    def query(self):
+        return self.sql or f"SELECT * FROM {self.table}"
+
+    def delta_query(self, gaps=0):
+        """Rows with keys in (after, upto] or one of `gaps` earlier keys: a primary-key range scan plus lookups."""
+        condition = f"{self.key} > %s AND {self.key} <= %s"
+        if gaps:
+            condition = f"({condition}) OR {self.key} IN ({', '.join(['%s'] * gaps)})"
+        return f"SELECT * FROM {self.table} WHERE {condition} ORDER BY {self.key}"
+
+
+EXPORTS = {
+    "Patients": ExportSpec("patients", "id"),
+    "Rooms": ExportSpec("rooms"),
+    "Bills": ExportSpec("bill_details", "bill_no"),
+    "Appointments": ExportSpec("appointments", "id"),
+    "Staff": ExportSpec("staff"),
+    "Inventory": ExportSpec("inventory"),
+    "Emergency Patients": ExportSpec("emergency_patients", "id"),
+    "Ambulance Service": ExportSpec("ambulance_service", "id"),
+    "Discharged Patients": ExportSpec("discharged_patients", "discharge_id"),
+    "Doctors": ExportSpec("doctor"),
+}
+
+
+# ------------------ Format Writers ------------------
+def _text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).decode("utf-8", "replace")
+    return str(value)
+
+
+def _number(value):
+    return None if value is None else float(value)
+
+
+class CsvWriter:
+    """UTF-8 CSV with a header row. Writers take (binary file, QueryResult header, table name)."""
+
+    suffix = ".csv"
+    mime = "text/csv"
+    requires = None
+
+    def __init__(self, out, header, name):
+        self._text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+        self._csv = csv.writer(self._text)
+        self._csv.writerow(header.columns)
+
+    def write(self, rows):
+        self._csv.writerows(rows)
+
+    def close(self):
+        self._text.flush()
+        # Leave the underlying file open for the caller
+        self._text.detach()
+
+
+class ParquetWriter:
+    """
+    Parquet with one zstd-compressed row group per chunk.
+
+    The schema comes from the MySQL field types (DECIMAL as double, like QueryResult.to_frame()), so a
+    chunk whose values are all NULL cannot change a column's type.
+    """
+
+    suffix = ".parquet"
+    mime = "application/vnd.apache.parquet"
+    requires = "pyarrow"
+
+    def __init__(self, out, header, name):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        kinds = []
+        for field_type in header.field_types:
+            if field_type in (FieldType.TINY, FieldType.SHORT, FieldType.INT24, FieldType.LONG,
+                              FieldType.LONGLONG, FieldType.YEAR):
+                kinds.append((pa.int64(), None))
+            elif field_type in (FieldType.FLOAT, FieldType.DOUBLE, FieldType.DECIMAL, FieldType.NEWDECIMAL):
+                kinds.append((pa.float64(), _number))
+            elif field_type in (FieldType.DATETIME, FieldType.TIMESTAMP):
+                kinds.append((pa.timestamp("us"), None))
+            elif field_type in (FieldType.DATE, FieldType.NEWDATE):
+                kinds.append((pa.date32(), None))
+            else:
+                kinds.append((pa.string(), _text))
+        self._pa = pa
+        self._kinds = kinds
+        self._schema = pa.schema([(column, kind) for column, (kind, _) in zip(header.columns, kinds)])
+        self._writer = pq.ParquetWriter(out, self._schema, compression="zstd")
+
+    def write(self, rows):
+        arrays = []
+        for i, (kind, convert) in enumerate(self._kinds):
+            values = [row[i] for row in rows]
+            if convert is not None:
+                values = [convert(value) for value in values]
+            arrays.append(self._pa.array(values, type=kind))
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class XlsxWriter:
+    """
+    XLSX through xlsxwriter's constant_memory mode, which flushes each row to disk once written.
+
+    A table longer than one Excel sheet continues on `<table>_2`, `<table>_3`, ...
+    """
+
+    suffix = ".xlsx"
+    mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    requires = "xlsxwriter"
+    max_rows = 1_048_576
+
+    def __init__(self, out, header, name):
+        import xlsxwriter
+
+        self._book = xlsxwriter.Workbook(out, {
+            "constant_memory": True,
+            "default_date_format": "yyyy-mm-dd",
+            "strings_to_numbers": False,
+            "strings_to_formulas": False,
+        })
+        self._bold = self._book.add_format({"bold": True})
+        self._columns = header.columns
+        # Excel caps sheet names at 31 characters; leave room for the _N suffix
+        self._sheet_name = name[:28]
+        self._sheets = 0
+        self._new_sheet()
+
+    def _new_sheet(self):
+        self._sheets += 1
+        name = self._sheet_name if self._sheets == 1 else f"{self._sheet_name}_{self._sheets}"
+        self._sheet = self._book.add_worksheet(name)
+        self._sheet.write_row(0, 0, self._columns, self._bold)
+        self._row = 1
+
+    def write(self, rows):
+        for row in rows:
+            if self._row == self.max_rows:
+                self._new_sheet()
+            self._sheet.write_row(self._row, 0, [_text(value) if isinstance(value, bytes) else value for value in row])
+            self._row += 1
+
+    def close(self):
+        self._book.close()
+
+
+EXPORT_FORMATS = {"CSV": CsvWriter, "Parquet": ParquetWriter, "Excel (XLSX)": XlsxWriter}
+
+
+def available_formats():
+    """Labels of EXPORT_FORMATS whose library is installed."""
+    return [label for label, writer in EXPORT_FORMATS.items()
+            if writer.requires is None or importlib.util.find_spec(writer.requires) is not None]
+
+
+# ------------------ Delta Watermarks ------------------
+CREATE_WATERMARK_TABLE = """
+    CREATE TABLE IF NOT EXISTS export_watermarks (
+        table_name VARCHAR(64) NOT NULL PRIMARY KEY,
+        last_key BIGINT NOT NULL DEFAULT 0,
+        rows_exported BIGINT NOT NULL DEFAULT 0,
+        exported_at DATETIME NULL,
+        gap_keys TEXT NULL
+    )
+"""
+# For tables created by migration 7, before gap_keys existed
+ADD_WATERMARK_GAPS = "ALTER TABLE export_watermarks ADD COLUMN gap_keys TEXT NULL"
+
+# A watermark never moves back, so an older export delivered late cannot re-open a range; its gaps
+# are only taken along with its watermark (assignments run in order, so gap_keys is compared first)
+SAVE_WATERMARK_SQL = """
+    INSERT INTO export_watermarks (table_name, last_key, rows_exported, exported_at, gap_keys)
+    VALUES (%s, %s, %s, NOW(), %s)
+    ON DUPLICATE KEY UPDATE
+        gap_keys = IF(VALUES(last_key) >= last_key, VALUES(gap_keys), gap_keys),
+        last_key = GREATEST(last_key, VALUES(last_key)),
+        rows_exported = rows_exported + VALUES(rows_exported),
+        exported_at = VALUES(exported_at)
+"""
+
+
+def load_watermarks(con=None):
+    """{table: (last exported key, rows exported so far, time of the last delta export, gap keys)}."""
+    result = run_query(
+        "SELECT table_name, last_key, rows_exported, exported_at, gap_keys FROM export_watermarks", con=con)
+    return {row[0]: (*row[1:4], tuple(int(key) for key in (row[4] or "").split(",") if key))
+            for row in result.rows}
+
+
+def save_watermarks(watermarks, con=None):
+    """Persist {table: (new watermark, rows exported, gap keys)} from an ExportResult once its file was delivered."""
+    if not watermarks:
+        return
+    if con is None:
+        with get_connection() as pooled:
+            return save_watermarks(watermarks, pooled)
+    cur = con.cursor()
+    cur.executemany(SAVE_WATERMARK_SQL, [(table, key, rows, ",".join(map(str, gaps)) or None)
+                                         for table, (key, rows, gaps) in watermarks.items()])
+    con.commit()
+    logging.info(f"Export watermarks advanced: {watermarks}")
+
+
+@dataclass(frozen=True)
+class DeltaWindow:
+    """
+    The rows one delta export takes from a table.
+
+    Args:
+        after (int): Saved watermark; rows with larger keys are exported.
+        upto (int): MAX(key) when the export started, and the new watermark.
+        gaps (tuple): Keys at or below `after` that had no row when earlier exports ran; exported now if
+            their row has been committed since.
+    """
+
+    after: int
+    upto: int
+    gaps: tuple = ()
+
+    @property
+    def params(self):
+        return (self.after, self.upto, *self.gaps)
+
+    def tracks(self, key):
+        """Whether `key` is close enough to the new watermark that a missing row there becomes a gap."""
+        return key > self.upto - EXPORT_DELTA_OVERLAP
+
+    def open_gaps(self, exported):
+        """Keys within EXPORT_DELTA_OVERLAP of `upto` still without a row after exporting the keys in `exported`."""
+        start = max(self.after, self.upto - EXPORT_DELTA_OVERLAP)
+        candidates = set(self.gaps).union(range(start + 1, self.upto + 1))
+        return tuple(sorted(key for key in candidates - exported if self.tracks(key)))
+
+
+def delta_windows(specs, con):
+    """
+    {table: DeltaWindow}: from the saved watermark to the current MAX(key), plus the saved gaps.
+
+    Fixing the upper end first keeps rows inserted during the export for the next run.
+    """
+    saved = load_watermarks(con)
+    windows = {}
+    for spec in specs:
+        if spec.key is None:
+            raise ValueError(f"{spec.table} has no watermark key and can only be exported in full.")
+        after, _, _, gaps = saved.get(spec.table, (0, 0, None, ()))
+        upto = run_query(f"SELECT MAX({spec.key}) FROM {spec.table}", con=con).rows[0][0]
+        windows[spec.table] = DeltaWindow(after, max(after, upto or 0), gaps)
+    return windows
+
+
+# ------------------ Export ------------------
+@dataclass
+class ExportResult:
+    """
+    A finished export.
+
+    Args:
+        file: Anonymous temporary file rewound to the start; close it when done with it.
+        file_name (str): Download file name.
+        mime (str): MIME type of the file.
+        counts (dict): Rows written per table.
+        watermarks (dict): For delta exports, {table: (new watermark, rows, gap keys)}. Not saved yet:
+            pass it to save_watermarks() once the file has been delivered.
+    """
+
+    file: object
+    file_name: str
+    mime: str
+    counts: dict
+    watermarks: dict = field(default_factory=dict)
+
+    @property
+    def rows(self):
+        return sum(self.counts.values())
+
+    def read(self):
+        """
+        The whole file as bytes, and close it. st.download_button needs bytes (or a BytesIO/BufferedReader):
+        it rejects the temporary file itself, a BufferedRandom.
+        """
+        with self.file:
+            self.file.seek(0)
+            return self.file.read()
+
+
+def write_export(out, spec, writer_class, progress=None, chunk_size=EXPORT_CHUNK_ROWS, con=None, window=None,
+                 found=None):
+    """
+    Stream `spec`'s rows into the binary file `out`, only those of the DeltaWindow `window` if given;
+    returns the row count.
+
+    `progress(rows_done)` is called after every chunk. With a window, the exported keys it tracks are
+    added to the set `found`.
+    """
+    if window is None:
+        rows = stream_rows(spec.query, spec.params, chunk_size, con)
+    else:
+        rows = stream_rows(spec.delta_query(len(window.gaps)), window.params, chunk_size, con)
+    try:
+        header = next(rows)
+        writer = writer_class(out, header, spec.table)
+        key_index = list(header.columns).index(spec.key) if window is not None and found is not None else None
+        rows_done = 0
+        try:
+            for chunk in rows:
+                writer.write(chunk)
+                if key_index is not None:
+                    found.update(row[key_index] for row in chunk if window.tracks(row[key_index]))
+                rows_done += len(chunk)
+                if progress:
+                    progress(rows_done)
+        finally:
+            writer.close()
+        return rows_done
+    finally:
+        rows.close()
+
+
+def _export_file(spec, writer_class, progress, chunk_size, con, window):
+    """(temporary file rewound to the start, file name, row count, open gaps or None) for one table."""
+    out = tempfile.TemporaryFile()
+    found = set()
+    try:
+        report = (lambda done: progress(spec.table, done)) if progress else None
+        rows = write_export(out, spec, writer_class, report, chunk_size, con, window, found)
+    except Exception:
+        out.close()
+        raise
+    out.seek(0)
+    if window is None:
+        return out, spec.table + writer_class.suffix, rows, None
+    name = f"{spec.table}_delta_{window.after}-{window.upto}"
+    return out, name + writer_class.suffix, rows, window.open_gaps(found)
+
+
+def run_export(specs, fmt, progress=None, chunk_size=EXPORT_CHUNK_ROWS, delta=False):
+    """
+    Export `specs` in format `fmt` (a key of EXPORT_FORMATS) and return an ExportResult: one file for a
+    single table, else a ZIP with one file per table, each streamed through its own temporary file.
+
+    With `delta`, only rows added since each table's saved watermark (and rows that filled one of its
+    gaps) are exported. `progress(table,
+    rows_done)` is called after every chunk.
+    """
+    writer_class = EXPORT_FORMATS[fmt]
+    with get_connection() as con:
+        windows = delta_windows(specs, con) if delta else {}
+        gaps = {}
+        if len(specs) == 1:
+            spec = specs[0]
+            out, name, rows, gaps[spec.table] = _export_file(
+                spec, writer_class, progress, chunk_size, con, windows.get(spec.table))
+            counts, mime = {spec.table: rows}, writer_class.mime
+        else:
+            out, counts = tempfile.TemporaryFile(), {}
+            try:
+                with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+                    for spec in specs:
+                        table_file, table_name, counts[spec.table], gaps[spec.table] = _export_file(
+                            spec, writer_class, progress, chunk_size, con, windows.get(spec.table))
+                        with table_file, archive.open(table_name, "w", force_zip64=True) as member:
+                            shutil.copyfileobj(table_file, member)
+            except Exception:
+                out.close()
+                raise
+            out.seek(0)
+            name = "hospital_delta_export.zip" if delta else "hospital_export.zip"
+            mime = "application/zip"
+    watermarks = {table: (window.upto, counts[table], gaps[table]) for table, window in windows.items()}
+    return ExportResult(out, name, mime, counts, watermarks)
+
+
+def export_to_directory(specs, fmt, directory, delta=False):
+    """
+    Write one file per table into `directory`, as the nightly warehouse export does.
+
+    Each file is renamed into place before its watermark is saved, so a run that fails part-way exports
+    the same rows again next time instead of skipping them. Returns {path: row count}.
+    """
+    written = {}
+    for spec in specs:
+        result = run_export([spec], fmt, delta=delta)
+        path = os.path.join(directory, result.file_name)
+        partial = tempfile.NamedTemporaryFile(dir=directory, suffix=".partial", delete=False)
+        try:
+            with result.file, partial:
+                shutil.copyfileobj(result.file, partial)
+            os.replace(partial.name, path)
+        except Exception:
+            if os.path.exists(partial.name):
+                os.unlink(partial.name)
+            raise
+        save_watermarks(result.watermarks)
+        written[path] = result.rows
+    return written
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    by_table = {spec.table: spec for spec in EXPORTS.values()}
+    parser = argparse.ArgumentParser(description="Export tables to files, in full or only the rows added "
+                                                 "since the last delta export.")
+    parser.add_argument("tables", nargs="*", metavar="table",
+                        help=f"tables to export, of {', '.join(by_table)} (default: all, or all with a "
+                             f"watermark key for --delta)")
+    parser.add_argument("--delta", action="store_true", help="export only rows added since the last delta export")
+    parser.add_argument("--format", choices=available_formats(), default="CSV")
+    parser.add_argument("--out", default=".", help="directory to write the files to")
+    args = parser.parse_args()
+    unknown = [table for table in args.tables if table not in by_table]
+    if unknown:
+        parser.error(f"unknown table(s): {', '.join(unknown)}")
+
+    specs = [by_table[table] for table in args.tables] or [
+        spec for spec in by_table.values() if spec.key or not args.delta]
+    for path, rows in export_to_directory(specs, args.format, args.out, args.delta).items():
+        print(f"{path}: {rows} rows")
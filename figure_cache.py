@@ -0,0 +1,80 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+
+# ------------------ Data Fingerprints ------------------
+def data_hash(data):
+    """
+    Stable digest of a chart's input: a DataFrame (values, index, column names and dtypes) or any
+    other value with a deterministic repr, such as a tuple of KPI numbers.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(data, pd.DataFrame):
+        digest.update(repr((list(data.columns), [str(dtype) for dtype in data.dtypes])).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    else:
+        digest.update(repr(data).encode())
+    return digest.hexdigest()
+
+
+# ------------------ Figure Cache ------------------
+class FigureCache:
+    """
+    Thread-safe LRU cache of built Plotly figures, shared by every session of the process.
+
+    Entries are keyed on the chart id plus data_hash() of the chart's input, so a chart is rebuilt only
+    when its data actually changes, no matter which session, rerun or write made it reload. Figures are
+    shared between sessions and must be treated as read-only once cached.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "build_seconds": 0.0, "saved_seconds": 0.0}
+
+    def get_or_build(self, chart_id, data, build):
+        """
+        The cached figure of `chart_id` for `data`, or `build()`'s result, which is cached unless it is
+        None (charts return None after showing an empty-data or error message, which must show again).
+        """
+        key = (chart_id, data_hash(data))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["saved_seconds"] += entry[1]
+                return entry[0]
+            self.stats["misses"] += 1
+
+        started = time.perf_counter()
+        fig = build()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.stats["build_seconds"] += elapsed
+            if fig is not None:
+                self._entries[key] = (fig, elapsed)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats["evictions"] += 1
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def status(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, entries=len(self._entries),
+                        hit_rate=(self.stats["hits"] / lookups) if lookups else 0.0)
+
+
+figure_cache = FigureCache(max_entries=int(os.getenv("FIGURE_CACHE_SIZE", "128")))
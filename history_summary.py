@@ -0,0 +1,140 @@
+"""
+Materialized patient history: one pre-aggregated patient_history_summary row per patient.
+
+Write paths that change a patient's bills, rooms, discharges or emergency admissions call
+refresh_patient_history() inside their own transaction, so the summary commits together with the
+change. A full rebuild (e.g. after editing data by hand) is:
+
+    python history_summary.py
+"""
+import logging
+
+from database import get_connection
+
+# ------------------ Summary Table ------------------
+CREATE_SUMMARY_TABLE = """
+    CREATE TABLE IF NOT EXISTS patient_history_summary (
+        patient_id INT PRIMARY KEY,
+        patient_name VARCHAR(100) NOT NULL,
+        dob DATE NULL,
+        contact_no VARCHAR(15) NULL,
+        consultant_name VARCHAR(100) NULL,
+        gender VARCHAR(1) NULL,
+        department VARCHAR(100) NULL,
+        diseases VARCHAR(255) NULL,
+        fees DECIMAL(10,2) NULL,
+        medicine VARCHAR(255) NULL,
+        quantity INT NULL,
+        bill_numbers TEXT NULL,
+        bill_amounts TEXT NULL,
+        room_numbers TEXT NULL,
+        room_types TEXT NULL,
+        discharge_dates TEXT NULL,
+        discharge_reasons TEXT NULL,
+        emergency_admission_dates TEXT NULL,
+        emergency_blood_types TEXT NULL,
+        assigned_doctors TEXT NULL,
+        refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )
+"""
+
+_SUMMARY_COLUMNS = [
+    "patient_id", "patient_name", "dob", "contact_no", "consultant_name", "gender", "department", "diseases",
+    "fees", "medicine", "quantity", "bill_numbers", "bill_amounts", "room_numbers", "room_types",
+    "discharge_dates", "discharge_reasons", "emergency_admission_dates", "emergency_blood_types",
+    "assigned_doctors",
+]
+
+# Same values as the old six-way LEFT JOIN + GROUP BY, but each child table is aggregated in its own
+# correlated subquery (answered from its patient_id index) so bills never multiply discharges.
+# The join keys are kept as they were: emergency_patients by ep.id = p.id, doctors by staff_id = consultant_name.
+REFRESH_SQL = f"""
+    INSERT INTO patient_history_summary ({", ".join(_SUMMARY_COLUMNS)})
+    SELECT
+        p.id, p.name, p.dob, p.contact_no, p.consultant_name, p.gender, p.department, p.diseases,
+        p.fees, p.medicine, p.quantity,
+        (SELECT GROUP_CONCAT(DISTINCT b.bill_no) FROM bill_details b WHERE b.patient_id = p.id),
+        (SELECT GROUP_CONCAT(DISTINCT b.total_amount) FROM bill_details b WHERE b.patient_id = p.id),
+        (SELECT GROUP_CONCAT(DISTINCT r.room_number) FROM rooms r WHERE r.patient_id = p.id),
+        (SELECT GROUP_CONCAT(DISTINCT r.room_type) FROM rooms r WHERE r.patient_id = p.id),
+        (SELECT GROUP_CONCAT(DISTINCT d.discharge_date) FROM discharged_patients d WHERE d.patient_id = p.id),
+        (SELECT GROUP_CONCAT(DISTINCT d.discharge_reason) FROM discharged_patients d WHERE d.patient_id = p.id),
+        (SELECT GROUP_CONCAT(DISTINCT ep.admission_date) FROM emergency_patients ep WHERE ep.id = p.id),
+        (SELECT GROUP_CONCAT(DISTINCT ep.blood_type) FROM emergency_patients ep WHERE ep.id = p.id),
+        (SELECT GROUP_CONCAT(DISTINCT s.staff_name)
+         FROM doctor doc JOIN staff s ON doc.staff_id = s.id
+         WHERE doc.staff_id = p.consultant_name)
+    FROM patients p
+    WHERE {{condition}}
+    ON DUPLICATE KEY UPDATE
+        {", ".join(f"{column} = VALUES({column})" for column in _SUMMARY_COLUMNS[1:])}
+"""
+
+# Read by view_patient_history: a primary-key ordered scan of one narrow table
+HISTORY_QUERY = """
+    SELECT
+        patient_id AS 'Patient ID',
+        patient_name AS 'Patient Name',
+        dob AS 'Date of Birth',
+        contact_no AS 'Contact No',
+        consultant_name AS 'Consultant',
+        gender AS 'Gender',
+        department AS 'Department',
+        diseases AS 'Disease',
+        fees AS 'Fees',
+        medicine AS 'Medicine',
+        quantity AS 'Quantity',
+        bill_numbers AS 'Bill Numbers',
+        bill_amounts AS 'Bill Amounts',
+        room_numbers AS 'Room Numbers',
+        room_types AS 'Room Types',
+        discharge_dates AS 'Discharge Dates',
+        discharge_reasons AS 'Discharge Reasons',
+        emergency_admission_dates AS 'Emergency Admission Dates',
+        emergency_blood_types AS 'Emergency Blood Types',
+        assigned_doctors AS 'Assigned Doctors'
+    FROM patient_history_summary
+    ORDER BY patient_id
+"""
+
+
+def refresh_patients_where(con, condition, params=()):
+    """Recompute the summary rows of patients matching `condition` (SQL over alias p). Does not commit."""
+    cur = con.cursor()
+    cur.execute(REFRESH_SQL.format(condition=condition), params)
+    return cur.rowcount
+
+
+def refresh_patient_history(con, patient_ids):
+    """
+    Recompute the summary rows of `patient_ids` on `con`, inside the caller's transaction.
+
+    IDs without a patients row are ignored. Returns the affected row count (0 if there was nothing to do).
+    """
+    ids = sorted({int(patient_id) for patient_id in patient_ids if patient_id is not None})
+    if not ids:
+        return 0
+    placeholders = ", ".join(["%s"] * len(ids))
+    return refresh_patients_where(con, f"p.id IN ({placeholders})", tuple(ids))
+
+
+def rebuild_patient_history(con=None):
+    """Recompute every summary row and drop rows of patients that no longer exist."""
+    if con is None:
+        with get_connection() as pooled:
+            return rebuild_patient_history(pooled)
+
+    cur = con.cursor()
+    cur.execute(CREATE_SUMMARY_TABLE)
+    refreshed = refresh_patients_where(con, "TRUE")
+    cur.execute(
+        "DELETE s FROM patient_history_summary s LEFT JOIN patients p ON s.patient_id = p.id WHERE p.id IS NULL"
+    )
+    con.commit()
+    logging.info(f"Rebuilt patient_history_summary ({refreshed} rows affected, {cur.rowcount} orphans removed).")
+    return refreshed
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    print(f"Rebuilt patient history summary ({rebuild_patient_history()} rows affected).")
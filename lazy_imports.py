@@ -0,0 +1,32 @@
+import importlib.util
+import sys
+import threading
+
+# ------------------ Lazy Module Loading ------------------
+_lock = threading.Lock()
+
+
+def lazy_import(name):
+    """
+    Return module `name`, deferring its execution until one of its attributes is first used.
+
+    Meant for heavy libraries only some pages need (plotly for charts, fpdf for reports): the module
+    object is registered in sys.modules right away, so later imports anywhere get the same object, but
+    its code only runs on first attribute access. Parent packages of a dotted name are imported
+    normally. Already-imported modules are returned as they are.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        module = sys.modules.get(name)
+        if module is None:
+            spec = importlib.util.find_spec(name)
+            if spec is None:
+                raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+            loader = importlib.util.LazyLoader(spec.loader)
+            spec.loader = loader
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[name] = module
+            loader.exec_module(module)
+    return module
@@ -0,0 +1,256 @@
+"""
+Versioned schema migrations for the HospitalManagement database.
+
+Applied by hand, after reviewing them, before the app is (re)started; the app itself only checks that
+none are pending (see bootstrap.ensure_bootstrapped) and refuses to run against an older schema:
+
+    python migrations.py            # apply pending migrations
+    python migrations.py --explain  # apply and print before/after EXPLAIN plans of the hot queries
+"""
+import logging
+import sys
+
+import mysql.connector as sq
+
+from database import get_connection
+from exporters import ADD_WATERMARK_GAPS, CREATE_WATERMARK_TABLE
+from history_summary import CREATE_SUMMARY_TABLE, REFRESH_SQL
+from rollups import CREATE_ROLLUP_TABLE, ROLLUPS, rebuild_sql
+
+# ------------------ Migrations ------------------
+# (version, description, statements). Never edit an applied migration; append a new one instead.
+MIGRATIONS = [
+    (1, "Hot-path indexes and one attendance row per user per day", [
+        # Keep the earliest row of any duplicate (username, attendance_date) pair so the unique key can be built
+        """
+        DELETE a1 FROM attendance a1
+        JOIN attendance a2
+          ON a1.username = a2.username AND a1.attendance_date = a2.attendance_date AND a1.id > a2.id
+        """,
+        "ALTER TABLE attendance ADD UNIQUE KEY uq_attendance_user_date (username, attendance_date)",
+        "CREATE INDEX idx_appointments_date_doctor ON appointments (appointment_date, doctor_name)",
+        "CREATE INDEX idx_appointments_doctor_date ON appointments (doctor_name, appointment_date)",
+        "CREATE INDEX idx_bill_details_date_amount ON bill_details (bill_date, total_amount)",
+        "CREATE INDEX idx_rooms_icu_availability ON rooms (is_icu, availability)",
+    ]),
+    (2, "Date indexes for range-predicate dashboard and analytics metrics", [
+        "CREATE INDEX idx_patients_consultancy_date ON patients (date_of_consultancy)",
+        "CREATE INDEX idx_attendance_date ON attendance (attendance_date)",
+    ]),
+    (3, "Patient search by name prefix and department filter", [
+        "CREATE INDEX idx_patients_name ON patients (name)",
+        "CREATE INDEX idx_patients_department ON patients (department)",
+    ]),
+    (4, "Materialized patient_history_summary, backfilled from the current data", [
+        # Child-table lookups used by the per-patient refresh (history_summary.REFRESH_SQL)
+        "CREATE INDEX idx_bill_details_patient ON bill_details (patient_id)",
+        "CREATE INDEX idx_rooms_patient ON rooms (patient_id)",
+        "CREATE INDEX idx_discharged_patients_patient ON discharged_patients (patient_id)",
+        "CREATE INDEX idx_doctor_staff ON doctor (staff_id)",
+        CREATE_SUMMARY_TABLE,
+        REFRESH_SQL.format(condition="TRUE"),
+    ]),
+    (5, "FULLTEXT and prefix/exact lookup indexes for advanced search (search.py)", [
+        "ALTER TABLE patients ADD FULLTEXT INDEX ft_patients_search (name, medicine, diseases)",
+        "ALTER TABLE staff ADD FULLTEXT INDEX ft_staff_name (staff_name)",
+        "ALTER TABLE doctor ADD FULLTEXT INDEX ft_doctor_department (department)",
+        "ALTER TABLE appointments ADD FULLTEXT INDEX ft_appointments_names (patient_name, doctor_name)",
+        "ALTER TABLE bill_details ADD FULLTEXT INDEX ft_bill_details_name (name)",
+        "ALTER TABLE inventory ADD FULLTEXT INDEX ft_inventory_item_name (item_name)",
+        "ALTER TABLE emergency_patients ADD FULLTEXT INDEX ft_emergency_patients_name (name)",
+        "ALTER TABLE ambulance_service ADD FULLTEXT INDEX ft_ambulance_service_patient (patient_name)",
+        "ALTER TABLE discharged_patients ADD FULLTEXT INDEX ft_discharged_patients_name (patient_name)",
+        "CREATE INDEX idx_staff_name ON staff (staff_name)",
+        "CREATE INDEX idx_doctor_department ON doctor (department)",
+        "CREATE INDEX idx_appointments_patient_name ON appointments (patient_name)",
+        "CREATE INDEX idx_bill_details_name ON bill_details (name)",
+        "CREATE INDEX idx_inventory_item_name ON inventory (item_name)",
+        "CREATE INDEX idx_emergency_patients_name ON emergency_patients (name)",
+        "CREATE INDEX idx_emergency_patients_contact ON emergency_patients (contact_no)",
+        "CREATE INDEX idx_ambulance_service_patient ON ambulance_service (patient_name)",
+        "CREATE INDEX idx_discharged_patients_name ON discharged_patients (patient_name)",
+        "CREATE INDEX idx_discharged_patients_room ON discharged_patients (room_number)",
+    ]),
+    (6, "Daily rollups for the time-series charts (rollups.py), backfilled from the current data", [
+        # Day-range scans of the nightly compaction (bill_details, patients and appointments are already covered)
+        "CREATE INDEX idx_discharged_patients_date ON discharged_patients (discharge_date)",
+        "CREATE INDEX idx_emergency_patients_admission ON emergency_patients (admission_date)",
+        CREATE_ROLLUP_TABLE,
+        *(rebuild_sql(metric, "TRUE") for metric in ROLLUPS),
+    ]),
+    (7, "Delta export watermarks (exporters.py)", [
+        CREATE_WATERMARK_TABLE,
+    ]),
+    (8, "Gap keys of delta exports, re-checked for rows committed late (exporters.py)", [
+        ADD_WATERMARK_GAPS,
+    ]),
+]
+
+# MySQL error codes that mean a statement's effect is already in place (re-run after a partial failure)
+_ALREADY_APPLIED = {
+    1060,  # ER_DUP_FIELDNAME
+    1061,  # ER_DUP_KEYNAME
+    1050,  # ER_TABLE_EXISTS_ERROR
+}
+
+_NO_SUCH_TABLE = 1146  # ER_NO_SUCH_TABLE: schema_migrations before the first migration run
+
+# Queries whose plans the migrations are meant to improve
+EXPLAIN_QUERIES = {
+    "mark_attendance": (
+        "SELECT id FROM attendance WHERE username = %s AND attendance_date = CURDATE()", ("admin",)),
+    "appointments_by_date": (
+        "SELECT * FROM appointments WHERE appointment_date = CURDATE() ORDER BY doctor_name", None),
+    "appointments_by_doctor": (
+        "SELECT * FROM appointments WHERE doctor_name = %s ORDER BY appointment_date", ("Dr. Smith",)),
+    "monthly_revenue": (
+        "SELECT SUM(total_amount) FROM bill_details WHERE bill_date >= %s AND bill_date < %s",
+        ("2025-03-01", "2025-04-01")),
+    "admissions_today": (
+        "SELECT COUNT(*) FROM patients WHERE date_of_consultancy >= %s AND date_of_consultancy < %s",
+        ("2025-03-09", "2025-03-10")),
+    "attendance_last_7_days": (
+        "SELECT username, role, attendance_date FROM attendance WHERE attendance_date >= %s AND attendance_date < %s",
+        ("2025-03-02", "2025-03-10")),
+    "patient_search_by_name": (
+        "SELECT id, name FROM patients WHERE name LIKE %s ORDER BY id LIMIT 51", ("Ra%",)),
+    "patients_by_department": (
+        "SELECT id, name FROM patients WHERE department = %s ORDER BY id LIMIT 51", ("Cardiology",)),
+    "patient_departments": (
+        "SELECT DISTINCT department FROM patients ORDER BY department", None),
+    "patient_history": (
+        "SELECT * FROM patient_history_summary ORDER BY patient_id", None),
+    "search_patients_fulltext": (
+        "SELECT id, name FROM patients WHERE MATCH (name, medicine, diseases) AGAINST (%s IN BOOLEAN MODE) LIMIT 100",
+        ("+ravi*",)),
+    "search_bills_prefix": (
+        "SELECT bill_no, name FROM bill_details WHERE name LIKE %s ORDER BY bill_no LIMIT 100", ("Ra%",)),
+    "revenue_trend": (
+        "SELECT DATE_FORMAT(day, '%Y-%m') AS month, SUM(amount) FROM daily_rollups "
+        "WHERE metric = 'revenue' GROUP BY month", None),
+    "delta_export_patients": (
+        "SELECT * FROM patients WHERE id > %s AND id <= %s ORDER BY id", (1000, 2000)),
+    "icu_availability": (
+        "SELECT COUNT(*) FROM rooms WHERE is_icu = TRUE AND availability = 'Not Booked'", None),
+}
+
+
+def _ensure_version_table(cur):
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def applied_versions(con):
+    cur = con.cursor()
+    _ensure_version_table(cur)
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cur.fetchall()}
+
+
+def pending_migrations(con):
+    done = applied_versions(con)
+    return [migration for migration in MIGRATIONS if migration[0] not in done]
+
+
+def pending_versions(con=None):
+    """Versions of MIGRATIONS not applied yet. Read-only, unlike pending_migrations(): the app calls it at startup."""
+    if con is None:
+        with get_connection() as pooled:
+            return pending_versions(pooled)
+
+    cur = con.cursor()
+    try:
+        cur.execute("SELECT version FROM schema_migrations")
+    except sq.Error as er:
+        if er.errno != _NO_SUCH_TABLE:
+            raise
+        return [migration[0] for migration in MIGRATIONS]
+    done = {row[0] for row in cur.fetchall()}
+    return [migration[0] for migration in MIGRATIONS if migration[0] not in done]
+
+
+def apply_migrations(con=None):
+    """Apply every pending migration in version order. Returns the list of versions applied."""
+    if con is None:
+        with get_connection() as pooled:
+            return apply_migrations(pooled)
+
+    applied = []
+    for version, description, statements in pending_migrations(con):
+        cur = con.cursor()
+        for statement in statements:
+            try:
+                cur.execute(statement)
+            except sq.Error as er:
+                if er.errno not in _ALREADY_APPLIED:
+                    logging.error(f"Migration {version} failed: {er}")
+                    raise
+                logging.warning(f"Migration {version}: skipping already-applied statement ({er.msg})")
+        cur.execute(
+            "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+            (version, description)
+        )
+        con.commit()
+        applied.append(version)
+        logging.info(f"Applied migration {version}: {description}")
+    return applied
+
+
+# ------------------ EXPLAIN Report ------------------
+def explain(con, query, params=None):
+    """Return the EXPLAIN rows of `query` as a list of dicts."""
+    cur = con.cursor(dictionary=True)
+    cur.execute(f"EXPLAIN {query}", params)
+    return cur.fetchall()
+
+
+def explain_all(con):
+    plans = {}
+    for name, (query, params) in EXPLAIN_QUERIES.items():
+        try:
+            plans[name] = explain(con, query, params)
+        except sq.Error as er:
+            # e.g. a table that a pending migration has not created yet
+            logging.warning(f"EXPLAIN {name} failed: {er.msg}")
+            plans[name] = []
+    return plans
+
+
+def format_plan(rows):
+    if not rows:
+        return "n/a"
+    return "; ".join(
+        f"{row.get('table')}: type={row.get('type')} key={row.get('key') or '-'} rows={row.get('rows')}"
+        for row in rows
+    )
+
+
+def migrate_with_report(con=None):
+    """Apply pending migrations and return (applied versions, {query: (plan before, plan after)})."""
+    if con is None:
+        with get_connection() as pooled:
+            return migrate_with_report(pooled)
+
+    before = explain_all(con)
+    applied = apply_migrations(con)
+    after = explain_all(con)
+    return applied, {name: (before[name], after[name]) for name in EXPLAIN_QUERIES}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if "--explain" in sys.argv:
+        versions, report = migrate_with_report()
+        print(f"Applied migrations: {versions or 'none pending'}")
+        for name, (plan_before, plan_after) in report.items():
+            print(f"\n{name}\n  before: {format_plan(plan_before)}\n  after:  {format_plan(plan_after)}")
+    else:
+        versions = apply_migrations()
+        print(f"Applied migrations: {versions or 'none pending'}")
@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+
+import pandas as pd
+
+# ------------------ Keyset Pagination ------------------
+PAGE_SORT_COLUMN = "page_sort_value"
+PAGE_KEY_COLUMN = "page_key_value"
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """
+    Describes a record table that can be paged on the server.
+
+    Args:
+        name (str): Main table, used for logging.
+        select_list (str): SELECT list with display aliases.
+        from_clause (str): FROM clause including any JOINs.
+        key (str or tuple): Non-null expression(s) that together are unique per row and break ties between
+            equal sort values: usually the primary key, plus the joined table's key when a JOIN can repeat it.
+        sort_columns (tuple): (label, expression) pairs; the first is the default sort. Nullable expressions
+            are fine: NULLs are kept where MySQL sorts them (first ascending, last descending).
+        filter_columns (tuple): (label, expression) pairs offered for prefix filtering.
+        where (str): Fixed condition applied to every page.
+    """
+
+    name: str
+    select_list: str
+    from_clause: str
+    key: object
+    sort_columns: tuple
+    filter_columns: tuple = ()
+    where: str = ""
+
+    @property
+    def keys(self):
+        return (self.key,) if isinstance(self.key, str) else tuple(self.key)
+
+    def sort_expression(self, label):
+        return dict(self.sort_columns).get(label, self.sort_columns[0][1])
+
+
+def prefix_pattern(term):
+    """LIKE pattern matching values that start with `term`, with wildcards in `term` escaped."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+def _after_keys(keys, values, op):
+    """Condition for rows after `values` in (keys) order, as equality-prefix terms the optimizer can range-scan."""
+    terms, params = [], []
+    for i, key in enumerate(keys):
+        terms.append("(" + " AND ".join([f"{k} = %s" for k in keys[:i]] + [f"{key} {op} %s"]) + ")")
+        params.extend(values[:i + 1])
+    return "(" + " OR ".join(terms) + ")", params
+
+
+def _conditions(spec, filters, extra_where):
+    conditions, params = [], []
+    if spec.where:
+        conditions.append(f"({spec.where})")
+    filter_expressions = dict(spec.filter_columns)
+    for label, term in (filters or {}).items():
+        if term and label in filter_expressions:
+            conditions.append(f"{filter_expressions[label]} LIKE %s")
+            params.append(prefix_pattern(term))
+    if extra_where and extra_where[0]:
+        conditions.append(f"({extra_where[0]})")
+        params.extend(extra_where[1])
+    return conditions, params
+
+
+def _order_by(spec, sort_expr, descending):
+    direction = "DESC" if descending else "ASC"
+    expressions = [sort_expr] + [key for key in spec.keys if key != sort_expr]
+    return ", ".join(f"{expression} {direction}" for expression in expressions)
+
+
+def page_query(spec, sort_label=None, descending=False, filters=None, after=None, page_size=50, extra_where=None):
+    """
+    Build (sql, params) for one page of `spec`.
+
+    Rows are ordered by (sort expression, *keys) and `after` is the (sort value, key values) pair of the
+    last row of the previous page, so every page is an index-friendly range read of page_size + 1 rows
+    (the extra row tells whether a next page exists) no matter how deep the user pages. A NULL sort value
+    is compared explicitly, since `x > NULL` is never true.
+    """
+    conditions, params = _conditions(spec, filters, extra_where)
+    keys = spec.keys
+    sort_expr = spec.sort_expression(sort_label)
+    op = "<" if descending else ">"
+    if after is not None:
+        sort_value, key_values = after
+        after_keys, key_params = _after_keys(keys, key_values, op)
+        if sort_expr == keys[0]:
+            conditions.append(after_keys)
+            params.extend(key_params)
+        elif sort_value is None:
+            # MySQL sorts NULLs first ascending and last descending
+            tail = "" if descending else f" OR {sort_expr} IS NOT NULL"
+            conditions.append(f"(({sort_expr} IS NULL AND {after_keys}){tail})")
+            params.extend(key_params)
+        else:
+            tail = f" OR {sort_expr} IS NULL" if descending else ""
+            conditions.append(f"({sort_expr} {op} %s OR ({sort_expr} = %s AND {after_keys}){tail})")
+            params.extend([sort_value, sort_value, *key_params])
+
+    key_columns = "".join(f", {key} AS {PAGE_KEY_COLUMN}_{i}" for i, key in enumerate(keys))
+    sql = f"SELECT {spec.select_list}, {sort_expr} AS {PAGE_SORT_COLUMN}{key_columns} FROM {spec.from_clause}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {_order_by(spec, sort_expr, descending)} LIMIT %s"
+    params.append(page_size + 1)
+    return sql, tuple(params)
+
+
+def table_query(spec, sort_label=None, descending=False, filters=None, extra_where=None):
+    """(sql, params) for every row of `spec` matching the same filters, in page order, e.g. for a full export."""
+    conditions, params = _conditions(spec, filters, extra_where)
+    sql = f"SELECT {spec.select_list} FROM {spec.from_clause}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {_order_by(spec, spec.sort_expression(sort_label), descending)}"
+    return sql, tuple(params)
+
+
+def _native(value):
+    """Convert numpy/pandas scalars (and NaN/NaT for NULL) back to types mysql.connector can bind."""
+    if pd.isna(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value.item() if hasattr(value, "item") else value
+
+
+def split_page(data, page_size):
+    """
+    Split a page_query() result into (visible rows, has_next, cursor for the next page).
+
+    The helper sort/key columns are dropped from the visible rows.
+    """
+    has_next = len(data) > page_size
+    data = data.iloc[:page_size]
+    key_columns = [column for column in data.columns if str(column).startswith(f"{PAGE_KEY_COLUMN}_")]
+    cursor = None
+    if not data.empty and key_columns:
+        last = data.iloc[-1]
+        cursor = (_native(last[PAGE_SORT_COLUMN]), tuple(_native(last[column]) for column in key_columns))
+    visible = data.drop(columns=[PAGE_SORT_COLUMN, *key_columns], errors="ignore").reset_index(drop=True)
+    return visible, has_next, cursor
@@ -0,0 +1,65 @@
+import pandas as pd
+
+# ------------------ Patient History Pipeline ------------------
+# Columns matched by the free-text search, in the order they are concatenated
+SEARCH_COLUMNS = ["Patient ID", "Patient Name", "Medicine", "Quantity", "Assigned Doctors"]
+# GROUP_CONCAT(DISTINCT ...) columns holding comma-separated DATE/TIMESTAMP values
+DATE_LIST_COLUMNS = ["Discharge Dates", "Emergency Admission Dates"]
+# Joins the per-column values of the search text; never typed by a user, so a match cannot span two columns
+_FIELD_SEPARATOR = "\x1f"
+
+
+def format_date_list(series):
+    """
+    Reformat comma-separated date lists ("2025-03-01,2025-03-04 10:22:05") as "2025-03-01, 2025-03-04".
+
+    The lists are exploded into one element per date and parsed in a single to_datetime call, then
+    joined back per row. Missing lists, and lists with no parseable date, become "N/A".
+    """
+    present = series.notna() & series.astype(str).ne("N/A")
+    parts = series[present].astype(str).str.split(",").explode().str.strip()
+    # DATE and TIMESTAMP values both start with YYYY-MM-DD
+    parsed = pd.to_datetime(parts.str[:10], format="%Y-%m-%d", errors="coerce").dropna()
+    dates = parsed.dt.strftime("%Y-%m-%d")
+
+    # Pivot to one column per list position and join column-wise, instead of a Python join per row
+    wide = dates.to_frame("date").set_index(dates.groupby(level=0).cumcount(), append=True)["date"].unstack()
+    formatted = pd.Series("N/A", index=series.index, dtype=object)
+    if wide.empty:
+        return formatted
+    joined = wide[0]
+    for position in wide.columns[1:]:
+        more = wide[position].notna()
+        joined = joined.where(~more, joined + ", " + wide[position])
+    formatted.loc[joined.index] = joined
+    return formatted
+
+
+def build_search_text(df):
+    """Lower-cased concatenation of SEARCH_COLUMNS, one string per row."""
+    columns = [df[column].astype(str) for column in SEARCH_COLUMNS]
+    return columns[0].str.cat(columns[1:], sep=_FIELD_SEPARATOR).str.lower()
+
+
+def prepare_history(df):
+    """
+    Clean the raw patient history query result for display.
+
+    Returns (display frame, search text): dates are formatted as YYYY-MM-DD, missing values shown
+    as "N/A", and the search text is built once so every keystroke is a single str.contains.
+    """
+    df = df.copy()
+    if "Date of Birth" in df.columns:
+        df["Date of Birth"] = pd.to_datetime(df["Date of Birth"], errors="coerce").dt.strftime("%Y-%m-%d")
+    for column in DATE_LIST_COLUMNS:
+        if column in df.columns:
+            df[column] = format_date_list(df[column])
+    df = df.fillna("N/A")
+    return df, build_search_text(df)
+
+
+def filter_history(df, search_text, search_query):
+    """Rows whose ID, name, medicine, quantity or assigned doctors contain `search_query` (case-insensitive)."""
+    if not search_query:
+        return df
+    return df[search_text.str.contains(search_query.lower(), regex=False)]
@@ -0,0 +1,169 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# ------------------ SQL Inspection ------------------
+_TOKEN = re.compile(r"('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|--[^\n]*|#[^\n]*|/\*.*?\*/)", re.S)
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE|TABLE)\s+`?(\w+)`?", re.I)
+_INSERT_TARGET = re.compile(
+    r"\s*(?:INSERT|REPLACE)\b(?:\s+(?:LOW_PRIORITY|DELAYED|HIGH_PRIORITY|IGNORE))*\s+(?:INTO\s+)?`?(\w+)`?", re.I
+)
+_WRITE_VERBS = {"INSERT", "UPDATE", "DELETE", "REPLACE", "TRUNCATE", "ALTER", "DROP", "CREATE", "RENAME"}
+
+
+def _split_sql(sql):
+    """Split SQL into (code, literals): comments are dropped and code is whitespace-collapsed."""
+    code, literals, chunk = [], [], []
+    for i, part in enumerate(_TOKEN.split(sql)):
+        if i % 2 and part[0] in "'\"":
+            code.append(" ".join("".join(chunk).split()))
+            literals.append(part)
+            chunk = []
+        else:
+            chunk.append(part if i % 2 == 0 else " ")
+    code.append(" ".join("".join(chunk).split()))
+    return code, literals
+
+
+def normalize_sql(sql):
+    """Strip comments and collapse whitespace outside string literals so equivalent queries share a cache key."""
+    code, literals = _split_sql(sql)
+    parts = [code[0]]
+    for literal, segment in zip(literals, code[1:]):
+        parts.extend((literal, segment))
+    return " ".join(part for part in parts if part).strip()
+
+
+def tables_in(sql):
+    """Lower-cased names of every table referenced by FROM/JOIN/INTO/UPDATE/TABLE clauses."""
+    code = " ".join(_split_sql(sql)[0])
+    return frozenset(name.lower() for name in _TABLE_REF.findall(code))
+
+
+def written_tables(sql):
+    """
+    Tables a write statement may modify: the target of INSERT/REPLACE (so INSERT ... SELECT does not
+    count its source tables as written), otherwise every referenced table.
+    """
+    code = " ".join(_split_sql(sql)[0])
+    match = _INSERT_TARGET.match(code)
+    if match:
+        return frozenset({match.group(1).lower()})
+    return tables_in(sql)
+
+
+def is_write(sql):
+    words = " ".join(_split_sql(sql)[0]).split(None, 1)
+    return bool(words) and words[0].upper() in _WRITE_VERBS
+
+
+# ------------------ Result Cache ------------------
+class QueryCache:
+    """
+    Thread-safe LRU cache of query results with a TTL, invalidated per table.
+
+    Entries are keyed on normalized SQL plus parameters and remember which tables they read,
+    so a committed write to any of those tables drops exactly the affected entries.
+    """
+
+    def __init__(self, max_entries=256, ttl=60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._by_table = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "expired": 0}
+
+    @staticmethod
+    def make_key(sql, params=None):
+        if isinstance(params, dict):
+            params = tuple(sorted(params.items()))
+        elif params is not None:
+            params = tuple(params)
+        return normalize_sql(sql), repr(params)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            for table in entry[1]:
+                keys = self._by_table.get(table)
+                if keys:
+                    keys.discard(key)
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[2]
+
+    def versions(self, tables):
+        """Snapshot of the invalidation counters for `tables`; pass it back to put()."""
+        with self._lock:
+            return {table: self._versions.get(table, 0) for table in tables}
+
+    def put(self, key, tables, value, versions=None, ttl=None):
+        """
+        Store a result unless one of its tables was written since `versions` was taken,
+        which would mean the value was read before that write became visible.
+        """
+        with self._lock:
+            if versions and any(self._versions.get(t, 0) != v for t, v in versions.items()):
+                return False
+            self._drop(key)
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), tables, value)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+            return True
+
+    def get_or_load(self, sql, params, loader, ttl=None):
+        key = self.make_key(sql, params)
+        value = self.get(key)
+        if value is not None:
+            return value
+        tables = tables_in(sql)
+        versions = self.versions(tables)
+        value = loader()
+        self.put(key, tables, value, versions, ttl)
+        return value
+
+    def invalidate_tables(self, tables):
+        with self._lock:
+            for table in tables:
+                table = table.lower()
+                self._versions[table] = self._versions.get(table, 0) + 1
+                for key in list(self._by_table.pop(table, ())):
+                    if self._drop(key):
+                        self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+
+    def status(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, entries=len(self._entries),
+                        hit_rate=(self.stats["hits"] / lookups) if lookups else 0.0)
+
+
+query_cache = QueryCache(
+    max_entries=int(os.getenv("QUERY_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("QUERY_CACHE_TTL", "60")),
+)
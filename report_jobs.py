@@ -0,0 +1,246 @@
+"""
+Background report jobs.
+
+Generate Reports enqueues a job instead of building the PDF inside the Streamlit run. Jobs run in a
+process pool (PDF layout is CPU-bound and would otherwise hold the GIL the app's threads need), report
+progress back through a queue into a local job table that pages poll, and their artifacts are cached by
+(report type, data version) so every user gets the same PDF until one of the report's tables changes.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+
+from database import run_query
+from query_cache import query_cache, tables_in
+from reports import REPORTS, build_pdf_report
+
+# ------------------ Job Configuration ------------------
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", 2))
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", 16))
+# Artifacts also expire, so writes made outside this process (another server, the mysql client) show up
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", 900))
+REPORT_JOB_HISTORY = 100
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+@dataclass
+class ReportJob:
+    """
+    One entry of the job table.
+
+    Args:
+        id (str): Job id, kept in the session that enqueued it.
+        report_type (str): Key of reports.REPORTS.
+        key (tuple): (report type, data version) the artifact is cached under.
+        status (str): queued, running, done or failed.
+        rows_done (int): Rows laid out so far.
+        total_rows (int): Estimated row count (InnoDB table statistics), None until the job starts or if
+            there is no estimate.
+        data (bytes): The finished PDF.
+        error (str): Failure message.
+    """
+
+    id: str
+    report_type: str
+    key: tuple
+    status: str = QUEUED
+    rows_done: int = 0
+    total_rows: int = None
+    data: bytes = None
+    error: str = None
+    submitted: float = field(default_factory=time.time)
+    finished: float = None
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def progress(self):
+        """Fraction done, for st.progress()."""
+        if self.status == DONE:
+            return 1.0
+        if not self.total_rows:
+            return 0.0
+        return min(self.rows_done / self.total_rows, 1.0)
+
+
+def report_key(report_type):
+    """(report type, data version): the versions of the tables the report reads, see QueryCache.versions()."""
+    tables = tables_in(REPORTS[report_type].query)
+    return report_type, tuple(sorted(query_cache.versions(tables).items()))
+
+
+# ------------------ Worker Process ------------------
+_progress_queue = None
+
+
+def _init_worker(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def estimate_rows(query):
+    """
+    Approximate row count of `query` from information_schema.TABLES (InnoDB's sampled TABLE_ROWS): the
+    largest table it reads. Only sizes the progress bar, without a second pass over the report query.
+    """
+    tables = sorted(tables_in(query))
+    if not tables:
+        return None
+    result = run_query(
+        "SELECT MAX(TABLE_ROWS) FROM information_schema.TABLES "
+        f"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({', '.join(['%s'] * len(tables))})",
+        tables,
+    )
+    return result.rows[0][0] if result.rows else None
+
+
+def _run_report(job_id, report_type):
+    """Build one report in a worker process; returns (pdf bytes, row count)."""
+    spec = REPORTS[report_type]
+    total = estimate_rows(spec.query)
+    _progress_queue.put((job_id, 0, total))
+    buffer, rows = build_pdf_report(spec, progress=lambda done: _progress_queue.put((job_id, done, total)))
+    return buffer.getvalue(), rows
+
+
+# ------------------ Job Table ------------------
+class ReportJobs:
+    """
+    Process-wide job table and artifact cache for background reports.
+
+    The worker processes are started on first submit with the spawn method, so each opens its own
+    connection pool instead of inheriting the app's sockets. Identical requests share one job while it
+    runs, and a finished artifact is only cached if its tables were not written while it was built.
+    """
+
+    def __init__(self, workers=REPORT_WORKERS, cache_size=REPORT_CACHE_SIZE, ttl=REPORT_CACHE_TTL):
+        self.workers = workers
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self._jobs = OrderedDict()
+        self._running = {}
+        self._cache = OrderedDict()
+        self._executor = None
+        self._progress = None
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "reused": 0, "joined": 0, "failed": 0}
+
+    def _pool(self):
+        if self._executor is None:
+            context = multiprocessing.get_context("spawn")
+            # One progress queue and collector thread for the process; a pool rebuilt after
+            # BrokenProcessPool reports through the same ones
+            if self._progress is None:
+                self._progress = context.Queue()
+                threading.Thread(target=self._collect, args=(self._progress,), name="report-progress",
+                                 daemon=True).start()
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                                 initializer=_init_worker, initargs=(self._progress,))
+        return self._executor
+
+    def _collect(self, progress):
+        """Move progress messages from the workers into the job table."""
+        while True:
+            job_id, rows_done, total = progress.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None and job.active:
+                    job.status, job.rows_done, job.total_rows = RUNNING, rows_done, total
+
+    def _cached(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry[1]
+
+    def cached(self, report_type):
+        """The finished job for the current data of `report_type`, or None."""
+        with self._lock:
+            return self._cached(report_key(report_type))
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def submit(self, report_type):
+        """Return the cached or running job for `report_type`'s current data, or enqueue a new one."""
+        key = report_key(report_type)
+        with self._lock:
+            job = self._cached(key)
+            if job is not None:
+                self.stats["reused"] += 1
+                return job
+            job = self._jobs.get(self._running.get(key))
+            if job is not None and job.active:
+                self.stats["joined"] += 1
+                return job
+            job = ReportJob(uuid.uuid4().hex, report_type, key)
+            self._jobs[job.id] = job
+            self._running[key] = job.id
+            self.stats["submitted"] += 1
+            self._prune()
+            executor = self._pool()
+        try:
+            future = executor.submit(_run_report, job.id, report_type)
+        except (BrokenProcessPool, RuntimeError) as er:
+            self._finish(job, error=er)
+            return job
+        future.add_done_callback(lambda done: self._done(job, done))
+        return job
+
+    def _done(self, job, future):
+        try:
+            data, rows = future.result()
+        except Exception as er:
+            self._finish(job, error=er)
+        else:
+            self._finish(job, data=data, rows=rows)
+
+    def _finish(self, job, data=None, rows=0, error=None):
+        with self._lock:
+            job.finished = time.time()
+            if self._running.get(job.key) == job.id:
+                del self._running[job.key]
+            if error is not None:
+                job.status, job.error = FAILED, str(error) or type(error).__name__
+                self.stats["failed"] += 1
+                logging.error(f"Report job {job.report_type} failed: {job.error}")
+                if isinstance(error, BrokenProcessPool):
+                    self._executor = None
+                return
+            job.status, job.data, job.rows_done, job.total_rows = DONE, data, rows, rows
+        # The artifact belongs to the data version it was requested for; skip it if a write landed since
+        if report_key(job.report_type) == job.key:
+            with self._lock:
+                self._cache[job.key] = (time.monotonic() + self.ttl, job)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond REPORT_JOB_HISTORY; cached artifacts stay reachable via the cache."""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= REPORT_JOB_HISTORY:
+                break
+            if not self._jobs[job_id].active:
+                del self._jobs[job_id]
+
+    def status(self):
+        with self._lock:
+            active = sum(job.active for job in self._jobs.values())
+            return dict(self.stats, active=active, cached=len(self._cache))
+
+
+report_jobs = ReportJobs()
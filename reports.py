@@ -0,0 +1,198 @@
+"""
+Streaming PDF reports.
+
+Rows are pulled from an unbuffered cursor in chunks (MySQL streams the result set instead of the client
+loading it whole) and laid out as a paginated table: column widths are measured on the first chunk,
+the header row is repeated on every page, and the document is written to an in-memory buffer.
+"""
+import os
+from dataclasses import dataclass
+from io import BytesIO
+
+from database import stream_rows
+from lazy_imports import lazy_import
+
+fpdf = lazy_import("fpdf")
+
+# ------------------ Report Definitions ------------------
+REPORT_CHUNK_ROWS = int(os.getenv("REPORT_CHUNK_ROWS", 2000))
+
+
+@dataclass(frozen=True)
+class ReportSpec:
+    """
+    One entry of Generate Reports.
+
+    Args:
+        title (str): Title printed on the first page.
+        query (str): SELECT producing the report rows.
+        filename (str): Download file name.
+    """
+
+    title: str
+    query: str
+    filename: str
+
+
+REPORTS = {
+    "Patient History": ReportSpec("Patient History Report", "SELECT * FROM patients", "patient_history_report.pdf"),
+    "Billing": ReportSpec("Billing Report", "SELECT * FROM bill_details", "billing_report.pdf"),
+    "Staff": ReportSpec("Staff Report", "SELECT * FROM staff", "staff_report.pdf"),
+    "Inventory": ReportSpec("Inventory Report", "SELECT * FROM inventory", "inventory_report.pdf"),
+    "Appointments": ReportSpec("Appointments Report", "SELECT * FROM appointments", "appointments_report.pdf"),
+    "Emergency Patients": ReportSpec(
+        "Emergency Patients Report", "SELECT * FROM emergency_patients", "emergency_patients_report.pdf"),
+    "Rooms": ReportSpec("Rooms Report", "SELECT * FROM rooms", "rooms_report.pdf"),
+    "Doctors": ReportSpec("Doctors Report", "SELECT * FROM doctor", "doctors_report.pdf"),
+}
+
+
+# ------------------ PDF Layout ------------------
+_FONT = "Arial"
+_FONT_SIZE = 8
+_ROW_HEIGHT = 6
+_PADDING = 3
+_MIN_WIDTH = 12
+_MAX_WIDTH = 70
+
+
+def _text(value):
+    """Cell text in the core fonts' Latin-1 range (anything else becomes '?'), with NULL shown as N/A."""
+    text = "N/A" if value is None else str(value)
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+class TableLayout:
+    """
+    Column geometry and per-column character budgets for one report table.
+
+    Widths come from the header and a sample of rows, measured with the report font and clamped to
+    [_MIN_WIDTH, _MAX_WIDTH]; if they still exceed the printable width they are scaled down together.
+    Longer values are cut to the column's character budget so every row stays on one line.
+    """
+
+    def __init__(self, pdf, columns, sample_rows):
+        pdf.set_font(_FONT, size=_FONT_SIZE)
+        printable = pdf.w - pdf.l_margin - pdf.r_margin
+        widths = []
+        for i, column in enumerate(columns):
+            longest = max([_text(column)] + [_text(row[i]) for row in sample_rows], key=len)
+            widths.append(min(max(pdf.get_string_width(longest) + 2 * _PADDING, _MIN_WIDTH), _MAX_WIDTH))
+        scale = min(1.0, printable / sum(widths)) if widths else 1.0
+        self.columns = columns
+        self.widths = [width * scale for width in widths]
+        self.edges = [pdf.l_margin]
+        for width in self.widths:
+            self.edges.append(self.edges[-1] + width)
+        self.text_x = [edge + _PADDING for edge in self.edges[:-1]]
+        # Baseline that centres the font's cap height in the row
+        self.baseline = (_ROW_HEIGHT + pdf.font_size * 0.7) / 2
+        # A digit is a fair upper bound on the average glyph width of table text
+        char_width = pdf.get_string_width("0")
+        self.budgets = [max(1, int((width - 2 * _PADDING) / char_width)) for width in self.widths]
+
+    def fit(self, text, i):
+        budget = self.budgets[i]
+        return text if len(text) <= budget else text[:max(1, budget - 2)] + ".."
+
+
+def _new_pdf():
+    pdf = fpdf.FPDF(orientation="L", unit="mm", format="A4")
+    # Page breaks are taken between rows (see TableWriter.row), never inside one
+    pdf.set_auto_page_break(False)
+    return pdf
+
+
+class TableWriter:
+    """
+    Writes table rows with the cheap drawing primitives: one text() per value and one rule per row.
+
+    cell() lays out and measures every value, which dominates rendering time at this row count; here
+    the column rules are drawn once per page, when the page is finished.
+    """
+
+    def __init__(self, pdf, layout):
+        self.pdf = pdf
+        self.layout = layout
+        self.top = None
+        self.bottom = pdf.h - pdf.b_margin
+        self.header()
+
+    def header(self):
+        pdf, layout = self.pdf, self.layout
+        pdf.set_font(_FONT, "B", _FONT_SIZE)
+        pdf.set_fill_color(220, 230, 241)
+        pdf.set_x(pdf.l_margin)
+        for i, column in enumerate(layout.columns):
+            pdf.cell(layout.widths[i], _ROW_HEIGHT, layout.fit(_text(column), i), border=1, align="C", fill=True)
+        pdf.ln()
+        pdf.set_font(_FONT, size=_FONT_SIZE)
+        self.top = pdf.get_y()
+
+    def finish_page(self):
+        pdf, y = self.pdf, self.pdf.get_y()
+        for edge in self.layout.edges:
+            pdf.line(edge, self.top, edge, y)
+
+    def row(self, values):
+        pdf, layout = self.pdf, self.layout
+        y = pdf.get_y()
+        if y + _ROW_HEIGHT > self.bottom:
+            self.finish_page()
+            pdf.add_page()
+            self.header()
+            y = pdf.get_y()
+        baseline, fit = y + layout.baseline, layout.fit
+        for i, value in enumerate(values):
+            pdf.text(layout.text_x[i], baseline, fit(_text(value), i))
+        y += _ROW_HEIGHT
+        pdf.line(layout.edges[0], y, layout.edges[-1], y)
+        pdf.set_y(y)
+
+
+def _pdf_bytes(pdf):
+    """The finished document: fpdf2 returns a bytearray from output(), PyFPDF 1.x a Latin-1 str from dest='S'."""
+    if int(getattr(fpdf, "FPDF_VERSION", "2").split(".")[0]) >= 2:
+        return bytes(pdf.output())
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def render_pdf_report(title, columns, chunks, progress=None):
+    """
+    Lay out `chunks` (lists of row tuples) as a titled, paginated table and return (BytesIO, row count).
+
+    `progress(rows_done)` is called after every chunk.
+    """
+    pdf = _new_pdf()
+    pdf.add_page()
+    pdf.set_font(_FONT, "B", 16)
+    pdf.cell(0, 10, _text(title), align="C")
+    pdf.ln(14)
+
+    writer = None
+    rows_done = 0
+    for rows in chunks:
+        if writer is None:
+            writer = TableWriter(pdf, TableLayout(pdf, columns, rows))
+        for row in rows:
+            writer.row(row)
+        rows_done += len(rows)
+        if progress:
+            progress(rows_done)
+
+    if writer is None:
+        pdf.set_font(_FONT, size=10)
+        pdf.cell(0, 10, "No records.")
+    else:
+        writer.finish_page()
+    return BytesIO(_pdf_bytes(pdf)), rows_done
+
+
+def build_pdf_report(spec, params=None, progress=None, chunk_size=REPORT_CHUNK_ROWS, con=None):
+    """Stream the rows of `spec.query` into a PDF; returns (BytesIO, row count)."""
+    rows = stream_rows(spec.query, params, chunk_size, con)
+    try:
+        header = next(rows)
+        return render_pdf_report(spec.title, header.columns, rows, progress)
+    finally:
+        rows.close()
@@ -0,0 +1,145 @@
+"""
+Pre-aggregated per-day counts and sums behind the time-series charts (daily_rollups).
+
+Write paths bump the affected day inside their own transaction (see bump_rollups()), so a chart reads
+a few hundred rollup rows instead of grouping a whole fact table. The nightly compaction recomputes
+recent days from the fact tables, correcting drift from edits, deletes and writes made outside the app:
+
+    python rollups.py             # recompute the last ROLLUP_COMPACT_DAYS days
+    python rollups.py --all       # recompute everything
+"""
+import argparse
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from database import get_connection
+
+# ------------------ Rollup Table ------------------
+ROLLUP_COMPACT_DAYS = int(os.getenv("ROLLUP_COMPACT_DAYS", 35))
+
+CREATE_ROLLUP_TABLE = """
+    CREATE TABLE IF NOT EXISTS daily_rollups (
+        metric VARCHAR(40) NOT NULL,
+        day DATE NOT NULL,
+        dimension VARCHAR(40) NOT NULL DEFAULT '',
+        count INT NOT NULL DEFAULT 0,
+        amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (metric, day, dimension)
+    )
+"""
+
+
+@dataclass(frozen=True)
+class Rollup:
+    """
+    How one metric is derived from its fact table.
+
+    Args:
+        table (str): Fact table.
+        date_column (str): DATE or TIMESTAMP column giving the day a row counts towards (indexed).
+        dimension (str): SQL expression splitting the day's rows (e.g. room type); '' for none.
+        amount (str): SQL expression summed into `amount`; 0 for pure counts.
+    """
+
+    table: str
+    date_column: str
+    dimension: str = "''"
+    amount: str = "0"
+
+
+ROLLUPS = {
+    "admissions": Rollup("patients", "date_of_consultancy"),
+    "discharges": Rollup("discharged_patients", "discharge_date"),
+    "emergency_arrivals": Rollup("emergency_patients", "admission_date"),
+    "appointments": Rollup("appointments", "appointment_date"),
+    "revenue": Rollup("bill_details", "bill_date", dimension="room_type", amount="total_amount"),
+}
+
+
+def rebuild_sql(metric, condition):
+    """INSERT ... SELECT recomputing `metric` for the fact rows matching `condition`."""
+    rollup = ROLLUPS[metric]
+    return f"""
+        INSERT INTO daily_rollups (metric, day, dimension, count, amount)
+        SELECT '{metric}', DATE({rollup.date_column}), COALESCE({rollup.dimension}, ''), COUNT(*),
+               COALESCE(SUM({rollup.amount}), 0)
+        FROM {rollup.table}
+        WHERE {condition}
+        GROUP BY DATE({rollup.date_column}), COALESCE({rollup.dimension}, '')
+        ON DUPLICATE KEY UPDATE count = VALUES(count), amount = VALUES(amount)
+    """
+
+
+# ------------------ Incremental Updates ------------------
+@dataclass(frozen=True)
+class RollupBump:
+    """
+    One fact row added to a day's rollup.
+
+    Args:
+        metric (str): Key of ROLLUPS.
+        day (date, optional): Day the row counts towards; None for the server's CURDATE().
+        amount (float): Added to the day's amount.
+        dimension (str): Dimension value, e.g. the bill's room type.
+    """
+
+    metric: str
+    day: date = None
+    amount: float = 0
+    dimension: str = ""
+
+
+BUMP_SQL = """
+    INSERT INTO daily_rollups (metric, day, dimension, count, amount)
+    VALUES (%s, COALESCE(%s, CURDATE()), %s, 1, %s)
+    ON DUPLICATE KEY UPDATE count = count + 1, amount = amount + VALUES(amount)
+"""
+
+
+def bump_rollups(con, bumps):
+    """Add `bumps` to their days on `con`, inside the caller's transaction. Does not commit."""
+    bumps = list(bumps)
+    if not bumps:
+        return
+    cur = con.cursor()
+    cur.executemany(BUMP_SQL, [(bump.metric, bump.day, bump.dimension or "", bump.amount) for bump in bumps])
+
+
+# ------------------ Compaction ------------------
+def compact_rollups(con=None, days=ROLLUP_COMPACT_DAYS):
+    """
+    Recompute every metric for the last `days` days (all days if None) from the fact tables.
+
+    Each metric's range is deleted and re-inserted in the same transaction, so days whose fact rows
+    were all deleted disappear and concurrent bumps wait for the rebuild instead of being lost.
+    """
+    if con is None:
+        with get_connection() as pooled:
+            return compact_rollups(pooled, days)
+
+    cur = con.cursor()
+    cur.execute(CREATE_ROLLUP_TABLE)
+    since = None if days is None else date.today() - timedelta(days=days)
+    rebuilt = 0
+    for metric, rollup in ROLLUPS.items():
+        if since is None:
+            cur.execute("DELETE FROM daily_rollups WHERE metric = %s", (metric,))
+            cur.execute(rebuild_sql(metric, "TRUE"))
+        else:
+            cur.execute("DELETE FROM daily_rollups WHERE metric = %s AND day >= %s", (metric, since))
+            cur.execute(rebuild_sql(metric, f"{rollup.date_column} >= %s"), (since,))
+        rebuilt += cur.rowcount
+        con.commit()
+    logging.info(f"Compacted daily_rollups ({rebuilt} rows affected, since {since or 'the beginning'}).")
+    return rebuilt
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Recompute the daily rollups from the fact tables.")
+    parser.add_argument("--days", type=int, default=ROLLUP_COMPACT_DAYS, help="how many recent days to recompute")
+    parser.add_argument("--all", action="store_true", help="recompute every day")
+    args = parser.parse_args()
+    print(f"Compacted daily rollups ({compact_rollups(days=None if args.all else args.days)} rows affected).")
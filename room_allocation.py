@@ -0,0 +1,132 @@
+"""
+Concurrency-safe room allocation.
+
+A room is claimed inside the caller's transaction with a conditional UPDATE (`... AND availability =
+'Not Booked'`) whose affected-row count says whether this transaction won the room, so two receptionists
+can never book the same bed. Auto-pick locks the first free room of the requested kind with
+SELECT ... FOR UPDATE SKIP LOCKED: concurrent allocators skip rooms another transaction is claiming
+instead of queueing behind it. The claim, the write that uses the room and the summary refresh all
+commit together, on one pooled connection.
+"""
+from dataclasses import dataclass
+
+from database import get_connection
+from history_summary import refresh_patient_history
+from rollups import RollupBump, bump_rollups
+
+# ------------------ Room Claims ------------------
+GENERAL_ROOM_TYPES = ["Single", "Double", "Deluxe"]
+
+
+class RoomUnavailableError(Exception):
+    """Raised when the requested room is no longer free, or no room of the requested kind is."""
+
+
+@dataclass(frozen=True)
+class RoomClaim:
+    """
+    A room booked by claim_room().
+
+    Args:
+        room_id (int): rooms.id.
+        room_number (str): Room number shown to users.
+        room_type (str): Single, Double, Deluxe or ICU.
+    """
+
+    room_id: int
+    room_number: str
+    room_type: str
+
+
+# Only a free room changes hands; rowcount tells whether this transaction got it
+_CLAIM_SQL = """
+    UPDATE rooms SET availability = 'Booked', patient_id = %s
+    WHERE id = %s AND is_icu = %s AND availability = 'Not Booked'
+"""
+
+
+def _pick_sql(room_type):
+    return f"""
+        SELECT id FROM rooms
+        WHERE availability = 'Not Booked' AND is_icu = %s{" AND room_type = %s" if room_type else ""}
+        ORDER BY id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    """
+
+
+def claim_room(con, patient_id=None, room_id=None, room_type=None, icu=False):
+    """
+    Book a room for `patient_id` in `con`'s open transaction and return its RoomClaim; the caller commits.
+
+    With `room_id` that room is booked if it is still free (and an ICU room exactly when `icu`); otherwise the first free room with `icu`
+    and, if given, `room_type` is picked. Raises RoomUnavailableError when nothing could be claimed.
+    """
+    cur = con.cursor()
+    if room_id is None:
+        cur.execute(_pick_sql(room_type), (icu, room_type) if room_type else (icu,))
+        row = cur.fetchone()
+        if row is None:
+            kind = "ICU" if icu else room_type or "general"
+            raise RoomUnavailableError(f"No {kind} rooms available!")
+        room_id = row[0]
+
+    cur.execute(_CLAIM_SQL, (patient_id, room_id, icu))
+    if cur.rowcount != 1:
+        raise RoomUnavailableError("That room is no longer available; pick another one.")
+    cur.execute("SELECT id, room_number, room_type FROM rooms WHERE id = %s", (room_id,))
+    return RoomClaim(*cur.fetchone())
+
+
+# ------------------ Allocation Services ------------------
+def allocate_patient_room(patient_id, room_id=None, room_type=None, con=None):
+    """Book a general room (`room_id`, or auto-pick by `room_type`) for a patient and commit; returns the RoomClaim."""
+    if con is None:
+        with get_connection() as pooled:
+            return allocate_patient_room(patient_id, room_id, room_type, pooled)
+    claim = claim_room(con, patient_id, room_id, room_type)
+    refresh_patient_history(con, [patient_id])
+    con.commit()
+    return claim
+
+
+def admit_emergency_patient(name, contact_no, address, blood_type, doctor_id, room_id=None, con=None):
+    """
+    Insert an emergency patient and claim their ICU room (`room_id`, or the first free one) in one
+    transaction, so a patient is never admitted into a room someone else got. Returns (id, RoomClaim).
+    """
+    if con is None:
+        with get_connection() as pooled:
+            return admit_emergency_patient(name, contact_no, address, blood_type, doctor_id, room_id, pooled)
+    # Emergency rooms are linked through emergency_patients.room_id; rooms.patient_id refers to patients
+    claim = claim_room(con, None, room_id, icu=True)
+    cur = con.cursor()
+    cur.execute(
+        """
+        INSERT INTO emergency_patients (name, contact_no, address, blood_type, room_id, doctor_id)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """,
+        (name, contact_no, address, blood_type, claim.room_id, doctor_id)
+    )
+    emergency_id = cur.lastrowid
+    refresh_patient_history(con, [emergency_id])
+    bump_rollups(con, [RollupBump("emergency_arrivals")])
+    con.commit()
+    return emergency_id, claim
+
+
+def allocate_emergency_icu_room(emergency_id, con=None):
+    """Claim the first free ICU room for an emergency patient who has none yet and commit; returns the RoomClaim."""
+    if con is None:
+        with get_connection() as pooled:
+            return allocate_emergency_icu_room(emergency_id, pooled)
+    claim = claim_room(con, None, icu=True)
+    cur = con.cursor()
+    cur.execute("UPDATE emergency_patients SET room_id = %s WHERE id = %s AND room_id IS NULL",
+                (claim.room_id, emergency_id))
+    if cur.rowcount != 1:
+        # Nothing is committed yet, so the rollback on this error releases the room again
+        raise RoomUnavailableError(f"Emergency patient {emergency_id} already has a room or does not exist.")
+    refresh_patient_history(con, [emergency_id])
+    con.commit()
+    return claim
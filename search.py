@@ -0,0 +1,271 @@
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from dataclasses import dataclass
+
+import pandas as pd
+
+from database import cached_query
+from pagination import prefix_pattern
+
+# ------------------ Search Entities ------------------
+SEARCH_LIMIT = 100
+# Unified search: per-entity hits, total time budget (seconds) and worker threads (each holds a pooled connection)
+SEARCH_ALL_LIMIT = 10
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", 2))
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", 4))
+SCORE_COLUMN = "search_score"
+
+
+@dataclass(frozen=True)
+class SearchEntity:
+    """
+    One searchable record type of advanced_search.
+
+    Args:
+        select_list (str): SELECT list with display aliases (the result columns).
+        from_clause (str): FROM clause including any JOINs.
+        key (str): Unique expression used as the final ORDER BY tiebreaker.
+        fulltext (tuple): Column groups, each covered by exactly one FULLTEXT index (see migration 5).
+        prefix_columns (tuple): Indexed text columns for the prefix LIKE fallback.
+        id_columns (tuple): Integer columns matched exactly when the query is a number.
+        exact_columns (tuple): Text columns matched exactly (contact numbers, room/ambulance numbers).
+    """
+
+    select_list: str
+    from_clause: str
+    key: str
+    fulltext: tuple = ()
+    prefix_columns: tuple = ()
+    id_columns: tuple = ()
+    exact_columns: tuple = ()
+
+
+SEARCH_ENTITIES = {
+    "Patients": SearchEntity(
+        select_list="""
+            p.id AS 'Patient ID', p.name AS 'Patient Name', p.age AS 'Age', p.gender AS 'Gender',
+            p.address AS 'Address', p.contact_no AS 'Contact No', p.dob AS 'Date of Birth',
+            p.consultant_name AS 'Consultant', p.date_of_consultancy AS 'Consultancy Date',
+            p.department AS 'Department', p.diseases AS 'Disease', p.fees AS 'Fees',
+            p.medicine AS 'Medicine', p.quantity AS 'Quantity',
+            COALESCE(r.room_number, 'N/A') AS 'Room Number', COALESCE(r.room_type, 'N/A') AS 'Room Type',
+            COALESCE(d.discharge_date, 'N/A') AS 'Discharge Date',
+            COALESCE(d.discharge_reason, 'N/A') AS 'Discharge Reason'
+        """,
+        from_clause="patients p LEFT JOIN rooms r ON p.id = r.patient_id "
+                    "LEFT JOIN discharged_patients d ON p.id = d.patient_id",
+        key="p.id",
+        fulltext=(("p.name", "p.medicine", "p.diseases"),),
+        prefix_columns=("p.name",),
+        id_columns=("p.id",),
+    ),
+    "Staff": SearchEntity(
+        select_list="s.id AS 'Staff ID', s.staff_name AS 'Staff Name', s.role AS 'Role', s.shift AS 'Shift'",
+        from_clause="staff s",
+        key="s.id",
+        fulltext=(("s.staff_name",),),
+        prefix_columns=("s.staff_name",),
+        id_columns=("s.id",),
+    ),
+    "Rooms": SearchEntity(
+        select_list="""
+            r.id AS 'Room ID', r.room_number AS 'Room Number', r.room_type AS 'Room Type',
+            r.availability AS 'Status', r.patient_id AS 'Patient ID'
+        """,
+        from_clause="rooms r",
+        key="r.id",
+        # Room numbers (GEN-12, ICU-3) are not words; the unique room_number index serves prefix lookups
+        prefix_columns=("r.room_number",),
+        id_columns=("r.id", "r.patient_id"),
+    ),
+    "Bills": SearchEntity(
+        select_list="""
+            b.bill_no AS 'Bill No', b.bill_date AS 'Bill Date', b.patient_id AS 'Patient ID',
+            b.name AS 'Patient Name', b.contact_no AS 'Contact No', b.room_charges AS 'Room Charges',
+            b.pathology_fees AS 'Pathology Fees', b.medicine_charges AS 'Medicine Charges',
+            b.doctor_fees AS 'Doctor Fees', b.total_amount AS 'Total Amount', b.room_type AS 'Room Type'
+        """,
+        from_clause="bill_details b",
+        key="b.bill_no",
+        fulltext=(("b.name",),),
+        prefix_columns=("b.name",),
+        id_columns=("b.bill_no", "b.patient_id"),
+    ),
+    "Appointments": SearchEntity(
+        select_list="""
+            a.id AS 'Appointment ID', a.patient_name AS 'Patient Name', a.doctor_name AS 'Doctor Name',
+            a.appointment_date AS 'Appointment Date', a.appointment_time AS 'Appointment Time'
+        """,
+        from_clause="appointments a",
+        key="a.id",
+        fulltext=(("a.patient_name", "a.doctor_name"),),
+        prefix_columns=("a.patient_name", "a.doctor_name"),
+        id_columns=("a.id",),
+    ),
+    "Inventory": SearchEntity(
+        select_list="""
+            i.id AS 'Item ID', i.item_name AS 'Item Name', i.quantity AS 'Quantity', i.expiry_date AS 'Expiry Date'
+        """,
+        from_clause="inventory i",
+        key="i.id",
+        fulltext=(("i.item_name",),),
+        prefix_columns=("i.item_name",),
+        id_columns=("i.id",),
+    ),
+    "Emergency Patients": SearchEntity(
+        select_list="""
+            ep.id AS 'ID', ep.name AS 'Patient Name', ep.contact_no AS 'Contact No', ep.address AS 'Address',
+            ep.blood_type AS 'Blood Type', r.room_number AS 'Room Number', s.staff_name AS 'Assigned Doctor',
+            ep.admission_date AS 'Admission Date'
+        """,
+        from_clause="emergency_patients ep LEFT JOIN rooms r ON ep.room_id = r.id "
+                    "LEFT JOIN staff s ON ep.doctor_id = s.id",
+        key="ep.id",
+        fulltext=(("ep.name",),),
+        prefix_columns=("ep.name",),
+        id_columns=("ep.id",),
+        exact_columns=("ep.contact_no",),
+    ),
+    "Ambulance Service": SearchEntity(
+        select_list="""
+            a.id AS 'Service ID', a.patient_name AS 'Patient Name', a.address AS 'Address',
+            a.blood_type AS 'Blood Type', am.ambulance_number AS 'Ambulance Number',
+            a.dispatch_time AS 'Dispatch Time', a.return_time AS 'Return Time'
+        """,
+        from_clause="ambulance_service a LEFT JOIN ambulances am ON a.ambulance_id = am.id",
+        key="a.id",
+        fulltext=(("a.patient_name",),),
+        prefix_columns=("a.patient_name",),
+        id_columns=("a.id",),
+        exact_columns=("am.ambulance_number",),
+    ),
+    "Discharged Patients": SearchEntity(
+        select_list="""
+            d.patient_id AS 'Patient ID', d.patient_name AS 'Patient Name', d.room_number AS 'Room Number',
+            d.room_type AS 'Room Type', d.discharge_date AS 'Discharge Date', d.discharge_time AS 'Discharge Time',
+            d.discharge_reason AS 'Discharge Reason', d.is_icu AS 'ICU Room'
+        """,
+        from_clause="discharged_patients d",
+        key="d.discharge_id",
+        fulltext=(("d.patient_name",),),
+        prefix_columns=("d.patient_name",),
+        id_columns=("d.patient_id",),
+        exact_columns=("d.room_number",),
+    ),
+    "Doctors": SearchEntity(
+        select_list="""
+            d.id AS 'Doctor ID', s.staff_name AS 'Doctor Name', d.department AS 'Department',
+            s.shift AS 'Shift', d.role AS 'Role'
+        """,
+        from_clause="doctor d JOIN staff s ON d.staff_id = s.id",
+        key="d.id",
+        fulltext=(("s.staff_name",), ("d.department",)),
+        prefix_columns=("s.staff_name", "d.department"),
+        id_columns=("d.id",),
+    ),
+}
+
+
+# ------------------ Query Builders ------------------
+_WORD = re.compile(r"\w+")
+
+
+def boolean_query(text):
+    """'ravi ku' -> '+ravi* +ku*': every word required, each matched as a prefix. Operators in `text` are dropped."""
+    return " ".join(f"+{word}*" for word in _WORD.findall(text))
+
+
+def exact_query(entity, text, limit=SEARCH_LIMIT):
+    """(sql, params) matching the ID/exact columns, or None if none apply to `text`."""
+    conditions, params = [], []
+    if text.isdecimal():
+        conditions += [f"{column} = %s" for column in entity.id_columns]
+        params += [int(text)] * len(entity.id_columns)
+    conditions += [f"{column} = %s" for column in entity.exact_columns]
+    params += [text] * len(entity.exact_columns)
+    if not conditions:
+        return None
+    sql = (f"SELECT {entity.select_list} FROM {entity.from_clause} "
+           f"WHERE {' OR '.join(conditions)} ORDER BY {entity.key} LIMIT %s")
+    return sql, tuple(params) + (limit,)
+
+
+def fulltext_query(entity, text, limit=SEARCH_LIMIT):
+    """(sql, params) ranked by FULLTEXT relevance, or None if the entity has no index or `text` no words."""
+    expression = boolean_query(text)
+    if not entity.fulltext or not expression:
+        return None
+    matches = [f"MATCH ({', '.join(group)}) AGAINST (%s IN BOOLEAN MODE)" for group in entity.fulltext]
+    sql = (f"SELECT {entity.select_list}, {' + '.join(matches)} AS {SCORE_COLUMN} FROM {entity.from_clause} "
+           f"WHERE {' OR '.join(matches)} ORDER BY {SCORE_COLUMN} DESC, {entity.key} LIMIT %s")
+    return sql, (expression,) * (2 * len(matches)) + (limit,)
+
+
+def prefix_query(entity, text, limit=SEARCH_LIMIT):
+    """(sql, params) for an index-backed `column LIKE 'text%'` over the prefix columns."""
+    if not entity.prefix_columns:
+        return None
+    conditions = " OR ".join(f"{column} LIKE %s" for column in entity.prefix_columns)
+    sql = (f"SELECT {entity.select_list} FROM {entity.from_clause} "
+           f"WHERE {conditions} ORDER BY {entity.key} LIMIT %s")
+    return sql, (prefix_pattern(text),) * len(entity.prefix_columns) + (limit,)
+
+
+def search(entity_name, text, limit=SEARCH_LIMIT):
+    """
+    Top `limit` records of `entity_name` matching `text`, best first.
+
+    Exact ID/number hits come first, then FULLTEXT matches by relevance. When FULLTEXT finds nothing
+    (words shorter than innodb_ft_min_token_size, stopwords, or an entity without an index), a prefix
+    LIKE on the indexed name columns is used instead. Every branch is parameterized and index-backed.
+    """
+    entity = SEARCH_ENTITIES[entity_name]
+    text = text.strip()
+    exact = _run(exact_query(entity, text, limit))
+    ranked = _run(fulltext_query(entity, text, limit))
+    if ranked is None or ranked.empty:
+        ranked = _run(prefix_query(entity, text, limit))
+
+    frames = [frame for frame in (exact, ranked) if frame is not None]
+    if not frames:
+        return pd.DataFrame()
+    frames = [frame for frame in frames if not frame.empty] or frames[:1]
+    return pd.concat(frames, ignore_index=True).drop_duplicates().head(limit).reset_index(drop=True)
+
+
+def _run(query):
+    if query is None:
+        return None
+    return cached_query(*query).to_frame().drop(columns=SCORE_COLUMN, errors="ignore")
+
+
+# ------------------ Unified Search ------------------
+_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="search")
+
+
+def search_all(text, entity_names, limit=SEARCH_ALL_LIMIT, timeout=SEARCH_TIMEOUT):
+    """
+    Search every entity in `entity_names` concurrently and yield (entity name, results) as each finishes.
+
+    Searches share a small process-wide thread pool, so a burst of users cannot take every pooled
+    connection. After `timeout` seconds the remaining entities are yielded with results None (and
+    cancelled if they have not started); so are entities whose search failed.
+    """
+    futures = {_executor.submit(search, name, text, limit): name for name in entity_names}
+    pending = set(futures)
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            pending.discard(future)
+            name = futures[future]
+            try:
+                yield name, future.result()
+            except Exception as er:
+                logging.error(f"Unified search of {name} failed: {er}")
+                yield name, None
+    except TimeoutError:
+        logging.warning(f"Unified search for {text!r} timed out after {timeout}s")
+    for future in pending:
+        future.cancel()
+        yield futures[future], None
@@ -0,0 +1,115 @@
+"""
+Exports must reach the browser: st.download_button only accepts str, bytes or a few stream types, and
+the temporary file run_export() writes into is none of them. The database is replaced by an in-memory
+`patients` table so no MySQL server is needed.
+"""
+import re
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+download_data_util = pytest.importorskip("streamlit.runtime.download_data_util")
+from streamlit.errors import StreamlitAPIException  # noqa: E402
+
+import exporters  # noqa: E402
+from database import QueryResult  # noqa: E402
+from mysql.connector.constants import FieldType  # noqa: E402
+
+
+def download_bytes(data):
+    """What st.download_button does with `data` before rendering; raises for unsupported types."""
+    converted, _ = download_data_util.convert_data_to_bytes_and_infer_mime(
+        data, unsupported_error=StreamlitAPIException(f"Invalid binary data format: {type(data)}"))
+    return converted
+
+
+class FakeDatabase:
+    """A `patients` table and export_watermarks, behind the functions exporters.py calls."""
+
+    def __init__(self, keys):
+        self.keys = sorted(keys)
+        self.watermarks = {}
+
+    def stream_rows(self, query, params=None, chunk_size=1000, con=None):
+        keys = self.keys
+        if params:
+            after, upto, *gaps = params
+            keys = [key for key in keys if after < key <= upto or key in gaps]
+        yield QueryResult(["id", "name"], [FieldType.LONG, FieldType.VAR_STRING], [])
+        rows = [(key, f"patient {key}") for key in keys]
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start:start + chunk_size]
+
+    def run_query(self, query, params=None, con=None):
+        if "MAX(" in query:
+            return QueryResult(["max"], [FieldType.LONGLONG], [(max(self.keys, default=None),)])
+        assert re.search(r"FROM export_watermarks", query)
+        return QueryResult(["table_name", "last_key", "rows_exported", "exported_at", "gap_keys"], [],
+                           [(table, *values) for table, values in self.watermarks.items()])
+
+    def get_connection(self):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, database):
+        self.database = database
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return self
+
+    def executemany(self, sql, rows):
+        for table, key, rows_exported, gap_keys in rows:
+            last_key, total, _, _ = self.database.watermarks.get(table, (0, 0, None, None))
+            self.database.watermarks[table] = (max(last_key, key), total + rows_exported, "now", gap_keys)
+
+    def commit(self):
+        pass
+
+
+@pytest.fixture
+def database(monkeypatch):
+    fake = FakeDatabase(range(1, 1001))
+    monkeypatch.setattr(exporters, "stream_rows", fake.stream_rows)
+    monkeypatch.setattr(exporters, "run_query", fake.run_query)
+    monkeypatch.setattr(exporters, "get_connection", fake.get_connection)
+    return fake
+
+
+def test_temporary_file_is_rejected_by_download_button(database):
+    result = exporters.run_export([exporters.EXPORTS["Patients"]], "CSV", chunk_size=100)
+    with result.file, pytest.raises(StreamlitAPIException):
+        download_bytes(result.file)
+
+
+@pytest.mark.parametrize("names", [["Patients"], ["Patients", "Appointments"]])
+def test_export_reaches_download_button(database, names):
+    result = exporters.run_export([exporters.EXPORTS[name] for name in names], "CSV", chunk_size=100)
+    data = download_bytes(result.read())
+    assert result.file.closed
+    if len(names) == 1:
+        assert data.decode().splitlines()[0] == "id,name"
+        assert len(data.decode().splitlines()) == 1001
+    else:
+        assert data.startswith(b"PK")
+
+
+def test_delta_export_download_advances_watermarks(database):
+    """A delta export renders its download button, and its on_click saves the watermarks."""
+    specs = [exporters.EXPORTS["Patients"]]
+    result = exporters.run_export(specs, "CSV", delta=True)
+    assert len(download_bytes(result.read()).splitlines()) == 1001
+    # export_data passes save_watermarks' input as the download button's on_click args
+    exporters.save_watermarks(result.watermarks)
+    assert database.watermarks["patients"][:2] == (1000, 1000)
+
+    database.keys += [1001, 1002]
+    result = exporters.run_export(specs, "CSV", delta=True)
+    rows = download_bytes(result.read()).decode().splitlines()[1:]
+    assert [row.split(",")[0] for row in rows] == ["1001", "1002"]
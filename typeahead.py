@@ -0,0 +1,197 @@
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+
+import mysql.connector as sq
+
+from database import add_write_listener, run_query
+
+# ------------------ Prefix Index ------------------
+TYPEAHEAD_LIMIT = 20
+TYPEAHEAD_TTL = float(os.getenv("TYPEAHEAD_TTL", 60))
+_WORD = re.compile(r"\w+")
+
+
+class PrefixIndex:
+    """
+    In-memory prefix index over (key, label, text) records; `label` is what is shown, `text` what is searched.
+
+    Texts are indexed twice in sorted arrays: whole (lower-cased) and word by word, so "ravi k" finds
+    "Ravi Kumar" and "kum" or "12" find "Ravi Kumar 12" through its words. A lookup is two bisects plus
+    a scan of at most a few times `limit` entries, independent of the number of records.
+    """
+
+    def __init__(self, records):
+        self._labels = {}
+        full, words = [], []
+        for key, label, text in records:
+            self._labels[key] = label
+            lowered = text.lower()
+            full.append((lowered, key))
+            words.extend((word, key) for word in set(_WORD.findall(lowered)))
+        full.sort(key=lambda item: item[0])
+        words.sort(key=lambda item: item[0])
+        self._full = [text for text, _ in full]
+        self._full_keys = [key for _, key in full]
+        self._words = [text for text, _ in words]
+        self._word_keys = [key for _, key in words]
+
+    def __len__(self):
+        return len(self._labels)
+
+    def __contains__(self, key):
+        return key in self._labels
+
+    @staticmethod
+    def _scan(texts, keys, prefix, seen, limit, found):
+        i = bisect_left(texts, prefix)
+        while i < len(texts) and len(found) < limit and texts[i].startswith(prefix):
+            if keys[i] not in seen:
+                seen.add(keys[i])
+                found.append(keys[i])
+            i += 1
+
+    def lookup(self, text, limit=TYPEAHEAD_LIMIT, exclude=()):
+        """
+        Up to `limit` (key, label) pairs, skipping keys in `exclude`: whole-text prefix matches first,
+        then word prefix matches.
+        """
+        prefix = " ".join(text.lower().split())
+        found, seen = [], set(exclude)
+        self._scan(self._full, self._full_keys, prefix, seen, limit, found)
+        if prefix and len(found) < limit:
+            self._scan(self._words, self._word_keys, prefix, seen, limit, found)
+        return [(key, self._labels[key]) for key in found]
+
+
+_EMPTY_INDEX = PrefixIndex([])
+
+
+# ------------------ Typeahead Sources ------------------
+class _Reloading:
+    """
+    The result of `load()`, kept until a committed write to one of `tables` or for TYPEAHEAD_TTL seconds;
+    the TTL bounds staleness from writes made by other server processes or the mysql client.
+    """
+
+    def __init__(self, load, tables):
+        self._load = load
+        self.tables = frozenset(tables)
+        self._value = None
+        self._expires = 0.0
+        self._version = 0
+        self._lock = threading.Lock()
+        self.latest = None
+        add_write_listener(self._on_write)
+
+    def _on_write(self, tables):
+        if tables & self.tables:
+            self._version += 1
+            self._value = None
+
+    def get(self):
+        value = self._value
+        if value is None or self._expires < time.monotonic():
+            with self._lock:
+                value = self._value
+                if value is None or self._expires < time.monotonic():
+                    version = self._version
+                    value = self.latest = self._load()
+                    # A write committed while the rows were read leaves the value unpublished (reloaded next time)
+                    if version == self._version:
+                        self._value, self._expires = value, time.monotonic() + TYPEAHEAD_TTL
+        return value
+
+
+class TypeaheadSource:
+    """
+    A PrefixIndex over the (id, name) rows of `query`, labelled "name (ID: id)" and searchable by name or id.
+
+    The index is built on first use and rebuilt lazily after any committed write to one of `tables`, or
+    once it is TYPEAHEAD_TTL seconds old. If the rows cannot be read the source behaves as empty and
+    `error` holds the database error until a later load succeeds.
+    """
+
+    def __init__(self, query, tables):
+        self.query = query
+        self.error = None
+        self._rows = _Reloading(self._build, tables)
+
+    def _build(self):
+        rows = run_query(self.query).rows
+        index = PrefixIndex((key, f"{name} (ID: {key})", f"{name} {key}") for key, name in rows)
+        return index, {key: name for key, name in rows}
+
+    def index(self):
+        try:
+            index, _ = self._rows.get()
+        except sq.Error as er:
+            logging.error(f"Error loading typeahead rows ({self.query}): {er}")
+            self.error = er
+            return _EMPTY_INDEX
+        self.error = None
+        return index
+
+    def __len__(self):
+        return len(self.index())
+
+    def lookup(self, text, limit=TYPEAHEAD_LIMIT, exclude=()):
+        return self.index().lookup(text, limit, exclude)
+
+    def name(self, key):
+        latest = self._rows.latest
+        return latest[1].get(key) if latest else None
+
+
+class ExcludingSource:
+    """
+    `source` without the keys returned by `excluded_query`.
+
+    Only the excluded key set is re-read after a committed write to `tables`, so e.g. booking a room
+    does not rebuild the whole patient index. Degrades to empty, with `error` set, like TypeaheadSource.
+    """
+
+    def __init__(self, source, excluded_query, tables):
+        self.source = source
+        self._error = None
+        self._excluded = _Reloading(lambda: frozenset(row[0] for row in run_query(excluded_query).rows), tables)
+
+    @property
+    def error(self):
+        return self._error or self.source.error
+
+    def _excluded_keys(self):
+        try:
+            keys = self._excluded.get()
+        except sq.Error as er:
+            logging.error(f"Error loading typeahead exclusions: {er}")
+            self._error = er
+            return None
+        self._error = None
+        return keys
+
+    def __len__(self):
+        index, excluded = self.source.index(), self._excluded_keys()
+        if excluded is None:
+            return 0
+        return len(index) - sum(1 for key in excluded if key in index)
+
+    def lookup(self, text, limit=TYPEAHEAD_LIMIT):
+        excluded = self._excluded_keys()
+        if excluded is None:
+            return []
+        return self.source.lookup(text, limit, excluded)
+
+    def name(self, key):
+        return self.source.name(key)
+
+
+PATIENTS = TypeaheadSource("SELECT id, name FROM patients", {"patients"})
+# A room write only re-reads the booked patient ids (a few rows, idx_rooms_patient), not every patient
+PATIENTS_WITHOUT_ROOMS = ExcludingSource(
+    PATIENTS, "SELECT DISTINCT patient_id FROM rooms WHERE patient_id IS NOT NULL", {"rooms"}
+)
+DOCTOR_STAFF = TypeaheadSource("SELECT id, staff_name FROM staff WHERE role = 'Doctor'", {"staff"})